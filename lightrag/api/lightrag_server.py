@@ -475,6 +475,9 @@ def create_app(args):
                 },
                 "auth_mode": auth_mode,
                 "pipeline_busy": pipeline_status.get("busy", False),
+                # Adaptive concurrency limit, calls in flight and queue depth
+                "llm_concurrency": rag.llm_model_func.status(),
+                "embedding_concurrency": rag.embedding_func.status(),
                 "core_version": core_version,
                 "api_version": __api_version__,
                 "webui_title": webui_title,
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from dataclasses import dataclass, field
 from typing import (
     Any,
+    ClassVar,
     Literal,
     TypedDict,
     TypeVar,
@@ -89,6 +90,12 @@ class QueryParam:
     ids: list[str] | None = None
     """List of ids to filter the results."""
 
+    branch_timeout: float = float(os.getenv("QUERY_BRANCH_TIMEOUT", "60"))
+    """Timeout in seconds of each concurrent retrieval branch (local, global, vector).
+    A branch that times out or fails contributes no context instead of failing the query.
+    Set to 0 to disable.
+    """
+
     model_func: Callable[..., object] | None = None
     """Optional override for the LLM model function to use for this specific query.
     If provided, this will be used instead of the global model function.
@@ -157,6 +164,23 @@ class BaseVectorStorage(StorageNameSpace, ABC):
     ) -> list[dict[str, Any]]:
         """Query the vector storage and retrieve top_k results."""
 
+    async def query_batch(
+        self, queries: list[str], top_k: int, ids: list[str] | None = None
+    ) -> list[list[dict[str, Any]]]:
+        """Query the vector storage for several queries at once
+
+        Default implementation runs the queries one by one.
+        Override this method for better performance in storage backends
+        that can encode and score a batch of queries together.
+
+        Returns:
+            One list of top_k results per query, in the order of queries
+        """
+        results = []
+        for query in queries:
+            results.append(await self.query(query, top_k, ids))
+        return results
+
     @abstractmethod
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """Insert or update vectors in the storage.
@@ -229,6 +253,9 @@ class BaseVectorStorage(StorageNameSpace, ABC):
 class BaseKVStorage(StorageNameSpace, ABC):
     embedding_func: EmbeddingFunc
 
+    get_by_ids_batch_size: ClassVar[int] = 1000
+    """Max number of ids sent to get_by_ids in one call by get_by_ids_map, 0 for no limit"""
+
     @abstractmethod
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get value by id"""
@@ -237,6 +264,30 @@ class BaseKVStorage(StorageNameSpace, ABC):
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         """Get values by ids"""
 
+    async def get_by_ids_map(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Get values by ids as a dict keyed by id, missing ids are left out
+
+        Ids are fetched with get_by_ids in batches of get_by_ids_batch_size.
+        Backends returning records in request order (with None for missing ids)
+        are mapped by position, others by the "_id" or "id" field of the record.
+        """
+        ids = list(dict.fromkeys(ids))
+        batch_size = self.get_by_ids_batch_size or len(ids) or 1
+        result: dict[str, dict[str, Any]] = {}
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i : i + batch_size]
+            records = await self.get_by_ids(batch)
+            aligned = len(records) == len(batch)
+            for pos, record in enumerate(records):
+                if not record:
+                    continue
+                key = record.get("_id", record.get("id"))
+                if key is None and aligned:
+                    key = batch[pos]
+                if key is not None:
+                    result[str(key)] = record
+        return result
+
     @abstractmethod
     async def filter_keys(self, keys: set[str]) -> set[str]:
         """Return un-exist keys"""
@@ -280,6 +331,34 @@ class BaseKVStorage(StorageNameSpace, ABC):
              False: if the cache drop failed, or the cache mode is not supported
         """
 
+    async def get_cache_by_chunk_ids(
+        self,
+        chunk_ids: set[str],
+        mode: str = "default",
+        cache_type: str | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Get the cache entries of a mode produced for the given chunks, specifically for llm_response_cache
+
+        The default implementation scans the whole mode, backends with an index on
+        chunk_id should override it.
+
+        Args:
+            chunk_ids (set[str]): Chunk IDs the cache entries were produced for
+            mode (str): Cache mode, "default" holds the entity extraction cache
+            cache_type (str | None): Only return entries of this cache type
+
+        Returns:
+            Dict mapping args_hash -> cache entry
+        """
+        mode_cache = await self.get_by_id(mode) or {}
+        return {
+            args_hash: cache_entry
+            for args_hash, cache_entry in mode_cache.items()
+            if isinstance(cache_entry, dict)
+            and cache_entry.get("chunk_id") in chunk_ids
+            and (cache_type is None or cache_entry.get("cache_type") == cache_type)
+        }
+
     # async def drop_cache_by_chunk_ids(self, chunk_ids: list[str] | None = None) -> bool:
     #     """Delete specific cache records from storage by chunk IDs
 
@@ -550,6 +629,35 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Insert or update multiple nodes in the graph.
+
+        Default implementation upserts nodes one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            nodes: A dictionary mapping node IDs to their node properties
+        """
+        for node_id, node_data in nodes.items():
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """Insert or update multiple edges in the graph.
+
+        Default implementation upserts edges one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            edges: A dictionary mapping (source_node_id, target_node_id) tuples to
+                their edge properties, both nodes must already exist
+        """
+        for (src_id, tgt_id), edge_data in edges.items():
+            await self.upsert_edge(src_id, tgt_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
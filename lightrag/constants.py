@@ -12,6 +12,48 @@ DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE = 6
 DEFAULT_WOKERS = 2
 DEFAULT_TIMEOUT = 150
 
+# ColBERT late-interaction index: rebuild once this share of passages is dead
+DEFAULT_COLBERT_COMPACTION_THRESHOLD = 0.2
+# ColBERT late-interaction index: merge the delta segment once it holds this many passages
+DEFAULT_COLBERT_DELTA_MERGE_SIZE = 2048
+# ColBERT late-interaction index: threads running encode/search/index calls and
+# how many calls may be queued for them
+DEFAULT_COLBERT_EXECUTOR_WORKERS = 1
+DEFAULT_COLBERT_EXECUTOR_QUEUE_SIZE = 64
+
+# Persistence of in-memory storages during document processing: flush at most
+# every this many seconds, or once this many processed documents are pending
+DEFAULT_PERSIST_INTERVAL = 10
+DEFAULT_PERSIST_MAX_DOCS = 20
+
+# Log-structured KV storage: compact the log once this share of it is dead records,
+# but only when the log is larger than the minimum size in bytes
+DEFAULT_LOG_KV_COMPACTION_RATIO = 0.5
+DEFAULT_LOG_KV_COMPACTION_MIN_BYTES = 16 * 1024 * 1024
+
+# Embedding similarity query cache: entries kept in the in-memory similarity index per
+# mode and cache type (least recently used are evicted), and seconds after which an
+# entry is no longer matched by similarity (0 disables expiry)
+DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES = 10000
+DEFAULT_EMBEDDING_CACHE_TTL = 0
+
+# Graph merging: entity and relation keys are hashed onto this many locks each, merges
+# of keys on different locks run concurrently
+DEFAULT_GRAPH_DB_LOCK_STRIPES = 64
+
+# Adaptive LLM concurrency: lowest number of concurrent calls the limit is lowered to,
+# seconds above which a successful call is treated as overload (0 disables), and budget
+# of estimated prompt tokens per minute (0 disables)
+DEFAULT_MIN_ASYNC = 1
+DEFAULT_LLM_LATENCY_TARGET = 0
+DEFAULT_LLM_TOKENS_PER_MINUTE = 0
+
+# LLM and embedding API clients: connections kept open per pooled client, and seconds an
+# idle connection stays open for reuse
+DEFAULT_LLM_HTTP_MAX_CONNECTIONS = 1000
+DEFAULT_LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = 100
+DEFAULT_LLM_HTTP_KEEPALIVE_EXPIRY = 60
+
 # Separator for graph fields
 GRAPH_FIELD_SEP = "<SEP>"
 
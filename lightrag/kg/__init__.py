@@ -2,6 +2,7 @@ STORAGE_IMPLEMENTATIONS = {
     "KV_STORAGE": {
         "implementations": [
             "JsonKVStorage",
+            "LogKVStorage",
             "RedisKVStorage",
             "PGKVStorage",
             "MongoKVStorage",
@@ -24,6 +25,7 @@ STORAGE_IMPLEMENTATIONS = {
     "VECTOR_STORAGE": {
         "implementations": [
             "NanoVectorDBStorage",
+            "MemmapVectorDBStorage",
             "ColbertVectorDBStorage",
             "MilvusVectorDBStorage",
             "ChromaVectorDBStorage",
@@ -49,6 +51,7 @@ STORAGE_IMPLEMENTATIONS = {
 STORAGE_ENV_REQUIREMENTS: dict[str, list[str]] = {
     # KV Storage Implementations
     "JsonKVStorage": [],
+    "LogKVStorage": [],
     "MongoKVStorage": [],
     "RedisKVStorage": ["REDIS_URI"],
     # "TiDBKVStorage": ["TIDB_USER", "TIDB_PASSWORD", "TIDB_DATABASE"],
@@ -71,6 +74,7 @@ STORAGE_ENV_REQUIREMENTS: dict[str, list[str]] = {
     ],
     # Vector Storage Implementations
     "NanoVectorDBStorage": [],
+    "MemmapVectorDBStorage": [],
     "ColbertVectorDBStorage": [],
     "MilvusVectorDBStorage": [],
     "ChromaVectorDBStorage": [],
@@ -89,7 +93,9 @@ STORAGE_ENV_REQUIREMENTS: dict[str, list[str]] = {
 STORAGES = {
     "NetworkXStorage": ".kg.networkx_impl",
     "JsonKVStorage": ".kg.json_kv_impl",
+    "LogKVStorage": ".kg.log_kv_impl",
     "NanoVectorDBStorage": ".kg.nano_vector_db_impl",
+    "MemmapVectorDBStorage": ".kg.memmap_vector_db_impl",
     "ColbertVectorDBStorage": ".kg.colbert_vector_db_impl",
     "JsonDocStatusStorage": ".kg.json_doc_status_impl",
     "Neo4JStorage": ".kg.neo4j_impl",
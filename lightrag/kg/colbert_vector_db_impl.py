@@ -1,12 +1,28 @@
+import asyncio
 import os
+import json
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Any, final
 from dataclasses import dataclass
+import numpy as np
 import time
 import shutil
 
 from lightrag.utils import (
     logger,
     compute_mdhash_id,
+    get_env_value,
+    load_json,
+    write_json,
+)
+from lightrag.constants import (
+    DEFAULT_COLBERT_COMPACTION_THRESHOLD,
+    DEFAULT_COLBERT_DELTA_MERGE_SIZE,
+    DEFAULT_COLBERT_EXECUTOR_QUEUE_SIZE,
+    DEFAULT_COLBERT_EXECUTOR_WORKERS,
 )
 import pipmaster as pm
 from lightrag.base import BaseVectorStorage
@@ -22,6 +38,528 @@ from .shared_storage import (
 )
 
 
+class _PassageDocMap:
+    """Persistent docid -> passage map kept next to a RAGatouille index.
+
+    RAGatouille can only reach passages through `search`, so every upserted
+    passage is also recorded here. The sidecar directory holds:
+      - passages.bin: append-only log of JSON encoded passage records
+      - offsets.npy: int64 (offset, length) rows into passages.bin, one per ordinal
+      - ids.json: document ids in ordinal order, null for dead ordinals
+      - tombstones.json: ColBERT passage ids that must be hidden from search
+      - pid_owner.npy: int64 array indexed by ColBERT passage id holding the
+        live ordinal that owns the passage, -1 for dead or unknown passages
+      - delta.json: ordinals that live in the delta segment, i.e. that are not
+        merged into the PLAID index yet
+
+    offsets.npy and passages.bin are memory-mapped, so a lookup is a dict hit
+    plus a slice of the mapped log, without loading every passage in memory.
+    Deleted or superseded passages stay in the log as dead ordinals until the
+    index is compacted and the sidecar is rewritten.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._records_file = os.path.join(path, "passages.bin")
+        self._offsets_file = os.path.join(path, "offsets.npy")
+        self._ids_file = os.path.join(path, "ids.json")
+        self._tombstones_file = os.path.join(path, "tombstones.json")
+        self._pid_owner_file = os.path.join(path, "pid_owner.npy")
+        self._delta_file = os.path.join(path, "delta.json")
+
+        self._ids: list[str | None] = []
+        self._ordinals: dict[str, int] = {}
+        self._offsets = np.zeros((0, 2), dtype=np.int64)
+        self._pending_offsets: list[tuple[int, int]] = []
+        self._tombstones: set[int] = set()
+        self._pid_owner = np.full(0, -1, dtype=np.int64)
+        # Live ordinal -> ColBERT passage ids it owns, the inverse of the bitmap
+        self._owned_pids: dict[int, list[int]] = {}
+        self._delta: set[int] = set()
+        # Delta ordinals a merge could not index, only a compaction absorbs them
+        self._unmergeable: set[int] = set()
+        self._dirty = False
+        # Bumped on every change, lets callers detect stale derived state
+        self.version = 0
+        self._records_mmap: mmap.mmap | None = None
+        self.load()
+
+    def load(self) -> None:
+        """(Re)load the committed sidecar from disk, dropping pending appends"""
+        self._close_mmap()
+        self._pending_offsets = []
+        self._dirty = False
+        self.version += 1
+        ids = load_json(self._ids_file) or []
+        if ids and os.path.exists(self._offsets_file):
+            offsets = np.load(self._offsets_file, mmap_mode="r")
+            # Guard against a partially written sidecar
+            count = min(len(ids), len(offsets))
+            self._ids = ids[:count]
+            self._offsets = offsets[:count]
+        else:
+            self._ids = []
+            self._offsets = np.zeros((0, 2), dtype=np.int64)
+        self._ordinals = {
+            doc_id: i for i, doc_id in enumerate(self._ids) if doc_id is not None
+        }
+        self._tombstones = set(load_json(self._tombstones_file) or [])
+        self._owned_pids = {}
+        if os.path.exists(self._pid_owner_file):
+            self._pid_owner = np.array(np.load(self._pid_owner_file), dtype=np.int64)
+            owned = np.flatnonzero(self._pid_owner >= 0)
+            owners = self._pid_owner[owned]
+            order = np.argsort(owners, kind="stable")
+            owners, owned = owners[order], owned[order]
+            bounds = np.flatnonzero(np.diff(owners)) + 1
+            for group in np.split(owned, bounds) if len(owned) else []:
+                self._owned_pids[int(self._pid_owner[group[0]])] = group.tolist()
+        else:
+            # Sidecars written before the bitmap existed: rebuild it from records
+            self._pid_owner = np.full(0, -1, dtype=np.int64)
+            for ordinal in self._ordinals.values():
+                pids = self._read(ordinal).get("__pids__", [])
+                self._set_owner([int(pid) for pid in pids], ordinal)
+        self._delta = {
+            ordinal
+            for ordinal in load_json(self._delta_file) or []
+            if ordinal < len(self._ids) and self._ids[ordinal] is not None
+        }
+        self._unmergeable = set()
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._ordinals
+
+    def ordinal(self, doc_id: str) -> int | None:
+        return self._ordinals.get(doc_id)
+
+    def doc_ids(self) -> list[str]:
+        return list(self._ordinals.keys())
+
+    @property
+    def tombstones(self) -> set[int]:
+        return self._tombstones
+
+    @property
+    def dead_ratio(self) -> float:
+        """Share of ordinals in the log that belong to deleted or superseded passages"""
+        if not self._ids:
+            return 0.0
+        return (len(self._ids) - len(self._ordinals)) / len(self._ids)
+
+    def is_live(self, doc_id: str, pid: int | None = None) -> bool:
+        """Check whether a search hit still refers to a live passage"""
+        if doc_id not in self._ordinals:
+            return False
+        return pid is None or int(pid) not in self._tombstones
+
+    def _retire(self, doc_id: str) -> int | None:
+        """Mark the live ordinal of doc_id dead and tombstone its passage ids"""
+        ordinal = self._ordinals.pop(doc_id, None)
+        if ordinal is None:
+            return None
+        self._ids[ordinal] = None
+        self._delta.discard(ordinal)
+        self._unmergeable.discard(ordinal)
+        pids = self._owned_pids.pop(ordinal, [])
+        self._tombstones.update(pids)
+        self._set_owner(pids, -1)
+        self._dirty = True
+        self.version += 1
+        return ordinal
+
+    def _set_owner(self, pids: list[int], ordinal: int) -> None:
+        if not pids:
+            return
+        size = max(pids) + 1
+        if size > len(self._pid_owner):
+            grown = np.full(max(size, 2 * len(self._pid_owner)), -1, dtype=np.int64)
+            grown[: len(self._pid_owner)] = self._pid_owner
+            self._pid_owner = grown
+        self._pid_owner[pids] = ordinal
+        if ordinal >= 0:
+            self._owned_pids.setdefault(ordinal, []).extend(pids)
+
+    def scope(self, doc_ids: list[str]) -> tuple[list[str], int]:
+        """Resolve a document id subset to the documents that own live passages
+
+        Uses the pid -> owner bitmap, so no passage record has to be read.
+
+        Returns:
+            The live document ids of the subset and how many live passages they own
+        """
+        ordinals = [
+            self._ordinals[doc_id]
+            for doc_id in set(doc_ids)
+            if doc_id in self._ordinals
+        ]
+        if not ordinals or not len(self._pid_owner):
+            return [], 0
+        live_mask = np.isin(self._pid_owner, np.asarray(ordinals, dtype=np.int64))
+        live_ordinals = np.unique(self._pid_owner[live_mask])
+        return [self._ids[int(o)] for o in live_ordinals], int(live_mask.sum())
+
+    def remove(self, doc_ids: list[str]) -> list[str]:
+        """Tombstone passages by document id, returning the ids that were live"""
+        return [doc_id for doc_id in doc_ids if self._retire(doc_id) is not None]
+
+    @property
+    def delta_size(self) -> int:
+        return len(self._delta)
+
+    @property
+    def mergeable_delta_size(self) -> int:
+        return len(self._delta) - len(self._unmergeable)
+
+    @property
+    def unmergeable_size(self) -> int:
+        return len(self._unmergeable)
+
+    def delta_records(
+        self, mergeable_only: bool = False
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Live (ordinal, record) pairs of the delta segment, in ordinal order"""
+        ordinals = self._delta - self._unmergeable if mergeable_only else self._delta
+        return [(ordinal, self._read(ordinal)) for ordinal in sorted(ordinals)]
+
+    def mark_unmergeable(self, doc_ids: list[str]) -> None:
+        """Keep delta passages a merge could not index out of later merges"""
+        for doc_id in doc_ids:
+            ordinal = self._ordinals.get(doc_id)
+            if ordinal in self._delta:
+                self._unmergeable.add(ordinal)
+
+    def is_live_delta(self, doc_id: str, ordinal: int) -> bool:
+        """Check whether a delta segment hit is still the live version of doc_id"""
+        return ordinal in self._delta and self._ordinals.get(doc_id) == ordinal
+
+    def assign_pids(self, doc_id: str, pids: list[int]) -> bool:
+        """Move a delta passage into the PLAID index once it owns passage ids
+
+        Passage ids that are tombstoned or owned by another ordinal are ignored,
+        they belong to an older version of the document.
+        """
+        ordinal = self._ordinals.get(doc_id)
+        if ordinal is None:
+            return False
+        pids = [
+            pid
+            for pid in pids
+            if pid not in self._tombstones
+            and (pid >= len(self._pid_owner) or self._pid_owner[pid] == -1)
+        ]
+        if not pids:
+            return False
+        self._set_owner(pids, ordinal)
+        self._delta.discard(ordinal)
+        self._unmergeable.discard(ordinal)
+        self._dirty = True
+        self.version += 1
+        return True
+
+    def append(self, records: list[dict[str, Any]], delta: bool = False) -> list[int]:
+        """Append passage records, returning the ordinal assigned to each one
+
+        A record whose id is already live supersedes the previous one: the old
+        ordinal is retired and its ColBERT passages are tombstoned.
+
+        Args:
+            records: Passage records, "__pids__" lists the ColBERT passage ids
+                of records that are already in the PLAID index
+            delta: Whether the records go to the delta segment
+        """
+        if not records:
+            return []
+        os.makedirs(self._path, exist_ok=True)
+        ordinals = []
+        with open(self._records_file, "ab") as f:
+            position = f.tell()
+            for record in records:
+                self._retire(record["__id__"])
+                payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                f.write(payload)
+                ordinal = len(self._ids)
+                self._set_owner(
+                    [int(pid) for pid in record.get("__pids__", [])], ordinal
+                )
+                self._ids.append(record["__id__"])
+                self._pending_offsets.append((position, len(payload)))
+                self._ordinals[record["__id__"]] = ordinal
+                if delta:
+                    self._delta.add(ordinal)
+                ordinals.append(ordinal)
+                position += len(payload)
+        self._dirty = True
+        self.version += 1
+        return ordinals
+
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        ordinal = self._ordinals.get(doc_id)
+        if ordinal is None:
+            return None
+        return self._read(ordinal)
+
+    def get_many(self, doc_ids: list[str]) -> list[dict[str, Any] | None]:
+        return [self.get(doc_id) for doc_id in doc_ids]
+
+    def records(self) -> list[dict[str, Any]]:
+        return [self._read(ordinal) for ordinal in self._ordinals.values()]
+
+    def _read(self, ordinal: int) -> dict[str, Any]:
+        committed = len(self._offsets)
+        if ordinal < committed:
+            offset, length = (int(v) for v in self._offsets[ordinal])
+        else:
+            offset, length = self._pending_offsets[ordinal - committed]
+
+        records_mmap = self._records_mmap
+        if records_mmap is None or offset + length > len(records_mmap):
+            # passages.bin grew since it was mapped
+            records_mmap = self._remap()
+        return json.loads(records_mmap[offset : offset + length])
+
+    def _remap(self) -> mmap.mmap:
+        self._close_mmap()
+        with open(self._records_file, "rb") as f:
+            self._records_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._records_mmap
+
+    def _close_mmap(self) -> None:
+        if self._records_mmap is not None:
+            self._records_mmap.close()
+            self._records_mmap = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def save(self) -> None:
+        """Commit pending changes by rewriting the offsets table, id list and tombstones"""
+        if not self._dirty:
+            return
+        os.makedirs(self._path, exist_ok=True)
+        offsets = np.concatenate(
+            [
+                np.asarray(self._offsets, dtype=np.int64),
+                np.asarray(self._pending_offsets, dtype=np.int64).reshape(-1, 2),
+            ]
+        )
+        # Write to temporary files first so readers never see a torn sidecar
+        tmp_offsets = self._offsets_file + ".tmp"
+        with open(tmp_offsets, "wb") as f:
+            np.save(f, offsets)
+        tmp_ids = self._ids_file + ".tmp"
+        write_json(self._ids, tmp_ids)
+        tmp_tombstones = self._tombstones_file + ".tmp"
+        write_json(sorted(self._tombstones), tmp_tombstones)
+        tmp_pid_owner = self._pid_owner_file + ".tmp"
+        with open(tmp_pid_owner, "wb") as f:
+            np.save(f, self._pid_owner)
+        tmp_delta = self._delta_file + ".tmp"
+        write_json(sorted(self._delta), tmp_delta)
+        os.replace(tmp_offsets, self._offsets_file)
+        os.replace(tmp_ids, self._ids_file)
+        os.replace(tmp_tombstones, self._tombstones_file)
+        os.replace(tmp_pid_owner, self._pid_owner_file)
+        os.replace(tmp_delta, self._delta_file)
+
+        self._pending_offsets = []
+        self._dirty = False
+        self._offsets = np.load(self._offsets_file, mmap_mode="r")
+
+    @classmethod
+    def write(cls, path: str, records: list[dict[str, Any]]) -> None:
+        """Write a new sidecar holding only the given records (after compaction)"""
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        docmap = cls(path)
+        docmap.append(records)
+        docmap.save()
+        docmap.close()
+
+    def close(self) -> None:
+        """Release the memory map of the passage log"""
+        self._close_mmap()
+
+    def clear(self) -> None:
+        self._close_mmap()
+        if os.path.exists(self._path):
+            shutil.rmtree(self._path)
+        self._ids = []
+        self._ordinals = {}
+        self._offsets = np.zeros((0, 2), dtype=np.int64)
+        self._pending_offsets = []
+        self._tombstones = set()
+        self._pid_owner = np.full(0, -1, dtype=np.int64)
+        self._owned_pids = {}
+        self._delta = set()
+        self._unmergeable = set()
+        self._dirty = False
+        self.version += 1
+
+
+# Suffixes of the directories involved in swapping in a compacted index, and of the
+# marker recording that the compacted index and sidecar are complete
+_COMPACT_SUFFIX = ".compact"
+_STALE_SUFFIX = ".stale"
+_SWAP_MARKER_SUFFIX = ".swap"
+
+
+def _swap_compacted(index_path: str, docmap_path: str, empty: bool) -> None:
+    """Replace the index and sidecar directories with their compacted versions
+
+    A marker is written once both compacted directories are complete, so that a swap
+    interrupted by a crash is finished by _recover_compaction on the next start.
+
+    Args:
+        index_path: Index directory, the compacted one is at index_path + ".compact"
+        docmap_path: Sidecar directory, the compacted one is at docmap_path + ".compact"
+        empty: No passage is left, the directories are removed and not replaced
+    """
+    marker = index_path + _SWAP_MARKER_SUFFIX
+    write_json({"empty": empty}, marker + ".tmp")
+    os.replace(marker + ".tmp", marker)
+    _finish_swap(index_path, docmap_path, empty)
+
+
+def _finish_swap(index_path: str, docmap_path: str, empty: bool) -> None:
+    # Idempotent: a current directory is only moved aside while its compacted
+    # version (or, for an empty result, none at all) is still waiting to be moved in
+    for path in (index_path, docmap_path):
+        compact_path = path + _COMPACT_SUFFIX
+        stale_path = path + _STALE_SUFFIX
+        if os.path.exists(compact_path) or empty:
+            if os.path.exists(path):
+                shutil.rmtree(stale_path, ignore_errors=True)
+                os.replace(path, stale_path)
+            if os.path.exists(compact_path):
+                os.replace(compact_path, path)
+    os.remove(index_path + _SWAP_MARKER_SUFFIX)
+    for path in (index_path, docmap_path):
+        shutil.rmtree(path + _STALE_SUFFIX, ignore_errors=True)
+
+
+def _recover_compaction(index_path: str, docmap_path: str) -> bool:
+    """Finish a compaction swap interrupted by a crash, returning whether one was found
+
+    Without a marker the current directories were never touched; leftover compacted
+    directories are overwritten by the next compaction.
+    """
+    marker = index_path + _SWAP_MARKER_SUFFIX
+    if os.path.exists(marker):
+        empty = bool((load_json(marker) or {}).get("empty"))
+        logger.warning(f"Finishing interrupted compaction swap of {index_path}")
+        _finish_swap(index_path, docmap_path, empty)
+        return True
+    for path in (index_path, docmap_path):
+        shutil.rmtree(path + _STALE_SUFFIX, ignore_errors=True)
+    return False
+
+
+class _ColbertExecutor:
+    """Process-wide bounded pool running blocking RAGatouille work off the event loop
+
+    Model loading, ColBERT encoding, PLAID searches and index builds are CPU or
+    GPU bound calls that would otherwise stall the event loop (and with it the
+    API server) for their whole duration. They are run on a dedicated thread
+    pool of `workers` threads. At most `queue_size` calls may be submitted or
+    running at once; further callers wait on the event loop without holding a
+    thread.
+
+    A single worker is the default: RAGatouille models are not thread safe and
+    a GPU gains little from concurrent ColBERT calls.
+    """
+
+    _lock = threading.Lock()
+    _pool: ThreadPoolExecutor | None = None
+    _workers = DEFAULT_COLBERT_EXECUTOR_WORKERS
+    _queue_size = DEFAULT_COLBERT_EXECUTOR_QUEUE_SIZE
+    # asyncio semaphores are bound to the loop they are first used in
+    _slots: dict[int, asyncio.Semaphore] = {}
+
+    @classmethod
+    def configure(cls, workers: int, queue_size: int) -> None:
+        """Set the pool size and queue bound, effective until the pool is started"""
+        with cls._lock:
+            if cls._pool is not None:
+                if (workers, queue_size) != (cls._workers, cls._queue_size):
+                    logger.debug(
+                        "ColBERT executor already started, ignoring new configuration"
+                    )
+                return
+            cls._workers = max(1, workers)
+            cls._queue_size = max(cls._workers, queue_size)
+
+    @classmethod
+    def _get_pool(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(
+                    max_workers=cls._workers, thread_name_prefix="colbert"
+                )
+            return cls._pool
+
+    @classmethod
+    async def run(cls, func, /, *args, **kwargs):
+        """Run func(*args, **kwargs) in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        slots = cls._slots.get(id(loop))
+        if slots is None:
+            slots = cls._slots.setdefault(id(loop), asyncio.Semaphore(cls._queue_size))
+        async with slots:
+            return await loop.run_in_executor(
+                cls._get_pool(), partial(func, *args, **kwargs)
+            )
+
+
+class _ColbertModelRegistry:
+    """Process-wide registry sharing ColBERT checkpoints between RAGatouille models.
+
+    Every namespace (entities, relationships, chunks) of every LightRAG instance
+    needs its own RAGatouille model, because a model is bound to one index and
+    holds that index's in-memory state. The inference checkpoint, which is the
+    bulk of a model's memory, is the same for all of them. The first model
+    loaded for a checkpoint name registers its checkpoint. Models loaded after
+    it are re-pointed to the registered one, so their own copy of the weights
+    can be garbage collected and only one copy stays resident.
+    """
+
+    _lock = threading.Lock()
+    _checkpoints: dict[str, Any] = {}
+
+    @classmethod
+    def load(cls, index_path: str, index_root: str, fresh: bool = False):
+        """Load the model of an index, or a fresh pretrained model
+
+        Loads are serialized so that concurrent first uses register a single
+        checkpoint.
+        """
+        with cls._lock:
+            if os.path.exists(index_path) and not fresh:
+                client = RAGPretrainedModel.from_index(index_path)
+            else:
+                client = RAGPretrainedModel.from_pretrained(
+                    "colbert-ir/colbertv2.0", index_root=index_root
+                )
+            cls._share_checkpoint(client)
+            return client
+
+    @classmethod
+    def _share_checkpoint(cls, client) -> None:
+        model = getattr(client, "model", None)
+        name = getattr(model, "checkpoint", None)
+        checkpoint = getattr(model, "inference_ckpt", None)
+        if name is None or checkpoint is None:
+            return
+        shared = cls._checkpoints.setdefault(str(name), checkpoint)
+        if shared is not checkpoint:
+            model.inference_ckpt = shared
+            logger.debug(f"Reusing loaded ColBERT checkpoint {name}")
+
+
 @final
 @dataclass
 class ColbertVectorDBStorage(BaseVectorStorage):
@@ -39,15 +577,70 @@ class ColbertVectorDBStorage(BaseVectorStorage):
                 "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
             )
         self.cosine_better_than_threshold = cosine_threshold
+        # Rebuild the index from live passages once this share of passages is dead
+        self._compaction_threshold = float(
+            kwargs.get(
+                "compaction_threshold",
+                get_env_value(
+                    "COLBERT_COMPACTION_THRESHOLD",
+                    DEFAULT_COLBERT_COMPACTION_THRESHOLD,
+                    float,
+                ),
+            )
+        )
+        # Merge the delta segment into the PLAID index once it holds this many passages
+        self._delta_merge_size = int(
+            kwargs.get(
+                "delta_merge_size",
+                get_env_value(
+                    "COLBERT_DELTA_MERGE_SIZE", DEFAULT_COLBERT_DELTA_MERGE_SIZE, int
+                ),
+            )
+        )
+
+        # Pool running blocking RAGatouille calls, shared by every namespace
+        _ColbertExecutor.configure(
+            workers=int(
+                kwargs.get(
+                    "executor_workers",
+                    get_env_value(
+                        "COLBERT_EXECUTOR_WORKERS",
+                        DEFAULT_COLBERT_EXECUTOR_WORKERS,
+                        int,
+                    ),
+                )
+            ),
+            queue_size=int(
+                kwargs.get(
+                    "executor_queue_size",
+                    get_env_value(
+                        "COLBERT_EXECUTOR_QUEUE_SIZE",
+                        DEFAULT_COLBERT_EXECUTOR_QUEUE_SIZE,
+                        int,
+                    ),
+                )
+            ),
+        )
 
         # RAGatouille uses index directories, not single files
         self._index_name = f"vdb_{self.namespace}"
         self._index_path = os.path.join(
-            self.global_config["working_dir"],"colbert/indexes", self._index_name
+            self.global_config["working_dir"], "colbert/indexes", self._index_name
         )
+        # Sidecar docid -> passage map lives next to the index directory
+        self._docmap_path = f"{self._index_path}.docmap"
+        self._docmap = _PassageDocMap(self._docmap_path)
 
-        # Initialize RAGatouille model
-        self.client = self._get_client()
+        # Serializes index mutations (upsert, delete, merge, compaction) of this namespace
+        self._index_lock = asyncio.Lock()
+        self._maintenance_task: asyncio.Task | None = None
+        # Passages encoded in memory for the delta segment, stale versions included
+        self._encoded_count = 0
+        # Results of the last query_batch, consumed by matching query() calls
+        self._prefetched: dict[tuple, list[dict[str, Any]]] = {}
+        self._prefetched_version = -1
+
+        # RAGatouille model is loaded on first use, see _get_client
 
     async def initialize(self):
         """Initialize storage data"""
@@ -55,24 +648,83 @@ class ColbertVectorDBStorage(BaseVectorStorage):
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock(enable_logging=False)
-        
-        # Initialize or load existing index
-        # await self._get_client()
+        async with self._storage_lock:
+            if _recover_compaction(self._index_path, self._docmap_path):
+                self._docmap.load()
 
-    def _get_client(self):
-        """Check if the storage should be reloaded"""
-    
-        if os.path.exists(self._index_path):
-            client = RAGPretrainedModel.from_index(
-                self._index_path
-            )
-        else:
-            client = RAGPretrainedModel.from_pretrained(
-                "colbert-ir/colbertv2.0",
-                index_root=self.global_config["working_dir"]
-            )
+    def _load_client(self, fresh: bool = False):
+        """Load the RAGatouille model from the index, or a fresh pretrained model"""
+        return _ColbertModelRegistry.load(
+            self._index_path, self.global_config["working_dir"], fresh=fresh
+        )
+
+    def _open_client(self) -> None:
+        """Load the model and rebuild the in-memory delta segment on it"""
+        self._client = self._load_client()
+        self._encoded_count = 0
+        self._encode_delta(self._client)
+
+    async def _get_client(self, load: bool = True):
+        """Check if the storage should be reloaded
+
+        Args:
+            load: Load the model if this namespace has not used it yet. Callers
+                that only read the docmap pass False to avoid loading ColBERT.
+        """
+        # Acquire lock to prevent concurrent read and write
+        async with self._storage_lock:
+            # Check if data needs to be reloaded
+            if self.storage_updated.value:
+                logger.info(
+                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                self._docmap.load()
+                if self._client is not None:
+                    await _ColbertExecutor.run(self._open_client)
+                # Reset update flag
+                self.storage_updated.value = False
+            if self._client is None and load:
+                # First use of this namespace
+                await _ColbertExecutor.run(self._open_client)
+
+            return self._client
+
+    def _encode_delta(self, client) -> None:
+        """(Re)build the in-memory delta segment from the live delta passages
+
+        Delta passages are encoded with ColBERT but kept out of the PLAID index
+        until the next merge; they are searched exhaustively next to it.
+        """
+        if self._encoded_count:
+            client.clear_encoded_docs(force=True)
+            self._encoded_count = 0
+        entries = self._docmap.delta_records()
+        if not entries:
+            return
+        client.encode(
+            [record["content"] for _, record in entries],
+            document_metadatas=[
+                {**self._index_metadata(record), "__ordinal__": ordinal}
+                for ordinal, record in entries
+            ],
+            verbose=False,
+        )
+        self._encoded_count = len(entries)
+
+    @staticmethod
+    def _index_metadata(record: dict[str, Any]) -> dict[str, Any]:
+        """Metadata stored in the index for a docmap record"""
+        return {k: v for k, v in record.items() if k not in ("content", "__pids__")}
 
-        return client
+    def _passage_ids(self, client, doc_ids: list[str]) -> dict[str, list[int]]:
+        """Map document ids to the ColBERT passage ids (pids) they were split into"""
+        docid_pid_map = getattr(getattr(client, "model", None), "docid_pid_map", None)
+        if not docid_pid_map:
+            return {}
+        return {
+            doc_id: [int(pid) for pid in docid_pid_map.get(doc_id, [])]
+            for doc_id in doc_ids
+        }
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
@@ -87,7 +739,7 @@ class ColbertVectorDBStorage(BaseVectorStorage):
             return
 
         current_time = int(time.time())
-        
+
         # Prepare documents and metadata for upsertion
         documents = []
         metadatas = []
@@ -100,7 +752,7 @@ class ColbertVectorDBStorage(BaseVectorStorage):
                 continue
 
             documents.append(content)
-            
+
             # Prepare metadata
             metadata = {
                 "__id__": doc_id,
@@ -113,157 +765,517 @@ class ColbertVectorDBStorage(BaseVectorStorage):
         if not documents:
             logger.warning("No valid documents to upsert.")
             return
-        
-            
-        # RAGatouille's index method
-        if not os.path.exists(self._index_path):
-            # Create new index
-            self.client.index(
-                collection=documents,
-                document_ids=ids,
-                document_metadatas=metadatas,
-                index_name=self._index_name,
-                max_document_length=512,
+
+        client = await self._get_client()
+
+        # Wait for a running merge or compaction, they swap the index underneath us
+        async with self._index_lock:
+            # New passages go to the append-only delta segment: record them in
+            # the sidecar and encode them, the PLAID index is left untouched
+            ordinals = self._docmap.append(
+                [
+                    {**metadata, "content": content, "__pids__": []}
+                    for metadata, content in zip(metadatas, documents)
+                ],
+                delta=True,
             )
-        else:
-            # Add to existing index
-            self.client.add_to_index(
-                new_collection=documents,
-                new_document_ids=ids,
-                new_document_metadatas=metadatas,
-                index_name=self._index_name,
+            await _ColbertExecutor.run(
+                client.encode,
+                documents,
+                document_metadatas=[
+                    {**metadata, "__ordinal__": ordinal}
+                    for metadata, ordinal in zip(metadatas, ordinals)
+                ],
+                verbose=False,
             )
-        
+            self._encoded_count += len(documents)
+
         logger.debug(f"Upserted {len(documents)} documents to {self.namespace}")
 
-    async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+    def _search_plan(
+        self, top_k: int, ids: list[str] | None
+    ) -> tuple[int, dict[str, Any]] | None:
+        """Work out k and the RAGatouille search arguments, None if nothing can match"""
+        # Over-fetch so that tombstoned passages do not eat into top_k
+        slack = min(len(self._docmap.tombstones), top_k)
+
+        search_kwargs = {}
+        k = top_k + slack
+        if ids:
+            scoped_ids, live_passages = self._docmap.scope(ids)
+            if not scoped_ids:
+                return None
+            # PLAID only scores passages of these documents
+            search_kwargs["doc_ids"] = scoped_ids
+            k = min(k, live_passages + slack)
+        return k, search_kwargs
+
+    def _delta_k(self, top_k: int, ids: list[str] | None) -> int:
+        """How many hits to take from the delta segment"""
+        if ids:
+            # The segment is small, score it fully and filter by id afterwards
+            return self._encoded_count
+        stale = self._encoded_count - self._docmap.delta_size
+        return min(self._encoded_count, top_k + stale)
+
+    def _format_results(
+        self, results: list[dict[str, Any]], top_k: int, ids: list[str] | None
     ) -> list[dict[str, Any]]:
-        """Query the vector storage"""
-        
-        # RAGatouille search
-        results = self.client.search(
-            query=query,
-            k=top_k,
-            index_name=self._index_name,
-        )
+        """Convert RAGatouille hits of one query to the vector storage result format
 
-        # Convert results to expected format
+        results may mix PLAID index hits and delta segment hits, they are merged
+        by score.
+        """
         formatted_results = []
-        for result in results:
+        seen = set()
+        for result in sorted(results, key=lambda r: r.get("score", 0.0), reverse=True):
+            metadata = result.get("document_metadata", {})
+            doc_id = result.get("document_id", metadata.get("__id__"))
+            # Skip deleted or superseded passages until compaction drops them
+            if "__ordinal__" in metadata:
+                live = self._docmap.is_live_delta(doc_id, metadata["__ordinal__"])
+            else:
+                live = self._docmap.is_live(doc_id, result.get("passage_id"))
+            if not live or doc_id in seen:
+                continue
+            seen.add(doc_id)
             formatted_result = {
-                "id": result.get("document_id", result.get("id")),
+                "id": doc_id,
                 "content": result.get("content", result.get("document")),
                 "distance": result.get("score", 0.0),  # RAGatouille uses 'score'
                 "created_at": result.get("document_metadata", {}).get("__created_at__"),
             }
-            
+
             # Add metadata
-            metadata = result.get("document_metadata", {})
             for key, value in metadata.items():
                 if not key.startswith("__"):
                     formatted_result[key] = value
-                    
+
             formatted_results.append(formatted_result)
 
         # Filter by IDs if specified
         if ids:
             formatted_results = [r for r in formatted_results if r["id"] in ids]
 
-        return formatted_results
+        return formatted_results[:top_k]
+
+    @staticmethod
+    def _prefetch_key(query: str, top_k: int, ids: list[str] | None) -> tuple:
+        return query, top_k, tuple(sorted(ids)) if ids else None
+
+    def _search(
+        self,
+        client,
+        queries: list[str],
+        plan: tuple[int, dict[str, Any]] | None,
+        delta_k: int,
+    ) -> list[list[dict[str, Any]]]:
+        """Search the PLAID index and the delta segment, blocking, run in the executor
+
+        Returns:
+            The raw hits of both searches for each query
+        """
+
+        def per_query(batch_results):
+            # RAGatouille returns one result list per query when given a list,
+            # but a flat list for a single query
+            if len(queries) == 1 and (
+                not batch_results or isinstance(batch_results[0], dict)
+            ):
+                return [batch_results]
+            return batch_results
+
+        batch_results = [[] for _ in queries]
+        if plan is not None:
+            k, search_kwargs = plan
+            # RAGatouille search
+            index_results = client.search(
+                query=queries,
+                k=k,
+                index_name=self._index_name,
+                **search_kwargs,
+            )
+            for results, hits in zip(batch_results, per_query(index_results)):
+                results.extend(hits)
+        if delta_k:
+            # Exhaustive search of the delta segment
+            delta_results = client.search_encoded_docs(query=queries, k=delta_k)
+            for results, hits in zip(batch_results, per_query(delta_results)):
+                results.extend(hits)
+        return batch_results
+
+    async def _search_hits(
+        self, queries: list[str], top_k: int, ids: list[str] | None
+    ) -> list[list[dict[str, Any]]]:
+        client = await self._get_client()
+        plan = None
+        if os.path.exists(self._index_path):
+            plan = self._search_plan(top_k, ids)
+        delta_k = self._delta_k(top_k, ids) if self._encoded_count else 0
+        if plan is None and not delta_k:
+            return [[] for _ in queries]
+        return await _ColbertExecutor.run(
+            self._search, client, list(queries), plan, delta_k
+        )
+
+    async def query(
+        self, query: str, top_k: int, ids: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """Query the vector storage
+
+        When ids is given, candidate generation is restricted to the passages of
+        those ids instead of post-filtering an unscoped top_k, so a scoped query
+        still returns up to top_k results.
+        """
+
+        await self._get_client()
+
+        # Served by a preceding query_batch of the same query, unless data changed since
+        if self._prefetched_version != self._docmap.version:
+            self._prefetched = {}
+        prefetched = self._prefetched.pop(self._prefetch_key(query, top_k, ids), None)
+        if prefetched is not None:
+            return prefetched
+
+        hits = await self._search_hits([query], top_k, ids)
+        return self._format_results(hits[0], top_k, ids)
+
+    async def query_batch(
+        self, queries: list[str], top_k: int, ids: list[str] | None = None
+    ) -> list[list[dict[str, Any]]]:
+        """Query the vector storage for several queries at once
+
+        All queries are encoded in one forward pass and scored against the index
+        in a single RAGatouille search call. The results are also kept for the
+        next query() of the same query, so a batch prefetch followed by one
+        pipeline per query (see LightRAG.aquery_batch) searches only once.
+        """
+        if not queries:
+            return []
+
+        batch_results = await self._search_hits(queries, top_k, ids)
+        formatted = [
+            self._format_results(results, top_k, ids) for results in batch_results
+        ]
+        # Only the latest batch is kept, unused entries would otherwise pile up
+        self._prefetched = {
+            self._prefetch_key(query, top_k, ids): results
+            for query, results in zip(queries, formatted)
+        }
+        self._prefetched_version = self._docmap.version
+        return formatted
 
     async def delete(self, ids: list[str]):
         """Delete vectors with specified IDs
 
-        Note: RAGatouille doesn't support direct deletion by ID.
-        This is a limitation of the ColBERT architecture.
-        A workaround would be to rebuild the index without the specified documents.
+        Importance notes:
+        1. Deleted passages are tombstoned and hidden from query() immediately,
+           they are physically removed by the next compaction of the index
+        2. Changes will be persisted to disk during the next index_done_callback
+
+        Args:
+            ids: List of vector IDs to be deleted
         """
-        logger.warning(
-            f"RAGatouille/ColBERT doesn't support direct deletion of documents by ID. "
-            f"Attempted to delete {len(ids)} documents from {self.namespace}. "
-            f"Consider rebuilding the index without these documents."
-        )
+        try:
+            await self._get_client(load=False)
+            async with self._index_lock:
+                deleted = self._docmap.remove(ids)
+            logger.debug(
+                f"Successfully tombstoned {len(deleted)} vectors from {self.namespace}"
+            )
+        except Exception as e:
+            logger.error(f"Error while deleting vectors from {self.namespace}: {e}")
 
     async def delete_entity(self, entity_name: str) -> None:
-        """Delete entity (limited support in RAGatouille)"""
-        entity_id = compute_mdhash_id(entity_name, prefix="ent-")
-        logger.warning(
-            f"RAGatouille doesn't support direct deletion. "
-            f"Entity {entity_name} (ID: {entity_id}) deletion logged but not executed."
-        )
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+
+        try:
+            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+            logger.debug(
+                f"Attempting to delete entity {entity_name} with ID {entity_id}"
+            )
+            await self._get_client(load=False)
+            async with self._index_lock:
+                if self._docmap.remove([entity_id]):
+                    logger.debug(f"Successfully deleted entity {entity_name}")
+                else:
+                    logger.debug(f"Entity {entity_name} not found in storage")
+        except Exception as e:
+            logger.error(f"Error deleting entity {entity_name}: {e}")
 
     async def delete_entity_relation(self, entity_name: str) -> None:
-        """Delete entity relations (limited support in RAGatouille)"""
-        logger.warning(
-            f"RAGatouille doesn't support direct deletion. "
-            f"Relations for entity {entity_name} deletion logged but not executed."
-        )
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+
+        try:
+            await self._get_client(load=False)
+            async with self._index_lock:
+                ids_to_delete = [
+                    record["__id__"]
+                    for record in self._docmap.records()
+                    if record.get("src_id") == entity_name
+                    or record.get("tgt_id") == entity_name
+                ]
+                logger.debug(
+                    f"Found {len(ids_to_delete)} relations for entity {entity_name}"
+                )
+                if ids_to_delete:
+                    self._docmap.remove(ids_to_delete)
+                    logger.debug(
+                        f"Deleted {len(ids_to_delete)} relations for {entity_name}"
+                    )
+                else:
+                    logger.debug(f"No relations found for entity {entity_name}")
+        except Exception as e:
+            logger.error(f"Error deleting relations for {entity_name}: {e}")
+
+    def _maybe_schedule_maintenance(self) -> None:
+        """Start a background compaction or delta merge when one is due
+
+        Compaction rebuilds the index from every live passage, so it also
+        absorbs the delta segment and takes precedence over a merge. Delta
+        passages a merge could not index only count toward compaction.
+        """
+        if self._maintenance_task is not None and not self._maintenance_task.done():
+            return
+        if self._docmap.dead_ratio >= self._compaction_threshold:
+            logger.info(
+                f"Scheduling compaction of {self.namespace}: "
+                f"{self._docmap.dead_ratio:.0%} of passages are dead"
+            )
+            self._maintenance_task = asyncio.create_task(self._compact())
+        elif self._docmap.unmergeable_size >= self._delta_merge_size:
+            logger.info(
+                f"Scheduling compaction of {self.namespace}: "
+                f"{self._docmap.unmergeable_size} delta passages cannot be merged"
+            )
+            self._maintenance_task = asyncio.create_task(self._compact())
+        elif self._docmap.mergeable_delta_size >= self._delta_merge_size:
+            logger.info(
+                f"Scheduling merge of {self._docmap.mergeable_delta_size} delta "
+                f"passages into {self.namespace}"
+            )
+            self._maintenance_task = asyncio.create_task(self._merge_delta())
+
+    async def _merge_delta(self) -> None:
+        """Merge the delta segment into the PLAID index with a single indexing call
+
+        Passages that RAGatouille does not assign new passage ids to (a newer
+        version of an id that is already indexed) stay in the delta segment
+        until the next compaction and are left out of later merges.
+        """
+        client = await self._get_client()
+        async with self._index_lock:
+            entries = self._docmap.delta_records(mergeable_only=True)
+            if not entries:
+                return
+            records = [record for _, record in entries]
+            ids = [record["__id__"] for record in records]
+            try:
+                if not os.path.exists(self._index_path):
+                    # Create new index
+                    await _ColbertExecutor.run(
+                        client.index,
+                        collection=[record["content"] for record in records],
+                        document_ids=ids,
+                        document_metadatas=[
+                            self._index_metadata(record) for record in records
+                        ],
+                        index_name=self._index_name,
+                        max_document_length=512,
+                    )
+                else:
+                    # Add to existing index
+                    await _ColbertExecutor.run(
+                        client.add_to_index,
+                        new_collection=[record["content"] for record in records],
+                        new_document_ids=ids,
+                        new_document_metadatas=[
+                            self._index_metadata(record) for record in records
+                        ],
+                        index_name=self._index_name,
+                    )
+
+                passage_ids = self._passage_ids(client, ids)
+                merged = [
+                    doc_id
+                    for doc_id in ids
+                    if self._docmap.assign_pids(doc_id, passage_ids.get(doc_id, []))
+                ]
+                self._docmap.mark_unmergeable(sorted(set(ids) - set(merged)))
+                # Leftovers are re-encoded, merged passages leave the segment
+                await _ColbertExecutor.run(self._encode_delta, client)
+
+                async with self._storage_lock:
+                    self._docmap.save()
+                    # Notify other processes that data has been updated
+                    await set_all_update_flags(self.namespace)
+                    # Reset own update flag to avoid self-reloading
+                    self.storage_updated.value = False
+
+                logger.info(
+                    f"Merged {len(merged)}/{len(ids)} delta passages into {self.namespace}"
+                )
+            except Exception as e:
+                logger.error(f"Error merging delta segment of {self.namespace}: {e}")
+
+    async def _compact(self) -> None:
+        """Rebuild the PLAID index from live passages only and swap it in
+
+        The new index and sidecar are built under temporary names while queries keep
+        using the current ones; upserts and deletes wait on the index lock until the
+        swap is done. The storage lock, shared by every storage, is only held for the
+        directory swap, the model of the new index is loaded after it.
+        """
+        async with self._index_lock:
+            records = self._docmap.records()
+            compact_name = f"{self._index_name}{_COMPACT_SUFFIX}"
+            try:
+                passage_ids = {}
+                if records:
+                    builder = await _ColbertExecutor.run(self._load_client, fresh=True)
+                    await _ColbertExecutor.run(
+                        builder.index,
+                        collection=[record["content"] for record in records],
+                        document_ids=[record["__id__"] for record in records],
+                        document_metadatas=[
+                            self._index_metadata(record) for record in records
+                        ],
+                        index_name=compact_name,
+                        max_document_length=512,
+                        overwrite_index=True,
+                    )
+                    passage_ids = self._passage_ids(
+                        builder, [record["__id__"] for record in records]
+                    )
+                await _ColbertExecutor.run(
+                    _PassageDocMap.write,
+                    self._docmap_path + _COMPACT_SUFFIX,
+                    [
+                        {**record, "__pids__": passage_ids.get(record["__id__"], [])}
+                        for record in records
+                    ],
+                )
+
+                async with self._storage_lock:
+                    _swap_compacted(self._index_path, self._docmap_path, not records)
+                    # Notify other processes that data has been updated
+                    await set_all_update_flags(self.namespace)
+                    # Reset own update flag to avoid self-reloading
+                    self.storage_updated.value = False
+            except Exception as e:
+                logger.error(f"Error compacting {self.namespace}: {e}")
+                return
+
+            # Queries are served from the previous model and sidecar until both are
+            # replaced; loaded on next use when nothing is left
+            client = await _ColbertExecutor.run(self._load_client) if records else None
+            docmap = await _ColbertExecutor.run(_PassageDocMap, self._docmap_path)
+            self._docmap.close()
+            self._docmap = docmap
+            self._client = client
+            # Every live passage is in the new index, the delta segment is empty
+            self._encoded_count = 0
+
+            logger.info(f"Compacted {self.namespace} to {len(records)} live passages")
 
     async def index_done_callback(self) -> bool:
         """Save/persist the index"""
         async with self._storage_lock:
             try:
                 # RAGatouille automatically persists indexes to disk
-                # The index is already saved when created/updated
-                
+                # The index is already saved when created/updated,
+                # only the docid -> passage sidecar needs to be committed
+                self._docmap.save()
+
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
-                
+
                 logger.debug(f"Index persistence completed for {self.namespace}")
+                # Merge the delta segment or reclaim dead passages in the background
+                self._maybe_schedule_maintenance()
                 return True
-                
+
             except Exception as e:
                 logger.error(f"Error in index_done_callback for {self.namespace}: {e}")
                 return False
 
+    def _format_passage(self, record: dict[str, Any]) -> dict[str, Any]:
+        return {
+            **record,
+            "id": record.get("__id__"),
+            "created_at": record.get("__created_at__"),
+        }
+
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
-        """Get document by ID (requires search since RAGatouille doesn't have direct ID lookup)"""
+        """Get passage data by its ID from the sidecar docmap
+
+        Args:
+            id: The unique identifier of the passage
+
+        Returns:
+            The passage data if found, or None if not found
+        """
+        await self._get_client(load=False)
         try:
-            # Since RAGatouille doesn't have direct ID lookup, we need to search
-            # This is not efficient but necessary given ColBERT's architecture
-            client = await self._get_client()
-            
-            # We can't directly get by ID, so this is a limitation
-            # One approach is to search with a unique term from the document
-            # But without knowing the content, this is challenging
-            
-            logger.warning(
-                f"get_by_id is not efficiently supported in RAGatouille. "
-                f"Consider using query() instead for ID: {id}"
-            )
-            return None
-            
+            record = self._docmap.get(id)
         except Exception as e:
             logger.error(f"Error getting document by ID {id}: {e}")
             return None
+        return self._format_passage(record) if record is not None else None
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get multiple documents by IDs (limited support)"""
+        """Get multiple passage data by their IDs from the sidecar docmap
+
+        Args:
+            ids: List of unique identifiers
+
+        Returns:
+            List of passage data objects that were found
+        """
         if not ids:
             return []
-            
-        logger.warning(
-            f"get_by_ids is not efficiently supported in RAGatouille. "
-            f"Consider using query() instead for {len(ids)} IDs"
-        )
-        
-        # Return empty list as direct ID lookup is not supported
-        return []
+
+        await self._get_client(load=False)
+        try:
+            records = self._docmap.get_many(ids)
+        except Exception as e:
+            logger.error(f"Error getting {len(ids)} documents by ID: {e}")
+            return []
+        return [
+            self._format_passage(record) for record in records if record is not None
+        ]
+
+    async def finalize(self):
+        """Wait for a running merge or compaction so the index is not left half swapped"""
+        if self._maintenance_task is not None and not self._maintenance_task.done():
+            await self._maintenance_task
 
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources"""
         try:
+            await self.finalize()
             async with self._storage_lock:
                 # Remove index directory if it exists
                 if os.path.exists(self._index_path):
                     shutil.rmtree(self._index_path)
                     logger.info(f"Removed index directory: {self._index_path}")
+                self._docmap.clear()
 
-                # Reinitialize the client
-                self._client = self._model
+                # The client is reloaded on next use
+                self._client = None
+                self._encoded_count = 0
 
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
@@ -273,15 +1285,15 @@ class ColbertVectorDBStorage(BaseVectorStorage):
                 logger.info(
                     f"Process {os.getpid()} dropped {self.namespace} (path: {self._index_path})"
                 )
-                
+
             return {"status": "success", "message": "data dropped"}
-            
+
         except Exception as e:
             logger.error(f"Error dropping {self.namespace}: {e}")
             return {"status": "error", "message": str(e)}
 
     @property
     async def client_storage(self):
-        """Get client storage (RAGatouille doesn't expose internal storage like NanoVectorDB)"""
-        logger.warning("RAGatouille doesn't expose internal storage like NanoVectorDB")
-        return None
\ No newline at end of file
+        """Get client storage in the same shape as NanoVectorDB, served from the docmap"""
+        await self._get_client(load=False)
+        return {"data": self._docmap.records()}
@@ -8,7 +8,7 @@ import numpy as np
 from dataclasses import dataclass
 import pipmaster as pm
 
-from lightrag.utils import logger, compute_mdhash_id
+from lightrag.utils import logger, compute_mdhash_id, get_env_value
 from lightrag.base import BaseVectorStorage
 
 from .shared_storage import (
@@ -25,6 +25,81 @@ FAISS_PACKAGE = "faiss-gpu" if USE_GPU else "faiss-cpu"
 if not pm.is_installed(FAISS_PACKAGE):
     pm.install(FAISS_PACKAGE)
 
+# Index families selectable through vector_db_storage_cls_kwargs["index_type"]
+FAISS_INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+# HNSW cannot remove vectors, deleted ones are rebuilt away past this share of the index
+HNSW_REBUILD_DEAD_RATIO = 0.2
+
+_META_VERSION = 1
+_STR_SEP = "\x00"
+
+
+def write_meta_file(id_to_meta: dict[int, dict], file_name: str) -> None:
+    """
+    Write the faiss id -> metadata map as a columnar npz sidecar, replacing file_name atomically.
+    Every metadata key becomes one column: int64 array for ints, NUL separated utf-8
+    blob for strings and JSON values otherwise; a presence mask is stored for sparse keys.
+    """
+    metas = list(id_to_meta.values())
+    arrays = {"fids": np.fromiter(id_to_meta, dtype=np.int64, count=len(metas))}
+    columns = {}
+    for i, key in enumerate(dict.fromkeys(k for meta in metas for k in meta)):
+        values = [meta[key] for meta in metas if key in meta]
+        if all(type(v) is int and -(2**63) <= v < 2**63 for v in values):
+            kind, array = "int", np.array(values, dtype=np.int64)
+        elif all(type(v) is str and _STR_SEP not in v for v in values):
+            blob = _STR_SEP.join(values).encode("utf-8")
+            kind, array = "str", np.frombuffer(blob, dtype=np.uint8)
+        else:
+            # json.dumps escapes control characters so the separator is safe
+            blob = _STR_SEP.join(
+                json.dumps(v, ensure_ascii=False, default=str) for v in values
+            ).encode("utf-8")
+            kind, array = "json", np.frombuffer(blob, dtype=np.uint8)
+        columns[key] = {"type": kind, "count": len(values), "array": f"col{i}"}
+        arrays[f"col{i}"] = array
+        if len(values) != len(metas):
+            columns[key]["present"] = f"col{i}_present"
+            arrays[f"col{i}_present"] = np.fromiter(
+                (key in meta for meta in metas), dtype=np.bool_, count=len(metas)
+            )
+    header = json.dumps({"version": _META_VERSION, "columns": columns})
+    arrays["header"] = np.frombuffer(header.encode("utf-8"), dtype=np.uint8)
+
+    tmp_file = file_name + ".tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file_name)
+
+
+def read_meta_file(file_name: str) -> dict[int, dict]:
+    """Read a metadata sidecar written by write_meta_file"""
+    with np.load(file_name) as data:
+        header = json.loads(bytes(data["header"]).decode("utf-8"))
+        if header.get("version") != _META_VERSION:
+            raise ValueError(f"Unsupported FAISS metadata version in {file_name}")
+        fids = data["fids"].tolist()
+        metas = [{} for _ in fids]
+        for key, column in header["columns"].items():
+            array = data[column["array"]]
+            if column["type"] == "int":
+                values = array.tolist()
+            elif not column["count"]:
+                values = []
+            else:
+                values = bytes(array).decode("utf-8").split(_STR_SEP)
+                if column["type"] == "json":
+                    values = [json.loads(v) for v in values]
+            if "present" in column:
+                positions = np.flatnonzero(data[column["present"]]).tolist()
+            else:
+                positions = range(len(fids))
+            for pos, value in zip(positions, values):
+                metas[pos][key] = value
+    return dict(zip(fids, metas))
+
 
 @final
 @dataclass
@@ -32,6 +107,20 @@ class FaissVectorDBStorage(BaseVectorStorage):
     """
     A Faiss-based Vector DB Storage for LightRAG.
     Uses cosine similarity by storing normalized vectors in a Faiss index with inner product search.
+
+    The index family is chosen with vector_db_storage_cls_kwargs (or FAISS_* env vars):
+    - index_type: "flat" (exact, default), "hnsw", "ivf_flat" or "ivf_pq"
+    - hnsw_m, hnsw_ef_construction, hnsw_ef_search: HNSW graph parameters
+    - ivf_nlist (default ~4*sqrt(n)), ivf_nprobe, ivf_min_train_size: IVF parameters;
+      an exact flat index is used until ivf_min_train_size vectors exist, then the
+      IVF index is trained on them automatically
+    - pq_m, pq_nbits: product quantizer parameters for ivf_pq
+
+    Vectors keep stable int64 ids (IndexIDMap2 for flat/HNSW, native ids with a
+    hashtable direct map for IVF) so deletes are done with remove_ids instead of
+    rebuilding the index. HNSW does not support removal, deleted vectors stay in
+    the graph, are skipped at query time and dropped by a rebuild once they reach
+    HNSW_REBUILD_DEAD_RATIO of the index.
     """
 
     def __post_init__(self):
@@ -48,19 +137,50 @@ class FaissVectorDBStorage(BaseVectorStorage):
         self._faiss_index_file = os.path.join(
             self.global_config["working_dir"], f"faiss_index_{self.namespace}.index"
         )
-        self._meta_file = self._faiss_index_file + ".meta.json"
+        self._meta_file = self._faiss_index_file + ".meta.npz"
+        # Metadata of older versions, JSON with the vectors included
+        self._legacy_meta_file = self._faiss_index_file + ".meta.json"
 
         self._max_batch_size = self.global_config["embedding_batch_num"]
         # Embedding dimension (e.g. 768) must match your embedding function
         self._dim = self.embedding_func.embedding_dim
 
-        # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
-        # If you have a large number of vectors, you might want IVF or other indexes.
-        # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
+        self._index_type = kwargs.get(
+            "index_type", get_env_value("FAISS_INDEX_TYPE", "flat", str)
+        ).lower()
+        if self._index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(
+                f"Unsupported FAISS index_type {self._index_type}, expected one of {FAISS_INDEX_TYPES}"
+            )
+        self._hnsw_m = kwargs.get("hnsw_m", 32)
+        self._hnsw_ef_construction = kwargs.get("hnsw_ef_construction", 200)
+        self._hnsw_ef_search = kwargs.get(
+            "hnsw_ef_search", get_env_value("FAISS_HNSW_EF_SEARCH", 64, int)
+        )
+        self._ivf_nlist = kwargs.get("ivf_nlist")
+        self._ivf_nprobe = kwargs.get(
+            "ivf_nprobe", get_env_value("FAISS_IVF_NPROBE", 16, int)
+        )
+        self._ivf_min_train_size = kwargs.get(
+            "ivf_min_train_size", get_env_value("FAISS_IVF_MIN_TRAIN_SIZE", 10000, int)
+        )
+        self._pq_m = kwargs.get("pq_m") or next(
+            m for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1) if self._dim % m == 0
+        )
+        self._pq_nbits = kwargs.get("pq_nbits", 8)
+
+        # Inner product index over normalized vectors (= cosine similarity), every
+        # vector keeps a stable int64 faiss id.
+        self._index = self._build_index([], np.empty((0, self._dim), dtype=np.float32))
         # Keep a local store for metadata, IDs, etc.
         # Maps <int faiss_id> → metadata (including your original ID).
         self._id_to_meta = {}
+        # Reverse map <custom id> → faiss_id
+        self._custom_id_to_fid: dict[str, int] = {}
+        # Entity name → faiss_ids of the relations where it is src_id or tgt_id
+        self._entity_to_relation_fids: dict[str, set[int]] = {}
+        # Next faiss id to assign, ids are never reused
+        self._next_fid = 0
 
         self._load_faiss_index()
 
@@ -81,8 +201,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_index()
                 self._load_faiss_index()
                 self.storage_updated.value = False
             return self._index
@@ -154,17 +273,19 @@ class FaissVectorDBStorage(BaseVectorStorage):
         if existing_ids_to_remove:
             await self._remove_faiss_ids(existing_ids_to_remove)
 
-        # Step 2: Add new vectors
+        # Step 2: Add new vectors under fresh faiss ids
         index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
+        fids = np.arange(
+            self._next_fid, self._next_fid + len(list_data), dtype=np.int64
+        )
+        self._next_fid += len(list_data)
+        index.add_with_ids(embeddings, fids)
+
+        # Step 3: Store metadata for each new ID, vectors are kept by the index only
+        for fid, meta in zip(fids.tolist(), list_data):
+            self._add_meta(fid, meta)
 
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+        await self._maybe_rebuild_index()
 
         logger.info(f"Upserted {len(list_data)} vectors into Faiss index.")
         return [m["__id__"] for m in list_data]
@@ -186,9 +307,14 @@ class FaissVectorDBStorage(BaseVectorStorage):
             f"Query: {query}, top_k: {top_k}, threshold: {self.cosine_better_than_threshold}"
         )
 
-        # Perform the similarity search
+        # Perform the similarity search, over-fetching by the deleted vectors
+        # an HNSW index still holds so top_k live results remain reachable
         index = await self._get_index()
-        distances, indices = index.search(embedding, top_k)
+        dead = index.ntotal - len(self._id_to_meta)
+        search_k = min(top_k + max(dead, 0), index.ntotal)
+        if search_k <= 0:
+            return []
+        distances, indices = index.search(embedding, search_k)
 
         distances = distances[0]
         indices = indices[0]
@@ -203,7 +329,12 @@ class FaissVectorDBStorage(BaseVectorStorage):
             if dist < self.cosine_better_than_threshold:
                 continue
 
-            meta = self._id_to_meta.get(idx, {})
+            meta = self._id_to_meta.get(int(idx))
+            if meta is None:
+                # Deleted vector still present in an HNSW graph
+                continue
+            if len(results) >= top_k:
+                break
             results.append(
                 {
                     **meta,
@@ -261,10 +392,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Searching relations for entity {entity_name}")
-        relations = []
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name:
-                relations.append(fid)
+        relations = list(self._entity_to_relation_fids.get(entity_name, ()))
 
         logger.debug(f"Found {len(relations)} relations for {entity_name}")
         if relations:
@@ -279,51 +407,165 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         Return the Faiss internal ID for a given custom ID, or None if not found.
         """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
+        return self._custom_id_to_fid.get(custom_id)
+
+    def _add_meta(self, fid: int, meta: dict) -> None:
+        """Store metadata and keep the reverse and relation indexes in sync"""
+        self._id_to_meta[fid] = meta
+        self._custom_id_to_fid[meta["__id__"]] = fid
+        for entity_name in {meta.get("src_id"), meta.get("tgt_id")} - {None}:
+            self._entity_to_relation_fids.setdefault(entity_name, set()).add(fid)
+
+    def _pop_meta(self, fid: int) -> dict | None:
+        meta = self._id_to_meta.pop(fid, None)
+        if meta is None:
+            return None
+        if self._custom_id_to_fid.get(meta["__id__"]) == fid:
+            del self._custom_id_to_fid[meta["__id__"]]
+        for entity_name in {meta.get("src_id"), meta.get("tgt_id")} - {None}:
+            fids = self._entity_to_relation_fids.get(entity_name)
+            if fids is not None:
+                fids.discard(fid)
+                if not fids:
+                    del self._entity_to_relation_fids[entity_name]
+        return meta
 
     async def _remove_faiss_ids(self, fid_list):
         """
         Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
+        Flat and IVF indexes remove them in place through remove_ids.
+        HNSW cannot remove vectors: they are only dropped from the metadata, skipped
+        at query time and rebuilt away by _maybe_rebuild_index.
         """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
+        async with self._storage_lock:
+            for fid in fid_list:
+                self._pop_meta(fid)
+            if self._index_kind(self._index) != "hnsw":
+                self._index.remove_ids(np.asarray(fid_list, dtype=np.int64))
 
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
+        await self._maybe_rebuild_index()
 
+    def _index_kind(self, index) -> str:
+        """Index family of a (IndexIDMap2 wrapped) index"""
+        inner = faiss.downcast_index(
+            index.index if isinstance(index, faiss.IndexIDMap2) else index
+        )
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf_flat"
+        return "flat"
+
+    def _build_index(self, fids: list[int], vectors: np.ndarray):
+        """
+        Build the configured index over the given vectors.
+        IVF indexes fall back to an exact flat index until enough vectors exist to train them.
+        """
+        if self._index_type == "hnsw":
+            inner = faiss.IndexHNSWFlat(
+                self._dim, self._hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+            inner.hnsw.efConstruction = self._hnsw_ef_construction
+        elif self._index_type != "flat" and len(vectors) >= self._ivf_min_train_size:
+            nlist = self._ivf_nlist or max(
+                1, min(int(4 * np.sqrt(len(vectors))), len(vectors) // 39)
+            )
+            quantizer = faiss.IndexFlatIP(self._dim)
+            if self._index_type == "ivf_pq":
+                inner = faiss.IndexIVFPQ(
+                    quantizer,
+                    self._dim,
+                    nlist,
+                    self._pq_m,
+                    self._pq_nbits,
+                    faiss.METRIC_INNER_PRODUCT,
+                )
+            else:
+                inner = faiss.IndexIVFFlat(
+                    quantizer, self._dim, nlist, faiss.METRIC_INNER_PRODUCT
+                )
+            logger.info(
+                f"Training FAISS {self._index_type} index for {self.namespace} with {len(vectors)} vectors, nlist={nlist}"
+            )
+            inner.train(vectors)
+            # IVF stores ids natively, IndexIDMap2 over IVF breaks on repeated removals
+            inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+            inner.add_with_ids(vectors, np.asarray(fids, dtype=np.int64))
+            self._apply_search_params(inner)
+            return inner
+        else:
+            inner = faiss.IndexFlatIP(self._dim)
+
+        index = faiss.IndexIDMap2(inner)
+        if len(vectors):
+            index.add_with_ids(vectors, np.asarray(fids, dtype=np.int64))
+        self._apply_search_params(index)
+        return index
+
+    def _apply_search_params(self, index) -> None:
+        kind = self._index_kind(index)
+        if kind == "hnsw":
+            faiss.downcast_index(index.index).hnsw.efSearch = self._hnsw_ef_search
+        elif kind != "flat":
+            faiss.extract_index_ivf(index).nprobe = self._ivf_nprobe
+
+    def _needs_rebuild(self) -> bool:
+        kind = self._index_kind(self._index)
+        if self._index_type in ("ivf_flat", "ivf_pq") and kind == "flat":
+            # Untrained IVF, train once enough vectors exist
+            return len(self._id_to_meta) >= self._ivf_min_train_size
+        if kind == "hnsw":
+            dead = self._index.ntotal - len(self._id_to_meta)
+            return dead > 0 and dead >= HNSW_REBUILD_DEAD_RATIO * self._index.ntotal
+        return False
+
+    def _reconstruct_vectors(self, fids: list[int]) -> np.ndarray:
+        """Read the stored vectors of the given faiss ids back from the index"""
+        index = self._index
+        if not fids:
+            return np.empty((0, self._dim), dtype=np.float32)
+        if isinstance(index, faiss.IndexIDMap2):
+            rows = index.index.reconstruct_n(0, index.ntotal)
+            positions = {
+                int(fid): pos
+                for pos, fid in enumerate(faiss.vector_to_array(index.id_map))
+            }
+            return rows[[positions[fid] for fid in fids]]
+        if isinstance(index, faiss.IndexIVF):
+            # Lossy for IVF-PQ, only used when switching away from it
+            return np.stack([index.reconstruct(fid) for fid in fids])
+        # Plain index written by older versions, faiss ids are row positions
+        return index.reconstruct_n(0, index.ntotal)[fids]
+
+    def _rebuild_index(self) -> None:
+        fids = list(self._id_to_meta)
+        vectors = self._reconstruct_vectors(fids)
+        self._index = self._build_index(fids, vectors)
+
+    async def _maybe_rebuild_index(self) -> None:
+        """Train a pending IVF index or drop deleted vectors from an HNSW graph"""
         async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
+            if self._needs_rebuild():
+                self._rebuild_index()
 
-            self._id_to_meta = new_id_to_meta
+    def _reset_index(self) -> None:
+        self._index = self._build_index([], np.empty((0, self._dim), dtype=np.float32))
+        self._id_to_meta = {}
+        self._custom_id_to_fid = {}
+        self._entity_to_relation_fids = {}
+        self._next_fid = 0
 
     def _save_faiss_index(self):
         """
         Save the current Faiss index + metadata to disk so it can persist across runs.
+        Vectors live in the index file only, the metadata sidecar excludes them.
         """
         faiss.write_index(self._index, self._faiss_index_file)
-
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
-
-        with open(self._meta_file, "w", encoding="utf-8") as f:
-            json.dump(serializable_dict, f)
+        write_meta_file(self._id_to_meta, self._meta_file)
+        if os.path.exists(self._legacy_meta_file):
+            os.remove(self._legacy_meta_file)
 
     def _load_faiss_index(self):
         """
@@ -338,14 +580,45 @@ class FaissVectorDBStorage(BaseVectorStorage):
             # Load the Faiss index
             self._index = faiss.read_index(self._faiss_index_file)
             # Load metadata
-            with open(self._meta_file, "r", encoding="utf-8") as f:
-                stored_dict = json.load(f)
-
-            # Convert string keys back to int
-            self._id_to_meta = {}
-            for fid_str, meta in stored_dict.items():
-                fid = int(fid_str)
-                self._id_to_meta[fid] = meta
+            if os.path.exists(self._meta_file):
+                stored_dict = read_meta_file(self._meta_file)
+            else:
+                # JSON metadata of older versions, string keys and vectors included
+                with open(self._legacy_meta_file, "r", encoding="utf-8") as f:
+                    stored_dict = {
+                        int(fid_str): meta for fid_str, meta in json.load(f).items()
+                    }
+                for meta in stored_dict.values():
+                    meta.pop("__vector__", None)
+
+            for fid, meta in stored_dict.items():
+                self._add_meta(fid, meta)
+
+            kind = self._index_kind(self._index)
+            if not isinstance(self._index, (faiss.IndexIDMap2, faiss.IndexIVF)) or (
+                kind != self._index_type
+                and not (kind == "flat" and self._index_type.startswith("ivf"))
+            ):
+                # Index written by an older version or with another index_type
+                logger.info(
+                    f"Rebuilding FAISS index {self.namespace} as {self._index_type}"
+                )
+                self._rebuild_index()
+            elif self._needs_rebuild():
+                self._rebuild_index()
+            else:
+                self._apply_search_params(self._index)
+
+            # Ids of deleted HNSW vectors are still in the index, never reuse them
+            stored_fids = (
+                faiss.vector_to_array(self._index.id_map)
+                if isinstance(self._index, faiss.IndexIDMap2)
+                else []
+            )
+            self._next_fid = max(
+                int(stored_fids.max()) + 1 if len(stored_fids) else 0,
+                max(self._id_to_meta, default=-1) + 1,
+            )
 
             logger.info(
                 f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
@@ -353,8 +626,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
+            self._reset_index()
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
@@ -364,8 +636,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_index()
                 self._load_faiss_index()
                 self.storage_updated.value = False
                 return False  # Return error
@@ -457,16 +728,17 @@ class FaissVectorDBStorage(BaseVectorStorage):
         try:
             async with self._storage_lock:
                 # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_index()
 
                 # Remove storage files if they exist
-                if os.path.exists(self._faiss_index_file):
-                    os.remove(self._faiss_index_file)
-                if os.path.exists(self._meta_file):
-                    os.remove(self._meta_file)
+                for file_name in (
+                    self._faiss_index_file,
+                    self._meta_file,
+                    self._legacy_meta_file,
+                ):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
 
-                self._id_to_meta = {}
                 self._load_faiss_index()
 
                 # Notify other processes
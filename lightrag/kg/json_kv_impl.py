@@ -20,14 +20,37 @@ from .shared_storage import (
     try_initialize_namespace,
 )
 
+# In memory, cache namespaces keep one record per "<mode>\x00<args_hash>" key
+_MODE_SEP = "\x00"
+# Cache entry fields with a secondary index, besides the mode
+_CACHE_INDEX_FIELDS = ("cache_type", "chunk_id")
+
 
 @final
 @dataclass
 class JsonKVStorage(BaseKVStorage):
+    """
+    KV storage kept in shared memory and persisted as one JSON file.
+
+    Cache namespaces (llm_response_cache) are sharded per (mode, args_hash) in memory,
+    so single entries are read and written without copying their whole mode, and
+    are indexed by mode, cache_type and chunk_id. The JSON file keeps the nested
+    {mode: {args_hash: entry}} layout.
+    """
+
+    # in-memory lookup, fetch everything under a single lock acquisition
+    get_by_ids_batch_size = 0
+
     def __post_init__(self):
         working_dir = self.global_config["working_dir"]
         self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
+        self._is_cache = self.namespace.endswith("cache")
         self._data = None
+        # Process local secondary indexes of a cache namespace: field -> value ->
+        # record keys in insertion order (dict as ordered set), valid for _index_generation
+        self._cache_index: dict[str, dict[str, dict[str, None]]] = {}
+        self._index_generation = None
+        self._meta = None
         self._storage_lock = None
         self.storage_updated = None
 
@@ -39,10 +62,16 @@ class JsonKVStorage(BaseKVStorage):
             # check need_init must before get_namespace_data
             need_init = await try_initialize_namespace(self.namespace)
             self._data = await get_namespace_data(self.namespace)
+            if self._is_cache:
+                self._meta = await get_namespace_data(f"{self.namespace}_cache_meta")
             if need_init:
                 loaded_data = load_json(self._file_name) or {}
                 async with self._storage_lock:
-                    self._data.update(loaded_data)
+                    if self._is_cache:
+                        self._data.update(self._flatten_cache(loaded_data))
+                        self._bump_generation()
+                    else:
+                        self._data.update(loaded_data)
 
                     # Calculate data count based on namespace
                     if self.namespace.endswith("cache"):
@@ -66,6 +95,8 @@ class JsonKVStorage(BaseKVStorage):
                 data_dict = (
                     dict(self._data) if hasattr(self._data, "_getvalue") else self._data
                 )
+                if self._is_cache:
+                    data_dict = self._nest_cache(data_dict)
 
                 # Calculate data count based on namespace
                 if self.namespace.endswith("cache"):
@@ -85,6 +116,86 @@ class JsonKVStorage(BaseKVStorage):
                 write_json(data_dict, self._file_name)
                 await clear_all_update_flags(self.namespace)
 
+    @staticmethod
+    def _flatten_cache(data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            f"{mode}{_MODE_SEP}{args_hash}": cache_entry
+            for mode, mode_cache in data.items()
+            if isinstance(mode_cache, dict)
+            for args_hash, cache_entry in mode_cache.items()
+        }
+
+    @staticmethod
+    def _nest_cache(data: dict[str, Any]) -> dict[str, Any]:
+        nested: dict[str, dict[str, Any]] = {}
+        for key, cache_entry in data.items():
+            mode, _, args_hash = key.partition(_MODE_SEP)
+            nested.setdefault(mode, {})[args_hash] = cache_entry
+        return nested
+
+    def _bump_generation(self) -> None:
+        """Record a change of the cache records, other processes rebuild their indexes"""
+        generation = self._meta.get("generation", 0)
+        self._meta["generation"] = generation + 1
+        if self._index_generation == generation:
+            # Own indexes were current and are updated incrementally by the caller
+            self._index_generation = generation + 1
+
+    def _ensure_cache_index(self) -> dict[str, dict[str, dict[str, None]]]:
+        """Secondary indexes of the cache records, rebuilt when another process changed them"""
+        generation = self._meta.get("generation", 0)
+        if self._index_generation != generation:
+            self._cache_index = {"mode": {}} | {f: {} for f in _CACHE_INDEX_FIELDS}
+            for key, cache_entry in self._data.items():
+                self._index_cache_entry(key, cache_entry)
+            self._index_generation = generation
+        return self._cache_index
+
+    def _index_cache_entry(self, key: str, cache_entry: Any, remove=False) -> None:
+        values = {"mode": key.partition(_MODE_SEP)[0]}
+        if isinstance(cache_entry, dict):
+            values.update({f: cache_entry.get(f) for f in _CACHE_INDEX_FIELDS})
+        for field, value in values.items():
+            if value is None:
+                continue
+            keys = self._cache_index[field]
+            if remove:
+                keys.get(value, {}).pop(key, None)
+                if not keys.get(value, True):
+                    del keys[value]
+            else:
+                keys.setdefault(value, {})[key] = None
+
+    def _put_cache_entries(self, records: dict[str, Any]) -> None:
+        """Write cache records, keeping the indexes of this process current"""
+        indexed = self._index_generation == self._meta.get("generation", 0)
+        self._bump_generation()
+        for key, cache_entry in records.items():
+            if indexed:
+                old = self._data.get(key)
+                if old is not None:
+                    self._index_cache_entry(key, old, remove=True)
+                self._index_cache_entry(key, cache_entry)
+            self._data[key] = cache_entry
+
+    def _pop_cache_entries(self, keys: list[str]) -> bool:
+        indexed = self._index_generation == self._meta.get("generation", 0)
+        removed = {key: self._data.pop(key, None) for key in keys}
+        removed = {k: v for k, v in removed.items() if v is not None}
+        if not removed:
+            return False
+        self._bump_generation()
+        if indexed:
+            for key, cache_entry in removed.items():
+                self._index_cache_entry(key, cache_entry, remove=True)
+        return True
+
+    def _get_mode_cache(self, mode: str) -> dict[str, Any] | None:
+        keys = self._ensure_cache_index()["mode"].get(mode)
+        if not keys:
+            return None
+        return {key.partition(_MODE_SEP)[2]: self._data[key] for key in keys}
+
     async def get_all(self) -> dict[str, Any]:
         """Get all data from storage
 
@@ -92,14 +203,46 @@ class JsonKVStorage(BaseKVStorage):
             Dictionary containing all stored data
         """
         async with self._storage_lock:
+            if self._is_cache:
+                return self._nest_cache(dict(self._data))
             return dict(self._data)
 
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         async with self._storage_lock:
+            if self._is_cache:
+                # The id of a cache namespace is a mode, returns all its entries
+                return self._get_mode_cache(id)
             return self._data.get(id)
 
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict | None:
+        """Specifically for llm_response_cache, read one entry instead of the whole mode."""
+        async with self._storage_lock:
+            cache_entry = self._data.get(f"{mode}{_MODE_SEP}{id}")
+            return None if cache_entry is None else {id: cache_entry}
+
+    async def get_cache_by_chunk_ids(
+        self,
+        chunk_ids: set[str],
+        mode: str = "default",
+        cache_type: str | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        if not self._is_cache:
+            return {}
+        async with self._storage_lock:
+            cache_index = self._ensure_cache_index()
+            type_keys = cache_index["cache_type"].get(cache_type, {})
+            result = {}
+            for chunk_id in chunk_ids:
+                for key in cache_index["chunk_id"].get(chunk_id, ()):
+                    key_mode, _, args_hash = key.partition(_MODE_SEP)
+                    if key_mode == mode and (cache_type is None or key in type_keys):
+                        result[args_hash] = self._data[key]
+            return result
+
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         async with self._storage_lock:
+            if self._is_cache:
+                return [self._get_mode_cache(id) for id in ids]
             return [
                 (
                     {k: v for k, v in self._data[id].items()}
@@ -111,6 +254,8 @@ class JsonKVStorage(BaseKVStorage):
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         async with self._storage_lock:
+            if self._is_cache:
+                return set(keys) - set(self._ensure_cache_index()["mode"])
             return set(keys) - set(self._data.keys())
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
@@ -118,12 +263,16 @@ class JsonKVStorage(BaseKVStorage):
         Importance notes for in-memory storage:
         1. Changes will be persisted to disk during the next index_done_callback
         2. update flags to notify other processes that data persistence is needed
+        3. For cache namespaces the entries of a mode are merged, not replaced
         """
         if not data:
             return
         logger.debug(f"Inserting {len(data)} records to {self.namespace}")
         async with self._storage_lock:
-            self._data.update(data)
+            if self._is_cache:
+                self._put_cache_entries(self._flatten_cache(data))
+            else:
+                self._data.update(data)
             await set_all_update_flags(self.namespace)
 
     async def delete(self, ids: list[str]) -> None:
@@ -140,11 +289,17 @@ class JsonKVStorage(BaseKVStorage):
             None
         """
         async with self._storage_lock:
-            any_deleted = False
-            for doc_id in ids:
-                result = self._data.pop(doc_id, None)
-                if result is not None:
-                    any_deleted = True
+            if self._is_cache:
+                # Ids of a cache namespace are modes, delete all their entries
+                mode_index = self._ensure_cache_index()["mode"]
+                keys = [key for mode in ids for key in mode_index.get(mode, ())]
+                any_deleted = self._pop_cache_entries(keys)
+            else:
+                any_deleted = False
+                for doc_id in ids:
+                    result = self._data.pop(doc_id, None)
+                    if result is not None:
+                        any_deleted = True
 
             if any_deleted:
                 await set_all_update_flags(self.namespace)
@@ -236,6 +391,8 @@ class JsonKVStorage(BaseKVStorage):
         try:
             async with self._storage_lock:
                 self._data.clear()
+                if self._is_cache:
+                    self._bump_generation()
                 await set_all_update_flags(self.namespace)
 
             await self.index_done_callback()
@@ -0,0 +1,530 @@
+import asyncio
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, final
+
+from lightrag.base import (
+    BaseKVStorage,
+)
+from lightrag.constants import (
+    DEFAULT_LOG_KV_COMPACTION_MIN_BYTES,
+    DEFAULT_LOG_KV_COMPACTION_RATIO,
+)
+from lightrag.utils import (
+    get_env_value,
+    load_json,
+    logger,
+)
+from .shared_storage import (
+    get_namespace_data,
+    get_storage_lock,
+    get_data_init_lock,
+    get_update_flag,
+    set_all_update_flags,
+    clear_all_update_flags,
+    try_initialize_namespace,
+)
+
+# Record layout: crc32, op, key length, value length, followed by the utf-8 key
+# and the JSON encoded value. The crc covers everything after itself.
+_HEADER = struct.Struct("<IBII")
+_OP_PUT = 1
+_OP_DELETE = 2
+
+# Joins cache mode and args hash in the record keys of llm cache namespaces,
+# so one cache entry is one record instead of one record per mode dict
+_MODE_SEP = "\x00"
+
+
+def _encode_record(op: int, key: str, value: Any = None) -> bytes:
+    key_bytes = key.encode("utf-8")
+    value_bytes = (
+        b"" if value is None else json.dumps(value, ensure_ascii=False).encode("utf-8")
+    )
+    header = struct.pack("<BII", op, len(key_bytes), len(value_bytes))
+    crc = zlib.crc32(header + key_bytes + value_bytes)
+    return struct.pack("<I", crc) + header + key_bytes + value_bytes
+
+
+def _record_entry(record: bytes, offset: int) -> tuple[int, int, int, int]:
+    """Index entry of a record written at offset: (value offset, value length, record length, crc)"""
+    crc, _, key_len, value_len = _HEADER.unpack_from(record)
+    return (offset + _HEADER.size + key_len, value_len, len(record), crc)
+
+
+def _scan_log(f, start: int):
+    """Yield (op, key, entry) for every intact record from start, stopping at a torn tail"""
+    f.seek(start)
+    offset = start
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        crc, op, key_len, value_len = _HEADER.unpack(header)
+        body = f.read(key_len + value_len)
+        if len(body) < key_len + value_len or zlib.crc32(header[4:] + body) != crc:
+            return
+        record_len = _HEADER.size + key_len + value_len
+        entry = (offset + _HEADER.size + key_len, value_len, record_len, crc)
+        yield op, body[:key_len].decode("utf-8"), entry
+        offset += record_len
+
+
+def _apply_record(index: dict, op: int, key: str, entry: tuple) -> None:
+    if op == _OP_PUT:
+        if _MODE_SEP in key:
+            mode, _, args_hash = key.partition(_MODE_SEP)
+            mode_index = index.get(mode)
+            if not isinstance(mode_index, dict):
+                mode_index = index[mode] = {}
+            mode_index[args_hash] = entry
+        else:
+            index[key] = entry
+    elif op == _OP_DELETE:
+        index.pop(key, None)
+
+
+def _live_bytes(index: dict) -> int:
+    live = 0
+    for entry in index.values():
+        if isinstance(entry, dict):
+            live += sum(e[2] for e in entry.values())
+        else:
+            live += entry[2]
+    return live
+
+
+@final
+@dataclass
+class LogKVStorage(BaseKVStorage):
+    """Append-only log-structured KV storage
+
+    Upserts and deletes are appended to kv_store_{namespace}.log as checksummed,
+    length-prefixed records, and only an offset index is kept in memory. Persisting
+    is an fsync of the appended records instead of a rewrite of the whole store.
+    Dead records are dropped by a background compaction once they make up
+    LOG_KV_COMPACTION_RATIO of the log. An existing kv_store_{namespace}.json is
+    imported on first start, so it can replace JsonKVStorage in place.
+    """
+
+    # in-memory offset index, fetch everything under a single lock acquisition
+    get_by_ids_batch_size = 0
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.log")
+        self._json_file_name = os.path.join(
+            working_dir, f"kv_store_{self.namespace}.json"
+        )
+        self._compaction_ratio = get_env_value(
+            "LOG_KV_COMPACTION_RATIO", DEFAULT_LOG_KV_COMPACTION_RATIO, float
+        )
+        self._compaction_min_bytes = get_env_value(
+            "LOG_KV_COMPACTION_MIN_BYTES", DEFAULT_LOG_KV_COMPACTION_MIN_BYTES, int
+        )
+        self._index = None
+        self._meta = None
+        self._file = None
+        self._generation = None
+        self._compaction_task = None
+        self._storage_lock = None
+        self.storage_updated = None
+
+    async def initialize(self):
+        """Initialize storage data"""
+        self._storage_lock = get_storage_lock()
+        self.storage_updated = await get_update_flag(self.namespace)
+        async with get_data_init_lock():
+            # check need_init must before get_namespace_data
+            need_init = await try_initialize_namespace(self.namespace)
+            self._index = await get_namespace_data(self.namespace)
+            self._meta = await get_namespace_data(f"{self.namespace}_log_meta")
+            if need_init:
+                async with self._storage_lock:
+                    self._load_log()
+                    logger.info(
+                        f"Process {os.getpid()} KV load {self.namespace} with {len(self._index)} records"
+                    )
+
+    def _import_json(self) -> None:
+        """Write the records of an existing JSON KV file as the initial log"""
+        data = load_json(self._json_file_name) or {}
+        tmp_file = self._file_name + ".tmp"
+        with open(tmp_file, "wb") as f:
+            for key, value in data.items():
+                if self.namespace.endswith("cache") and isinstance(value, dict):
+                    for args_hash, cache_entry in value.items():
+                        f.write(
+                            _encode_record(
+                                _OP_PUT, f"{key}{_MODE_SEP}{args_hash}", cache_entry
+                            )
+                        )
+                else:
+                    f.write(_encode_record(_OP_PUT, key, value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._file_name)
+        if data:
+            logger.info(
+                f"Process {os.getpid()} KV imported {len(data)} records of {self.namespace} from {self._json_file_name}"
+            )
+
+    def _load_log(self) -> None:
+        """Rebuild the offset index by replaying the log, dropping a torn tail"""
+        if not os.path.exists(self._file_name):
+            self._import_json()
+
+        index: dict[str, Any] = {}
+        end = 0
+        with open(self._file_name, "r+b") as f:
+            for op, key, entry in _scan_log(f, 0):
+                _apply_record(index, op, key, entry)
+                end = entry[0] + entry[1]
+            file_size = f.seek(0, os.SEEK_END)
+            if end < file_size:
+                logger.warning(
+                    f"Discarding {file_size - end} bytes of incomplete records at the end of {self._file_name}"
+                )
+                f.truncate(end)
+
+        self._index.update(index)
+        self._meta.update(
+            {
+                "live_bytes": _live_bytes(index),
+                "generation": self._meta.get("generation", 0),
+                "compacting": False,
+            }
+        )
+
+    def _ensure_file(self) -> None:
+        """(Re)open the log if it is not open yet or was replaced by compaction/drop"""
+        generation = self._meta.get("generation", 0)
+        if self._file is None or self._generation != generation:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self._file_name, "a+b")
+            self._generation = generation
+
+    def _append(self, records: list[bytes]) -> list[tuple[int, int, int, int]]:
+        offset = self._file.seek(0, os.SEEK_END)
+        entries = []
+        for record in records:
+            entries.append(_record_entry(record, offset))
+            offset += len(record)
+        self._file.write(b"".join(records))
+        # Make the records visible to readers in other processes
+        self._file.flush()
+        return entries
+
+    def _read_value(self, entry: tuple) -> Any:
+        self._file.seek(entry[0])
+        return json.loads(self._file.read(entry[1]))
+
+    def _read_entry(self, entry: tuple | dict) -> Any:
+        if isinstance(entry, dict):
+            return {args_hash: self._read_value(e) for args_hash, e in entry.items()}
+        return self._read_value(entry)
+
+    async def _sync_log(self) -> None:
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                self._ensure_file()
+                os.fsync(self._file.fileno())
+                logger.debug(
+                    f"Process {os.getpid()} KV synced {len(self._index)} records to {self.namespace}"
+                )
+                await clear_all_update_flags(self.namespace)
+
+    async def index_done_callback(self) -> None:
+        await self._sync_log()
+        self._maybe_schedule_compaction()
+
+    def _maybe_schedule_compaction(self) -> None:
+        if self._compaction_task is not None and not self._compaction_task.done():
+            return
+        if self._meta.get("compacting") or not os.path.exists(self._file_name):
+            return
+        file_size = os.path.getsize(self._file_name)
+        if not file_size or file_size < self._compaction_min_bytes:
+            return
+        dead_ratio = 1 - self._meta.get("live_bytes", 0) / file_size
+        if dead_ratio >= self._compaction_ratio:
+            self._compaction_task = asyncio.create_task(self._compact())
+
+    def _copy_live(self, snapshot: dict, tmp_file: str) -> tuple[dict, int]:
+        """Copy the live records of a snapshot of the index into a new log"""
+        new_index: dict[str, Any] = {}
+        offset = 0
+
+        def copy(src, dst, entry):
+            nonlocal offset
+            record_offset = entry[0] - (entry[2] - entry[1])
+            src.seek(record_offset)
+            dst.write(src.read(entry[2]))
+            new_entry = (offset + entry[2] - entry[1], entry[1], entry[2], entry[3])
+            offset += entry[2]
+            return new_entry
+
+        with open(self._file_name, "rb") as src, open(tmp_file, "wb") as dst:
+            for key, entry in snapshot.items():
+                if isinstance(entry, dict):
+                    new_index[key] = {
+                        args_hash: copy(src, dst, e) for args_hash, e in entry.items()
+                    }
+                else:
+                    new_index[key] = copy(src, dst, entry)
+            dst.flush()
+            os.fsync(dst.fileno())
+        return new_index, offset
+
+    async def _compact(self) -> None:
+        """Rewrite the log with live records only
+
+        The bulk copy runs in a thread without holding the storage lock. Records
+        appended meanwhile are copied over afterwards under the lock, right before
+        the new log replaces the old one.
+        """
+        async with self._storage_lock:
+            if self._meta.get("compacting"):
+                return
+            self._meta["compacting"] = True
+            self._ensure_file()
+            snapshot = dict(self._index)
+            snapshot_end = self._file.seek(0, os.SEEK_END)
+            generation = self._generation
+
+        tmp_file = self._file_name + ".compact"
+        try:
+            new_index, new_end = await asyncio.to_thread(
+                self._copy_live, snapshot, tmp_file
+            )
+            async with self._storage_lock:
+                if self._meta.get("generation", 0) != generation:
+                    # Storage was dropped meanwhile, the copy is stale
+                    os.remove(tmp_file)
+                    return
+                with open(self._file_name, "rb") as src, open(tmp_file, "ab") as dst:
+                    shift = new_end - snapshot_end
+                    for op, key, entry in _scan_log(src, snapshot_end):
+                        _apply_record(
+                            new_index,
+                            op,
+                            key,
+                            (entry[0] + shift, entry[1], entry[2], entry[3]),
+                        )
+                    tail_end = src.seek(0, os.SEEK_END)
+                    src.seek(snapshot_end)
+                    dst.write(src.read(tail_end - snapshot_end))
+                    dst.flush()
+                    os.fsync(dst.fileno())
+
+                os.replace(tmp_file, self._file_name)
+                self._index.clear()
+                self._index.update(new_index)
+                self._meta["live_bytes"] = _live_bytes(new_index)
+                self._meta["generation"] = generation + 1
+                self._ensure_file()
+                logger.info(
+                    f"Process {os.getpid()} compacted {self.namespace} log from {tail_end} to {new_end + tail_end - snapshot_end} bytes"
+                )
+        except Exception as e:
+            logger.error(f"Error compacting {self.namespace} log: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        finally:
+            self._meta["compacting"] = False
+
+    async def get_all(self) -> dict[str, Any]:
+        """Get all data from storage
+
+        Returns:
+            Dictionary containing all stored data
+        """
+        async with self._storage_lock:
+            self._ensure_file()
+            return {key: self._read_entry(entry) for key, entry in self._index.items()}
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        async with self._storage_lock:
+            entry = self._index.get(id)
+            if entry is None:
+                return None
+            self._ensure_file()
+            return self._read_entry(entry)
+
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict | None:
+        """Specifically for llm_response_cache, read one entry instead of the whole mode."""
+        async with self._storage_lock:
+            mode_index = self._index.get(mode)
+            if not isinstance(mode_index, dict) or id not in mode_index:
+                return None
+            self._ensure_file()
+            return {id: self._read_value(mode_index[id])}
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        async with self._storage_lock:
+            self._ensure_file()
+            return [
+                self._read_entry(self._index[id]) if id in self._index else None
+                for id in ids
+            ]
+
+    async def filter_keys(self, keys: set[str]) -> set[str]:
+        async with self._storage_lock:
+            return set(keys) - set(self._index.keys())
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """
+        Importance notes for log-structured storage:
+        1. Records are appended to the log immediately and fsynced during the next index_done_callback
+        2. update flags to notify other processes that data persistence is needed
+        3. For cache namespaces the entries of a mode are merged, not replaced
+        """
+        if not data:
+            return
+        logger.debug(f"Inserting {len(data)} records to {self.namespace}")
+        nested = self.namespace.endswith("cache")
+        async with self._storage_lock:
+            self._ensure_file()
+            # (key, args_hash or None, record), records identical to the stored one are skipped
+            puts = []
+            for key, value in data.items():
+                current = self._index.get(key)
+                if nested and isinstance(value, dict):
+                    current = current if isinstance(current, dict) else {}
+                    for args_hash, cache_entry in value.items():
+                        record = _encode_record(
+                            _OP_PUT, f"{key}{_MODE_SEP}{args_hash}", cache_entry
+                        )
+                        old = current.get(args_hash)
+                        if old is None or old[2:] != _record_entry(record, 0)[2:]:
+                            puts.append((key, args_hash, record))
+                else:
+                    record = _encode_record(_OP_PUT, key, value)
+                    if (
+                        isinstance(current, dict)
+                        or current is None
+                        or current[2:] != _record_entry(record, 0)[2:]
+                    ):
+                        puts.append((key, None, record))
+            if not puts:
+                return
+
+            entries = self._append([record for _, _, record in puts])
+            live_bytes = self._meta.get("live_bytes", 0)
+            mode_updates: dict[str, dict] = {}
+            for (key, args_hash, _), entry in zip(puts, entries):
+                if args_hash is None:
+                    old = self._index.get(key)
+                    if old is not None:
+                        live_bytes -= _live_bytes({key: old})
+                    self._index[key] = entry
+                else:
+                    if key not in mode_updates:
+                        current = self._index.get(key)
+                        mode_updates[key] = (
+                            dict(current) if isinstance(current, dict) else {}
+                        )
+                    old = mode_updates[key].get(args_hash)
+                    if old is not None:
+                        live_bytes -= old[2]
+                    mode_updates[key][args_hash] = entry
+                live_bytes += entry[2]
+            # Reassign nested dicts so the change reaches shared (multiprocess) dicts
+            for key, mode_index in mode_updates.items():
+                self._index[key] = mode_index
+            self._meta["live_bytes"] = live_bytes
+            await set_all_update_flags(self.namespace)
+
+    async def delete(self, ids: list[str]) -> None:
+        """Delete specific records from storage by their IDs
+
+        Importance notes for log-structured storage:
+        1. Delete records are appended immediately and fsynced during the next index_done_callback
+        2. update flags to notify other processes that data persistence is needed
+
+        Args:
+            ids (list[str]): List of document IDs to be deleted from storage
+
+        Returns:
+            None
+        """
+        async with self._storage_lock:
+            ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id in self._index]
+            if not ids:
+                return
+            self._ensure_file()
+            self._append([_encode_record(_OP_DELETE, doc_id) for doc_id in ids])
+            freed = _live_bytes({doc_id: self._index.pop(doc_id) for doc_id in ids})
+            self._meta["live_bytes"] = self._meta.get("live_bytes", 0) - freed
+            await set_all_update_flags(self.namespace)
+
+    async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
+        """Delete specific records from storage by by cache mode
+
+        Importance notes for log-structured storage:
+        1. Delete records are appended immediately and fsynced during the next index_done_callback
+        2. update flags to notify other processes that data persistence is needed
+
+        Args:
+            ids (list[str]): List of cache mode to be drop from storage
+
+        Returns:
+             True: if the cache drop successfully
+             False: if the cache drop failed
+        """
+        if not modes:
+            return False
+
+        try:
+            await self.delete(modes)
+            return True
+        except Exception:
+            return False
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all data from storage and clean up resources
+           This action will persistent the data to disk immediately.
+
+        This method will:
+        1. Truncate the log and clear the in-memory index
+        2. Update flags to notify other processes
+        3. Trigger index_done_callback to sync the empty log
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._storage_lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                open(self._file_name, "wb").close()
+                self._index.clear()
+                self._meta["live_bytes"] = 0
+                self._meta["generation"] = self._meta.get("generation", 0) + 1
+                await set_all_update_flags(self.namespace)
+
+            await self.index_done_callback()
+            logger.info(f"Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def finalize(self):
+        """Finalize storage resources
+        Wait for a running compaction and sync the log before exiting
+        """
+        if self._compaction_task is not None:
+            await self._compaction_task
+            self._compaction_task = None
+        await self._sync_log()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,541 @@
+import asyncio
+import os
+from typing import Any, final
+from dataclasses import dataclass
+import numpy as np
+import time
+
+from lightrag.utils import (
+    logger,
+    compute_mdhash_id,
+    load_json,
+    write_json,
+)
+from lightrag.base import BaseVectorStorage
+
+from .shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+# Rows allocated for a new vector file, the file doubles whenever it is full
+_INITIAL_CAPACITY = 1024
+# Rows scored per matrix-vector product, bounds the temporary score buffer
+_QUERY_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _MemmapVectorIndex:
+    """Vectors in a growable memory-mapped .npy file, metadata in a columnar JSON sidecar
+
+    Rows are slots: a slot holds one id, deleted slots are reused by later upserts
+    once the deletion has been saved, so the saved metadata never points at a slot
+    that was overwritten by another id.
+    """
+
+    def __init__(self, dim: int, vector_file: str, meta_file: str):
+        self.dim = dim
+        self._vector_file = vector_file
+        self._meta_file = meta_file
+        self._vectors: np.ndarray | None = None
+        self._ids: list[str | None] = []
+        self._created_at: list[int | None] = []
+        self._meta: list[dict[str, Any] | None] = []
+        self._id_to_slot: dict[str, int] = {}
+        self._free: list[int] = []
+        self._pending_free: list[int] = []
+        self._load()
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def __len__(self) -> int:
+        return len(self._id_to_slot)
+
+    def _load(self) -> None:
+        stored = load_json(self._meta_file) if os.path.exists(self._meta_file) else None
+        if not stored or not os.path.exists(self._vector_file):
+            return
+        if stored["dim"] != self.dim:
+            raise ValueError(
+                f"Embedding dim mismatch for {self._vector_file}: stored {stored['dim']}, expected {self.dim}"
+            )
+        self._vectors = np.load(self._vector_file, mmap_mode="r+")
+        self._ids = stored["ids"]
+        self._created_at = stored["created_at"]
+        fields = stored["fields"]
+        self._meta = [
+            None
+            if doc_id is None
+            else {
+                name: values[slot]
+                for name, values in fields.items()
+                if values[slot] is not None
+            }
+            for slot, doc_id in enumerate(self._ids)
+        ]
+        self._id_to_slot = {
+            doc_id: slot for slot, doc_id in enumerate(self._ids) if doc_id is not None
+        }
+        self._free = [slot for slot, doc_id in enumerate(self._ids) if doc_id is None]
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * self.capacity, _INITIAL_CAPACITY)
+        tmp_file = self._vector_file + ".tmp.npy"
+        vectors = np.lib.format.open_memmap(
+            tmp_file, mode="w+", dtype=np.float32, shape=(capacity, self.dim)
+        )
+        used = len(self._ids)
+        if used:
+            vectors[:used] = self._vectors[:used]
+        vectors.flush()
+        self._vectors = None
+        os.replace(tmp_file, self._vector_file)
+        self._vectors = vectors
+
+    def upsert(self, datas: list[dict[str, Any]]) -> list[str]:
+        new_ids = [dp["__id__"] for dp in datas if dp["__id__"] not in self._id_to_slot]
+        reusable = len(self._free)
+        needed = len(self._ids) + max(0, len(dict.fromkeys(new_ids)) - reusable)
+        if needed > self.capacity:
+            self._grow(needed)
+
+        slots = []
+        for dp in datas:
+            doc_id = dp["__id__"]
+            slot = self._id_to_slot.get(doc_id)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    slot = len(self._ids)
+                    self._ids.append(None)
+                    self._created_at.append(None)
+                    self._meta.append(None)
+                self._id_to_slot[doc_id] = slot
+            self._ids[slot] = doc_id
+            self._created_at[slot] = dp.get("__created_at__")
+            self._meta[slot] = {
+                k: v
+                for k, v in dp.items()
+                if k not in ("__id__", "__created_at__", "__vector__")
+            }
+            slots.append(slot)
+
+        self._vectors[slots] = _normalize(
+            np.asarray([dp["__vector__"] for dp in datas], dtype=np.float32)
+        )
+        return [dp["__id__"] for dp in datas]
+
+    def delete(self, ids: list[str]) -> None:
+        for doc_id in ids:
+            slot = self._id_to_slot.pop(doc_id, None)
+            if slot is None:
+                continue
+            self._ids[slot] = None
+            self._created_at[slot] = None
+            self._meta[slot] = None
+            self._pending_free.append(slot)
+
+    def _record(self, slot: int) -> dict[str, Any]:
+        return {
+            "__id__": self._ids[slot],
+            "__created_at__": self._created_at[slot],
+            **self._meta[slot],
+        }
+
+    def get(self, ids: list[str]) -> list[dict[str, Any]]:
+        return [
+            self._record(self._id_to_slot[doc_id])
+            for doc_id in ids
+            if doc_id in self._id_to_slot
+        ]
+
+    def records(self) -> list[dict[str, Any]]:
+        return [self._record(slot) for slot in self._id_to_slot.values()]
+
+    def query(
+        self, query: np.ndarray, top_k: int, better_than_threshold: float
+    ) -> list[dict[str, Any]]:
+        """Blocked cosine scan over the mapped vectors, keeping a running top-k"""
+        used = len(self._ids)
+        if not used or top_k <= 0:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        live = np.fromiter(
+            (doc_id is not None for doc_id in self._ids), dtype=np.bool_, count=used
+        )
+
+        best_slots = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, used, _QUERY_BLOCK_ROWS):
+            end = min(start + _QUERY_BLOCK_ROWS, used)
+            scores = self._vectors[start:end] @ query
+            keep = live[start:end] & (scores >= better_than_threshold)
+            block_slots = np.flatnonzero(keep) + start
+            block_scores = scores[keep]
+            if len(block_scores) > top_k:
+                part = np.argpartition(-block_scores, top_k - 1)[:top_k]
+                block_slots, block_scores = block_slots[part], block_scores[part]
+            best_slots = np.concatenate([best_slots, block_slots])
+            best_scores = np.concatenate([best_scores, block_scores])
+            if len(best_scores) > top_k:
+                part = np.argpartition(-best_scores, top_k - 1)[:top_k]
+                best_slots, best_scores = best_slots[part], best_scores[part]
+
+        order = np.argsort(-best_scores)
+        return [
+            {**self._record(int(best_slots[i])), "__metrics__": float(best_scores[i])}
+            for i in order
+        ]
+
+    def save(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+        field_names = dict.fromkeys(k for meta in self._meta if meta for k in meta)
+        write_json(
+            {
+                "dim": self.dim,
+                "ids": self._ids,
+                "created_at": self._created_at,
+                "fields": {
+                    name: [meta.get(name) if meta else None for meta in self._meta]
+                    for name in field_names
+                },
+            },
+            self._meta_file,
+        )
+        # Slots deleted before this save are no longer referenced on disk
+        self._free.extend(self._pending_free)
+        self._pending_free = []
+
+
+@final
+@dataclass
+class MemmapVectorDBStorage(BaseVectorStorage):
+    """Vector storage on a memory-mapped float32 matrix
+
+    Embeddings are kept in vdb_{namespace}.npy and opened with np.memmap, so loading
+    does not parse or decode vectors and resident memory is bounded by the page
+    cache. Metadata (without vectors) is kept in vdb_{namespace}.meta.json.
+    """
+
+    def __post_init__(self):
+        # Initialize basic attributes
+        self._client = None
+        self._storage_lock = None
+        self.storage_updated = None
+
+        # Use global config value if specified, otherwise use default
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = cosine_threshold
+
+        working_dir = self.global_config["working_dir"]
+        self._vector_file_name = os.path.join(working_dir, f"vdb_{self.namespace}.npy")
+        self._meta_file_name = os.path.join(
+            working_dir, f"vdb_{self.namespace}.meta.json"
+        )
+        self._max_batch_size = self.global_config["embedding_batch_num"]
+
+        self._client = self._new_client()
+
+    def _new_client(self) -> _MemmapVectorIndex:
+        return _MemmapVectorIndex(
+            self.embedding_func.embedding_dim,
+            self._vector_file_name,
+            self._meta_file_name,
+        )
+
+    async def initialize(self):
+        """Initialize storage data"""
+        # Get the update flag for cross-process update notification
+        self.storage_updated = await get_update_flag(self.namespace)
+        # Get the storage lock for use in other methods
+        self._storage_lock = get_storage_lock(enable_logging=False)
+
+    async def _get_client(self):
+        """Check if the storage should be reloaded"""
+        # Acquire lock to prevent concurrent read and write
+        async with self._storage_lock:
+            # Check if data needs to be reloaded
+            if self.storage_updated.value:
+                logger.info(
+                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                # Reload data
+                self._client = self._new_client()
+                # Reset update flag
+                self.storage_updated.value = False
+
+            return self._client
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+
+        logger.debug(f"Inserting {len(data)} to {self.namespace}")
+        if not data:
+            return
+
+        current_time = int(time.time())
+        list_data = [
+            {
+                "__id__": k,
+                "__created_at__": current_time,
+                **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
+            }
+            for k, v in data.items()
+        ]
+        contents = [v["content"] for v in data.values()]
+        batches = [
+            contents[i : i + self._max_batch_size]
+            for i in range(0, len(contents), self._max_batch_size)
+        ]
+
+        # Execute embedding outside of lock to avoid long lock times
+        embedding_tasks = [self.embedding_func(batch) for batch in batches]
+        embeddings_list = await asyncio.gather(*embedding_tasks)
+
+        embeddings = np.concatenate(embeddings_list)
+        if len(embeddings) == len(list_data):
+            for i, d in enumerate(list_data):
+                d["__vector__"] = embeddings[i]
+            client = await self._get_client()
+            results = client.upsert(datas=list_data)
+            return results
+        else:
+            # sometimes the embedding is not returned correctly. just log it.
+            logger.error(
+                f"embedding is not 1-1 with data, {len(embeddings)} != {len(list_data)}"
+            )
+
+    async def query(
+        self, query: str, top_k: int, ids: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        # Execute embedding outside of lock to avoid improve cocurrent
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        embedding = embedding[0]
+
+        client = await self._get_client()
+        results = client.query(
+            query=embedding,
+            top_k=top_k,
+            better_than_threshold=self.cosine_better_than_threshold,
+        )
+        results = [
+            {
+                **dp,
+                "id": dp["__id__"],
+                "distance": dp["__metrics__"],
+                "created_at": dp.get("__created_at__"),
+            }
+            for dp in results
+        ]
+        return results
+
+    @property
+    async def client_storage(self):
+        client = await self._get_client()
+        return {"data": client.records()}
+
+    async def delete(self, ids: list[str]):
+        """Delete vectors with specified IDs
+
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+
+        Args:
+            ids: List of vector IDs to be deleted
+        """
+        try:
+            client = await self._get_client()
+            client.delete(ids)
+            logger.debug(
+                f"Successfully deleted {len(ids)} vectors from {self.namespace}"
+            )
+        except Exception as e:
+            logger.error(f"Error while deleting vectors from {self.namespace}: {e}")
+
+    async def delete_entity(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+
+        try:
+            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+            logger.debug(
+                f"Attempting to delete entity {entity_name} with ID {entity_id}"
+            )
+
+            # Check if the entity exists
+            client = await self._get_client()
+            if client.get([entity_id]):
+                client.delete([entity_id])
+                logger.debug(f"Successfully deleted entity {entity_name}")
+            else:
+                logger.debug(f"Entity {entity_name} not found in storage")
+        except Exception as e:
+            logger.error(f"Error deleting entity {entity_name}: {e}")
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+
+        try:
+            client = await self._get_client()
+            ids_to_delete = [
+                dp["__id__"]
+                for dp in client.records()
+                if dp.get("src_id") == entity_name or dp.get("tgt_id") == entity_name
+            ]
+            logger.debug(
+                f"Found {len(ids_to_delete)} relations for entity {entity_name}"
+            )
+
+            if ids_to_delete:
+                client.delete(ids_to_delete)
+                logger.debug(
+                    f"Deleted {len(ids_to_delete)} relations for {entity_name}"
+                )
+            else:
+                logger.debug(f"No relations found for entity {entity_name}")
+        except Exception as e:
+            logger.error(f"Error deleting relations for {entity_name}: {e}")
+
+    async def index_done_callback(self) -> bool:
+        """Save data to disk"""
+        async with self._storage_lock:
+            # Check if storage was updated by another process
+            if self.storage_updated.value:
+                # Storage was updated by another process, reload data instead of saving
+                logger.warning(
+                    f"Storage for {self.namespace} was updated by another process, reloading..."
+                )
+                self._client = self._new_client()
+                # Reset update flag
+                self.storage_updated.value = False
+                return False  # Return error
+
+        # Acquire lock and perform persistence
+        async with self._storage_lock:
+            try:
+                # Flush mapped vectors and save metadata
+                self._client.save()
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+                return True  # Return success
+            except Exception as e:
+                logger.error(f"Error saving data for {self.namespace}: {e}")
+                return False  # Return error
+
+        return True  # Return success
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        """Get vector data by its ID
+
+        Args:
+            id: The unique identifier of the vector
+
+        Returns:
+            The vector data if found, or None if not found
+        """
+        client = await self._get_client()
+        result = client.get([id])
+        if result:
+            dp = result[0]
+            return {
+                **dp,
+                "id": dp.get("__id__"),
+                "created_at": dp.get("__created_at__"),
+            }
+        return None
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        """Get multiple vector data by their IDs
+
+        Args:
+            ids: List of unique identifiers
+
+        Returns:
+            List of vector data objects that were found
+        """
+        if not ids:
+            return []
+
+        client = await self._get_client()
+        results = client.get(ids)
+        return [
+            {
+                **dp,
+                "id": dp.get("__id__"),
+                "created_at": dp.get("__created_at__"),
+            }
+            for dp in results
+        ]
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all vector data from storage and clean up resources
+
+        This method will:
+        1. Remove the vector and metadata files if they exist
+        2. Reinitialize the vector index
+        3. Update flags to notify other processes
+        4. Changes is persisted to disk immediately
+
+        This method is intended for use in scenarios where all data needs to be removed,
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._storage_lock:
+                # Release the mapping before removing its file
+                self._client = None
+                for file_name in (self._vector_file_name, self._meta_file_name):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
+
+                self._client = self._new_client()
+
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+
+                logger.info(
+                    f"Process {os.getpid()} drop {self.namespace}(file:{self._vector_file_name})"
+                )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
@@ -30,7 +30,7 @@ from motor.motor_asyncio import (  # type: ignore
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection,
 )
-from pymongo.operations import SearchIndexModel  # type: ignore
+from pymongo.operations import SearchIndexModel, UpdateOne  # type: ignore
 from pymongo.errors import PyMongoError  # type: ignore
 
 config = configparser.ConfigParser()
@@ -88,6 +88,19 @@ class MongoKVStorage(BaseKVStorage):
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
             logger.debug(f"Use MongoDB as KV {self._collection_name}")
+            if is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
+                await self.create_chunk_id_index_if_not_exists()
+
+    async def create_chunk_id_index_if_not_exists(self):
+        """Index extraction cache entries by chunk_id, looked up when rebuilding the graph"""
+        try:
+            await self._data.create_index(
+                [("chunk_id", 1), ("cache_type", 1)], name="chunk_id_cache_type_index"
+            )
+        except PyMongoError as e:
+            logger.warning(
+                f"Failed to create chunk_id index on {self._collection_name}: {e}"
+            )
 
     async def finalize(self):
         if self.db is not None:
@@ -146,6 +159,26 @@ class MongoKVStorage(BaseKVStorage):
         else:
             return None
 
+    async def get_cache_by_chunk_ids(
+        self,
+        chunk_ids: set[str],
+        mode: str = "default",
+        cache_type: str | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        if not chunk_ids or not is_namespace(
+            self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+        ):
+            return {}
+        query: dict[str, Any] = {"chunk_id": {"$in": list(chunk_ids)}}
+        if cache_type is not None:
+            query["cache_type"] = cache_type
+        prefix = f"{mode}_"
+        result = {}
+        async for doc in self._data.find(query):
+            if str(doc["_id"]).startswith(prefix):
+                result[str(doc["_id"])[len(prefix) :]] = doc
+        return result
+
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
         pass
@@ -581,6 +614,34 @@ class MongoGraphStorage(BaseGraphStorage):
                 return e
         return None
 
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        """
+        Return the full node documents of all given ids that exist, in one query.
+        """
+        cursor = self.collection.find({"_id": {"$in": node_ids}})
+        return {doc["_id"]: doc async for doc in cursor}
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        """
+        Return the edges of all given (src, tgt) pairs that exist, reading every
+        source document once.
+        """
+        cursor = self.collection.find(
+            {"_id": {"$in": list({pair["src"] for pair in pairs})}},
+            {"edges": 1},
+        )
+        edges_by_source = {doc["_id"]: doc.get("edges", []) async for doc in cursor}
+        result = {}
+        for pair in pairs:
+            src_id, tgt_id = pair["src"], pair["tgt"]
+            for e in edges_by_source.get(src_id, []):
+                if e.get("target") == tgt_id:
+                    result[(src_id, tgt_id)] = e
+                    break
+        return result
+
     async def get_node_edges(self, source_node_id: str) -> list[tuple[str, str]] | None:
         """
         Return a list of (source_id, target_id) for direct edges from source_node_id.
@@ -646,6 +707,54 @@ class MongoGraphStorage(BaseGraphStorage):
             {"_id": source_node_id}, {"$push": {"edges": new_edge}}
         )
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Insert or update multiple node documents with one bulk write.
+        """
+        if not nodes:
+            return
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": node_id},
+                    {"$set": {**node_data}, "$setOnInsert": {"edges": []}},
+                    upsert=True,
+                )
+                for node_id, node_data in nodes.items()
+            ]
+        )
+
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """
+        Upsert multiple edges with one ordered bulk write, same steps as upsert_edge.
+        """
+        if not edges:
+            return
+        operations = []
+        for (source_node_id, target_node_id), edge_data in edges.items():
+            new_edge = {"target": target_node_id}
+            new_edge.update(edge_data)
+            operations.extend(
+                [
+                    # Ensure source node exists
+                    UpdateOne(
+                        {"_id": source_node_id},
+                        {"$setOnInsert": {"edges": []}},
+                        upsert=True,
+                    ),
+                    # Remove existing edge (if any)
+                    UpdateOne(
+                        {"_id": source_node_id},
+                        {"$pull": {"edges": {"target": target_node_id}}},
+                    ),
+                    # Insert new edge
+                    UpdateOne({"_id": source_node_id}, {"$push": {"edges": new_edge}}),
+                ]
+            )
+        await self.collection.bulk_write(operations, ordered=True)
+
     #
     # -------------------------------------------------------------------------
     # DELETION
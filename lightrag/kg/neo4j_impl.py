@@ -1,5 +1,6 @@
 import os
 import re
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import final
 import configparser
@@ -871,6 +872,110 @@ class Neo4JStorage(BaseGraphStorage):
             logger.error(f"Error during edge upsert: {str(e)}")
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert multiple nodes in one transaction using UNWIND.
+
+        Labels can not be parameterized, so one query is run per entity type.
+
+        Args:
+            nodes: Dictionary mapping node ids to their node properties
+        """
+        if not nodes:
+            return
+
+        nodes_by_type = defaultdict(list)
+        for node_id, properties in nodes.items():
+            if "entity_id" not in properties:
+                raise ValueError(
+                    "Neo4j: node properties must contain an 'entity_id' field"
+                )
+            nodes_by_type[properties["entity_type"]].append(
+                {"entity_id": node_id, "properties": properties}
+            )
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    for entity_type, rows in nodes_by_type.items():
+                        query = (
+                            """
+                        UNWIND $rows AS row
+                        MERGE (n:base {entity_id: row.entity_id})
+                        SET n += row.properties
+                        SET n:`%s`
+                        """
+                            % entity_type
+                        )
+                        result = await tx.run(query, rows=rows)
+                        await result.consume()  # Ensure result is fully consumed
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch upsert: {str(e)}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """
+        Upsert multiple edges in one transaction using UNWIND.
+
+        Args:
+            edges: Dictionary mapping (source, target) node ids to edge properties
+        """
+        if not edges:
+            return
+
+        rows = [
+            {"src": src_id, "tgt": tgt_id, "properties": edge_data}
+            for (src_id, tgt_id), edge_data in edges.items()
+        ]
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    query = """
+                    UNWIND $rows AS row
+                    MATCH (source:base {entity_id: row.src})
+                    WITH source, row
+                    MATCH (target:base {entity_id: row.tgt})
+                    MERGE (source)-[r:DIRECTED]-(target)
+                    SET r += row.properties
+                    """
+                    result = await tx.run(query, rows=rows)
+                    await result.consume()  # Ensure result is consumed
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch edge upsert: {str(e)}")
+            raise
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -1,9 +1,13 @@
+import json
 import os
+import struct
 from dataclasses import dataclass
 from typing import final
 
+import numpy as np
+
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-from lightrag.utils import logger
+from lightrag.utils import get_env_value, logger
 from lightrag.base import BaseGraphStorage
 from lightrag.constants import GRAPH_FIELD_SEP
 
@@ -31,6 +35,170 @@ load_dotenv(dotenv_path=".env", override=False)
 
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
+# Binary graph snapshot: magic, format version, header length, JSON header, then
+# the arrays listed in the header, each 8-byte aligned so they can be memory-mapped
+_SNAPSHOT_MAGIC = b"LRGS"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_PREFIX = struct.Struct("<4sIQ")
+_SNAPSHOT_ALIGN = 8
+# Strings of a column are stored as one utf-8 blob joined by this separator
+_STR_SEP = "\x00"
+
+
+def _encode_column(values: list) -> tuple[str, np.ndarray]:
+    """Encode the present values of one property column into (type, array)"""
+    if all(type(v) is bool for v in values):
+        return "bool", np.array(values, dtype=np.bool_)
+    if all(type(v) is int for v in values) and all(
+        -(2**63) <= v < 2**63 for v in values
+    ):
+        return "int", np.array(values, dtype=np.int64)
+    if all(type(v) is float for v in values):
+        return "float", np.array(values, dtype=np.float64)
+    if all(type(v) is str and _STR_SEP not in v for v in values):
+        blob = _STR_SEP.join(values).encode("utf-8")
+        return "str", np.frombuffer(blob, dtype=np.uint8)
+    # Mixed or other types, json.dumps escapes control characters so the separator is safe
+    blob = _STR_SEP.join(
+        json.dumps(v, ensure_ascii=False, default=str) for v in values
+    ).encode("utf-8")
+    return "json", np.frombuffer(blob, dtype=np.uint8)
+
+
+def _decode_column(kind: str, array: np.ndarray, count: int) -> list:
+    if kind in ("bool", "int", "float"):
+        return array.tolist()
+    if not count:
+        return []
+    values = bytes(array).decode("utf-8").split(_STR_SEP)
+    if kind == "json":
+        return [json.loads(v) for v in values]
+    return values
+
+
+def _encode_columns(items: list[dict], arrays: dict, prefix: str) -> dict:
+    """Columnar encoding of the attribute dicts of nodes or edges"""
+    columns = {}
+    keys = dict.fromkeys(key for attrs in items for key in attrs)
+    for i, key in enumerate(keys):
+        present = np.fromiter((key in attrs for attrs in items), dtype=np.bool_)
+        values = [attrs[key] for attrs in items if key in attrs]
+        kind, array = _encode_column(values)
+        column = {"type": kind, "count": len(values), "values": f"{prefix}{i}"}
+        arrays[column["values"]] = array
+        if not present.all():
+            column["present"] = f"{prefix}{i}_present"
+            arrays[column["present"]] = present
+        columns[key] = column
+    return columns
+
+
+def _decode_columns(columns: dict, arrays: dict, size: int) -> list[dict]:
+    items = [{} for _ in range(size)]
+    for key, column in columns.items():
+        values = _decode_column(
+            column["type"], arrays[column["values"]], column["count"]
+        )
+        if "present" in column:
+            positions = np.flatnonzero(arrays[column["present"]]).tolist()
+        else:
+            positions = range(size)
+        for pos, value in zip(positions, values):
+            items[pos][key] = value
+    return items
+
+
+def write_graph_snapshot(graph: nx.Graph, file_name: str) -> None:
+    """Write the graph as a binary snapshot, replacing file_name atomically"""
+    node_ids = list(graph.nodes())
+    node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+    edges = list(graph.edges(data=True))
+    index_dtype = np.int32 if len(node_ids) < 2**31 else np.int64
+
+    arrays: dict[str, np.ndarray] = {}
+    node_id_kind, arrays["node_ids"] = _encode_column(node_ids)
+    arrays["edge_src"] = np.fromiter(
+        (node_index[u] for u, _, _ in edges), dtype=index_dtype, count=len(edges)
+    )
+    arrays["edge_tgt"] = np.fromiter(
+        (node_index[v] for _, v, _ in edges), dtype=index_dtype, count=len(edges)
+    )
+    header = {
+        "directed": graph.is_directed(),
+        "graph": graph.graph,
+        "nodes": len(node_ids),
+        "edges": len(edges),
+        "node_id_type": node_id_kind,
+        "node_columns": _encode_columns(
+            [attrs for _, attrs in graph.nodes(data=True)], arrays, "node_col"
+        ),
+        "edge_columns": _encode_columns(
+            [attrs for _, _, attrs in edges], arrays, "edge_col"
+        ),
+        "arrays": {},
+    }
+
+    offset = 0
+    for name, array in arrays.items():
+        offset += -offset % _SNAPSHOT_ALIGN
+        header["arrays"][name] = [array.dtype.str, offset, len(array)]
+        offset += array.nbytes
+    header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+    data_start = _SNAPSHOT_PREFIX.size + len(header_bytes)
+    data_start += -data_start % _SNAPSHOT_ALIGN
+
+    tmp_file = file_name + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(
+            _SNAPSHOT_PREFIX.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(header_bytes))
+        )
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name][1])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file_name)
+
+
+def read_graph_snapshot(file_name: str) -> nx.Graph:
+    """Load a graph written by write_graph_snapshot, mapping its arrays from disk"""
+    with open(file_name, "rb") as f:
+        magic, version, header_len = _SNAPSHOT_PREFIX.unpack(
+            f.read(_SNAPSHOT_PREFIX.size)
+        )
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+            raise ValueError(f"{file_name} is not a supported graph snapshot")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = _SNAPSHOT_PREFIX.size + header_len
+    data_start += -data_start % _SNAPSHOT_ALIGN
+
+    mapped = np.memmap(file_name, dtype=np.uint8, mode="r")
+    arrays = {
+        name: mapped[data_start + offset :][: np.dtype(dtype).itemsize * length].view(
+            dtype
+        )
+        for name, (dtype, offset, length) in header["arrays"].items()
+    }
+    node_ids = _decode_column(
+        header["node_id_type"], arrays["node_ids"], header["nodes"]
+    )
+    node_attrs = _decode_columns(header["node_columns"], arrays, header["nodes"])
+    edge_attrs = _decode_columns(header["edge_columns"], arrays, header["edges"])
+    edge_src = arrays["edge_src"].tolist()
+    edge_tgt = arrays["edge_tgt"].tolist()
+    del arrays, mapped
+
+    graph = nx.DiGraph() if header["directed"] else nx.Graph()
+    graph.graph.update(header["graph"])
+    graph.add_nodes_from(zip(node_ids, node_attrs))
+    graph.add_edges_from(
+        (node_ids[s], node_ids[t], attrs)
+        for s, t, attrs in zip(edge_src, edge_tgt, edge_attrs)
+    )
+    return graph
+
 
 @final
 @dataclass
@@ -38,7 +206,9 @@ class NetworkXStorage(BaseGraphStorage):
     @staticmethod
     def load_nx_graph(file_name) -> nx.Graph:
         if os.path.exists(file_name):
-            return nx.read_graphml(file_name)
+            if file_name.endswith(".graphml"):
+                return nx.read_graphml(file_name)
+            return read_graph_snapshot(file_name)
         return None
 
     @staticmethod
@@ -46,26 +216,77 @@ class NetworkXStorage(BaseGraphStorage):
         logger.info(
             f"Writing graph with {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges"
         )
-        nx.write_graphml(graph, file_name)
+        if file_name.endswith(".graphml"):
+            nx.write_graphml(graph, file_name)
+        else:
+            write_graph_snapshot(graph, file_name)
 
     def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        self._snapshot_file = os.path.join(
+            working_dir, f"graph_{self.namespace}.snapshot"
+        )
         self._graphml_xml_file = os.path.join(
-            self.global_config["working_dir"], f"graph_{self.namespace}.graphml"
+            working_dir, f"graph_{self.namespace}.graphml"
         )
+        # Keep writing GraphML next to the snapshot for external tools (e.g. the visualizer)
+        self._export_graphml = get_env_value("NETWORKX_GRAPHML_EXPORT", False, bool)
+        if os.path.exists(self._graphml_xml_file):
+            if os.getenv("NETWORKX_GRAPHML_EXPORT") is None:
+                # GraphML written by older versions may be read by existing workflows,
+                # keep it up to date rather than leaving a stale graph behind
+                self._export_graphml = True
+                logger.warning(
+                    f"Graph {self.namespace} is now persisted to {self._snapshot_file}, "
+                    f"{self._graphml_xml_file} exists and will keep being updated "
+                    "(set NETWORKX_GRAPHML_EXPORT=false to stop)"
+                )
+            elif not self._export_graphml:
+                logger.warning(
+                    f"GraphML export is disabled, {self._graphml_xml_file} is no longer "
+                    f"updated, the graph is persisted to {self._snapshot_file}"
+                )
         self._storage_lock = None
         self.storage_updated = None
         self._graph = None
 
         # Load initial graph
-        preloaded_graph = NetworkXStorage.load_nx_graph(self._graphml_xml_file)
-        if preloaded_graph is not None:
-            logger.info(
-                f"Loaded graph from {self._graphml_xml_file} with {preloaded_graph.number_of_nodes()} nodes, {preloaded_graph.number_of_edges()} edges"
-            )
-        else:
+        preloaded_graph = self._load_graph()
+        if preloaded_graph is None:
             logger.info("Created new empty graph")
         self._graph = preloaded_graph or nx.Graph()
 
+    def _load_graph(self) -> nx.Graph | None:
+        """Load the binary snapshot, falling back to a GraphML file written by older versions"""
+        for file_name in (self._snapshot_file, self._graphml_xml_file):
+            graph = NetworkXStorage.load_nx_graph(file_name)
+            if graph is not None:
+                logger.info(
+                    f"Loaded graph from {file_name} with {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges"
+                )
+                return graph
+        return None
+
+    def _write_graph(self) -> None:
+        NetworkXStorage.write_nx_graph(self._graph, self._snapshot_file)
+        if self._export_graphml:
+            nx.write_graphml(self._graph, self._graphml_xml_file)
+
+    async def export_graphml(self, file_name: str | None = None) -> str:
+        """Export the current graph as GraphML
+
+        Args:
+            file_name: Target file, defaults to graph_{namespace}.graphml in the working dir
+
+        Returns:
+            The path of the written file
+        """
+        file_name = file_name or self._graphml_xml_file
+        graph = await self._get_graph()
+        async with self._storage_lock:
+            nx.write_graphml(graph, file_name)
+        return file_name
+
     async def initialize(self):
         """Initialize storage data"""
         # Get the update flag for cross-process update notification
@@ -83,9 +304,7 @@ class NetworkXStorage(BaseGraphStorage):
                     f"Process {os.getpid()} reloading graph {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                self._graph = self._load_graph() or nx.Graph()
                 # Reset update flag
                 self.storage_updated.value = False
 
@@ -145,6 +364,30 @@ class NetworkXStorage(BaseGraphStorage):
         graph = await self._get_graph()
         graph.add_edge(source_node_id, target_node_id, **edge_data)
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        graph = await self._get_graph()
+        graph.add_nodes_from(nodes.items())
+
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        graph = await self._get_graph()
+        graph.add_edges_from(
+            (src_id, tgt_id, edge_data) for (src_id, tgt_id), edge_data in edges.items()
+        )
+
     async def delete_node(self, node_id: str) -> None:
         """
         Importance notes:
@@ -394,9 +637,7 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.info(
                     f"Graph for {self.namespace} was updated by another process, reloading..."
                 )
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                self._graph = self._load_graph() or nx.Graph()
                 # Reset update flag
                 self.storage_updated.value = False
                 return False  # Return error
@@ -405,7 +646,7 @@ class NetworkXStorage(BaseGraphStorage):
         async with self._storage_lock:
             try:
                 # Save data to disk
-                NetworkXStorage.write_nx_graph(self._graph, self._graphml_xml_file)
+                self._write_graph()
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
@@ -421,7 +662,7 @@ class NetworkXStorage(BaseGraphStorage):
         """Drop all graph data from storage and clean up resources
 
         This method will:
-        1. Remove the graph storage file if it exists
+        1. Remove the graph snapshot and GraphML files if they exist
         2. Reset the graph to an empty state
         3. Update flags to notify other processes
         4. Changes is persisted to disk immediately
@@ -434,8 +675,9 @@ class NetworkXStorage(BaseGraphStorage):
         try:
             async with self._storage_lock:
                 # delete _client_file_name
-                if os.path.exists(self._graphml_xml_file):
-                    os.remove(self._graphml_xml_file)
+                for file_name in (self._snapshot_file, self._graphml_xml_file):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
                 self._graph = nx.Graph()
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
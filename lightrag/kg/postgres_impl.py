@@ -1,6 +1,7 @@
 import asyncio
 import json
 import os
+import struct
 import datetime
 from datetime import timezone
 from dataclasses import dataclass, field
@@ -73,6 +74,7 @@ class PostgreSQLDB:
                 port=self.port,
                 min_size=1,
                 max_size=self.max,
+                init=self._init_connection,
             )
 
             logger.info(
@@ -84,6 +86,41 @@ class PostgreSQLDB:
             )
             raise
 
+    @staticmethod
+    def _encode_vector(value: Any) -> bytes:
+        """Encode a vector in pgvector's binary format: dim, unused, big-endian float4s"""
+        if isinstance(value, str):
+            value = json.loads(value)
+        vector = np.asarray(value, dtype=">f4")
+        return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+    @staticmethod
+    def _decode_vector(data: bytes) -> list[float]:
+        dim, _ = struct.unpack_from(">HH", data)
+        return np.frombuffer(data, dtype=">f4", count=dim, offset=4).tolist()
+
+    @classmethod
+    async def _init_connection(cls, connection: asyncpg.Connection) -> None:
+        """Register the binary codec of pgvector's vector type on a new pool connection.
+
+        Vectors are then sent and received as binary instead of decimal text.
+        """
+        schema = await connection.fetchval(
+            "SELECT typnamespace::regnamespace::text FROM pg_type WHERE typname = 'vector'"
+        )
+        if schema is None:
+            logger.warning(
+                "PostgreSQL, vector type not found, is the pgvector extension installed?"
+            )
+            return
+        await connection.set_type_codec(
+            "vector",
+            schema=schema,
+            encoder=cls._encode_vector,
+            decoder=cls._decode_vector,
+            format="binary",
+        )
+
     @staticmethod
     async def configure_age(connection: asyncpg.Connection, graph_name: str) -> None:
         """Set the Apache AGE environment and creates a graph if it does not exist.
@@ -133,6 +170,14 @@ class PostgreSQLDB:
                 logger.info(
                     "chunk_id column already exists in LIGHTRAG_LLM_CACHE table"
                 )
+
+            # Extraction cache entries are looked up by chunk_id when rebuilding the graph
+            await self.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_lightrag_llm_cache_chunk_id
+                ON LIGHTRAG_LLM_CACHE(workspace, mode, chunk_id)
+                """
+            )
         except Exception as e:
             logger.warning(f"Failed to add chunk_id column to LIGHTRAG_LLM_CACHE: {e}")
 
@@ -322,6 +367,19 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL database,\nsql:{sql},\ndata:{data},\nerror:{e}")
             raise
 
+    async def executemany(self, sql: str, data: list[dict[str, Any]]) -> None:
+        """Execute sql once per parameter dict, pipelined in one round-trip and atomic"""
+        if not data:
+            return
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                await connection.executemany(sql, [tuple(d.values()) for d in data])
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL database,\nsql:{sql},\nrows:{len(data)},\nerror:{e}"
+            )
+            raise
+
 
 class ClientManager:
     _instances: dict[str, Any] = {"db": None, "ref_count": 0}
@@ -392,6 +450,8 @@ class ClientManager:
 @dataclass
 class PGKVStorage(BaseKVStorage):
     db: PostgreSQLDB = field(default=None)
+    # ids are inlined into an IN (...) list, keep statements reasonably small
+    get_by_ids_batch_size = 500
 
     def __post_init__(self):
         self._max_batch_size = self.global_config["embedding_batch_num"]
@@ -611,6 +671,30 @@ class PGKVStorage(BaseKVStorage):
             logger.error(f"Error deleting cache by modes {modes}: {e}")
             return False
 
+    async def get_cache_by_chunk_ids(
+        self,
+        chunk_ids: set[str],
+        mode: str = "default",
+        cache_type: str | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Get cache entries by chunk_id with one query instead of reading the whole mode
+
+        LIGHTRAG_LLM_CACHE has no cache_type column, entries with a chunk_id are
+        entity extraction results so cache_type is not filtered on.
+        """
+        if not chunk_ids or not is_namespace(
+            self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+        ):
+            return {}
+        sql = SQL_TEMPLATES["get_by_chunk_ids_llm_response_cache"]
+        params = {
+            "workspace": self.db.workspace,
+            "mode": mode,
+            "chunk_ids": list(chunk_ids),
+        }
+        results = await self.db.query(sql, params, multirows=True)
+        return {row["id"]: row for row in results or []}
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
         try:
@@ -666,7 +750,7 @@ class PGVectorStorage(BaseVectorStorage):
                 "chunk_order_index": item["chunk_order_index"],
                 "full_doc_id": item["full_doc_id"],
                 "content": item["content"],
-                "content_vector": json.dumps(item["__vector__"].tolist()),
+                "content_vector": item["__vector__"],
                 "file_path": item["file_path"],
                 "create_time": current_time,
                 "update_time": current_time,
@@ -692,7 +776,7 @@ class PGVectorStorage(BaseVectorStorage):
             "id": item["__id__"],
             "entity_name": item["entity_name"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": item["__vector__"],
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -716,7 +800,7 @@ class PGVectorStorage(BaseVectorStorage):
             "source_id": item["src_id"],
             "target_id": item["tgt_id"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": item["__vector__"],
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -750,6 +834,7 @@ class PGVectorStorage(BaseVectorStorage):
         embeddings = np.concatenate(embeddings_list)
         for i, d in enumerate(list_data):
             d["__vector__"] = embeddings[i]
+        upsert_sql, rows = None, []
         for item in list_data:
             if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
                 upsert_sql, data = self._upsert_chunks(item, current_time)
@@ -759,8 +844,10 @@ class PGVectorStorage(BaseVectorStorage):
                 upsert_sql, data = self._upsert_relationships(item, current_time)
             else:
                 raise ValueError(f"{self.namespace} is not supported")
+            rows.append(data)
 
-            await self.db.execute(upsert_sql, data)
+        # All rows are sent in one pipelined round-trip, vectors in binary format
+        await self.db.executemany(upsert_sql, rows)
 
     #################### query method ###############
     async def query(
@@ -770,14 +857,16 @@ class PGVectorStorage(BaseVectorStorage):
             [query], _priority=5
         )  # higher priority for query
         embedding = embeddings[0]
-        embedding_string = ",".join(map(str, embedding))
         # Use parameterized document IDs (None means search across all documents)
-        sql = SQL_TEMPLATES[self.namespace].format(embedding_string=embedding_string)
+        # The embedding is bound as a binary vector parameter, so the SQL text is constant
+        # per namespace and asyncpg reuses its prepared statement on every connection
+        sql = SQL_TEMPLATES[self.namespace]
         params = {
             "workspace": self.db.workspace,
             "doc_ids": ids,
             "better_than_threshold": self.cosine_better_than_threshold,
             "top_k": top_k,
+            "embedding": embedding,
         }
         results = await self.db.query(sql, params=params, multirows=True)
         return results
@@ -1594,6 +1683,94 @@ class PGGraphStorage(BaseGraphStorage):
             )
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert multiple nodes in one round-trip.
+
+        One cypher statement per node is sent as a single multi-statement query,
+        which PostgreSQL runs in one implicit transaction.
+
+        Args:
+            nodes: dictionary mapping node ids to their node properties
+        """
+        if not nodes:
+            return
+
+        statements = []
+        for node_id, node_data in nodes.items():
+            if "entity_id" not in node_data:
+                raise ValueError(
+                    "PostgreSQL: node properties must contain an 'entity_id' field"
+                )
+            statements.append(
+                """SELECT * FROM cypher('%s', $$
+                     MERGE (n:base {entity_id: "%s"})
+                     SET n += %s
+                     RETURN n
+                   $$) AS (n agtype);"""
+                % (
+                    self.graph_name,
+                    self._normalize_node_id(node_id),
+                    self._format_properties(node_data),
+                )
+            )
+
+        try:
+            await self._query("\n".join(statements), readonly=False, upsert=True)
+        except Exception:
+            logger.error(f"POSTGRES, upsert_nodes_batch error on {len(nodes)} nodes")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges_batch(
+        self, edges: dict[tuple[str, str], dict[str, str]]
+    ) -> None:
+        """
+        Upsert multiple edges in one round-trip, see upsert_nodes_batch.
+
+        Args:
+            edges: dictionary mapping (source, target) node ids to edge properties
+        """
+        if not edges:
+            return
+
+        statements = []
+        for (source_node_id, target_node_id), edge_data in edges.items():
+            edge_properties = self._format_properties(edge_data)
+            statements.append(
+                """SELECT * FROM cypher('%s', $$
+                     MATCH (source:base {entity_id: "%s"})
+                     WITH source
+                     MATCH (target:base {entity_id: "%s"})
+                     MERGE (source)-[r:DIRECTED]-(target)
+                     SET r += %s
+                     SET r += %s
+                     RETURN r
+                   $$) AS (r agtype);"""
+                % (
+                    self.graph_name,
+                    self._normalize_node_id(source_node_id),
+                    self._normalize_node_id(target_node_id),
+                    edge_properties,
+                    edge_properties,  # same workaround as upsert_edge
+                )
+            )
+
+        try:
+            await self._query("\n".join(statements), readonly=False, upsert=True)
+        except Exception:
+            logger.error(f"POSTGRES, upsert_edges_batch error on {len(edges)} edges")
+            raise
+
     async def delete_node(self, node_id: str) -> None:
         """
         Delete a node from the graph.
@@ -2526,6 +2703,9 @@ SQL_TEMPLATES = {
     "get_by_mode_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode, chunk_id
                            FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND id=$3
                           """,
+    "get_by_chunk_ids_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode, chunk_id
+                           FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND chunk_id = ANY($3)
+                          """,
     "get_by_ids_full_docs": """SELECT id, COALESCE(content, '') as content
                                  FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id IN ({ids})
                             """,
@@ -2596,7 +2776,7 @@ SQL_TEMPLATES = {
     )
     SELECT source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
     FROM (
-        SELECT r.id, r.source_id, r.target_id, r.create_time, 1 - (r.content_vector <=> '[{embedding_string}]'::vector) as distance
+        SELECT r.id, r.source_id, r.target_id, r.create_time, 1 - (r.content_vector <=> $5::vector) as distance
         FROM LIGHTRAG_VDB_RELATION r
         JOIN relevant_chunks c ON c.chunk_id = ANY(r.chunk_ids)
         WHERE r.workspace=$1
@@ -2613,7 +2793,7 @@ SQL_TEMPLATES = {
         )
         SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
             (
-                SELECT e.id, e.entity_name, e.create_time, 1 - (e.content_vector <=> '[{embedding_string}]'::vector) as distance
+                SELECT e.id, e.entity_name, e.create_time, 1 - (e.content_vector <=> $5::vector) as distance
                 FROM LIGHTRAG_VDB_ENTITY e
                 JOIN relevant_chunks c ON c.chunk_id = ANY(e.chunk_ids)
                 WHERE e.workspace=$1
@@ -2630,7 +2810,7 @@ SQL_TEMPLATES = {
         )
         SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
             (
-                SELECT id, content, file_path, create_time, 1 - (content_vector <=> '[{embedding_string}]'::vector) as distance
+                SELECT id, content, file_path, create_time, 1 - (content_vector <=> $5::vector) as distance
                 FROM LIGHTRAG_DOC_CHUNKS
                 WHERE workspace=$1
                 AND id IN (SELECT chunk_id FROM relevant_chunks)
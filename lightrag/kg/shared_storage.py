@@ -1,9 +1,12 @@
 import os
 import sys
+import zlib
 import asyncio
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
-from typing import Any, Dict, Optional, Union, TypeVar, Generic
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, TypeVar, Generic
+
+from lightrag.constants import DEFAULT_GRAPH_DB_LOCK_STRIPES
 
 
 # Define a direct print function for critical logs that must be visible in all processes
@@ -40,10 +43,20 @@ _internal_lock: Optional[LockType] = None
 _pipeline_status_lock: Optional[LockType] = None
 _graph_db_lock: Optional[LockType] = None
 _data_init_lock: Optional[LockType] = None
+# striped locks for graph merging, entity and relation keys are hashed onto them
+_graph_db_key_locks: Optional[Dict[str, List[LockType]]] = None  # pool -> stripes
+
+# gate of new graph merges, and number of merges holding striped locks per process
+_graph_db_merge_lock: Optional[LockType] = None
+_graph_db_merges: Optional[Dict[int, int]] = None  # pid -> merges in progress
 
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
+# seconds between attempts to acquire a polled multiprocessing lock, doubled on each attempt
+_PROCESS_LOCK_POLL_MIN_DELAY = 0.001
+_PROCESS_LOCK_POLL_MAX_DELAY = 0.05
+
 
 class UnifiedLock(Generic[T]):
     """Provide a unified lock interface type for asyncio.Lock and multiprocessing.Lock"""
@@ -55,6 +68,7 @@ class UnifiedLock(Generic[T]):
         name: str = "unnamed",
         enable_logging: bool = True,
         async_lock: Optional[asyncio.Lock] = None,
+        poll: bool = False,
     ):
         self._lock = lock
         self._is_async = is_async
@@ -62,8 +76,10 @@ class UnifiedLock(Generic[T]):
         self._name = name  # for debug only
         self._enable_logging = enable_logging  # for debug only
         self._async_lock = async_lock  # auxiliary lock for coroutine synchronization
+        self._poll = poll  # acquire the multiprocessing lock without blocking the loop
 
     async def __aenter__(self) -> "UnifiedLock[T]":
+        async_lock_acquired = False
         try:
             # direct_log(
             #     f"== Lock == Process {self._pid}: Acquiring lock '{self._name}' (async={self._is_async})",
@@ -77,6 +93,7 @@ class UnifiedLock(Generic[T]):
                 #     enable_output=self._enable_logging,
                 # )
                 await self._async_lock.acquire()
+                async_lock_acquired = True
                 direct_log(
                     f"== Lock == Process {self._pid}: Async lock for '{self._name}' acquired",
                     enable_output=self._enable_logging,
@@ -85,6 +102,8 @@ class UnifiedLock(Generic[T]):
             # Then acquire the main lock
             if self._is_async:
                 await self._lock.acquire()
+            elif self._poll:
+                await self._acquire_process_lock()
             else:
                 self._lock.acquire()
 
@@ -93,13 +112,9 @@ class UnifiedLock(Generic[T]):
                 enable_output=self._enable_logging,
             )
             return self
-        except Exception as e:
-            # If main lock acquisition fails, release the async lock if it was acquired
-            if (
-                not self._is_async
-                and self._async_lock is not None
-                and self._async_lock.locked()
-            ):
+        except BaseException as e:
+            # If main lock acquisition fails or is cancelled, release the async lock if it was acquired
+            if async_lock_acquired:
                 self._async_lock.release()
 
             direct_log(
@@ -109,6 +124,18 @@ class UnifiedLock(Generic[T]):
             )
             raise
 
+    async def _acquire_process_lock(self):
+        """Acquire the multiprocessing lock without blocking the event loop
+
+        Used for the graph database locks: a blocking acquire would freeze every
+        coroutine of this process, including the merges that the holder of the global
+        graph database lock waits for.
+        """
+        delay = _PROCESS_LOCK_POLL_MIN_DELAY
+        while not self._lock.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _PROCESS_LOCK_POLL_MAX_DELAY)
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         main_lock_released = False
         try:
@@ -211,6 +238,30 @@ class UnifiedLock(Generic[T]):
             raise
 
 
+class MultiUnifiedLock:
+    """Acquire several unified locks in the given order, release them in reverse order"""
+
+    def __init__(self, locks: List[UnifiedLock]):
+        self._locks = locks
+
+    async def __aenter__(self) -> "MultiUnifiedLock":
+        acquired = []
+        try:
+            for lock in self._locks:
+                await lock.__aenter__()
+                acquired.append(lock)
+            return self
+        except BaseException:
+            # Release the locks already held if acquiring the next one fails or is cancelled
+            for lock in reversed(acquired):
+                await lock.__aexit__(None, None, None)
+            raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for lock in reversed(self._locks):
+            await lock.__aexit__(exc_type, exc_val, exc_tb)
+
+
 def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
     async_lock = _async_locks.get("internal_lock") if _is_multiprocess else None
@@ -247,18 +298,200 @@ def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
-def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified graph database lock for ensuring atomic operations"""
+class GraphDBLock:
+    """Global graph database lock, exclusive with all merges under striped key locks
+
+    New merges are stopped at the merge gate, then the merges holding striped locks are
+    waited for, so the holder never competes with them for the striped locks themselves.
+    """
+
+    def __init__(self, graph_db_lock: UnifiedLock, merge_lock: UnifiedLock):
+        self._locks = MultiUnifiedLock([graph_db_lock, merge_lock])
+
+    async def __aenter__(self) -> "GraphDBLock":
+        await self._locks.__aenter__()
+        try:
+            delay = _PROCESS_LOCK_POLL_MIN_DELAY
+            while _count_running_graph_db_merges() > 0:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _PROCESS_LOCK_POLL_MAX_DELAY)
+            return self
+        except BaseException:
+            await self._locks.__aexit__(None, None, None)
+            raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._locks.__aexit__(exc_type, exc_val, exc_tb)
+
+
+class GraphDBKeyLock:
+    """Striped entity and relation locks of a graph merge
+
+    The merge passes the merge gate and is counted as in progress, then acquires all its
+    striped locks in one sorted acquisition.
+    """
+
+    def __init__(self, merge_lock: UnifiedLock, stripe_locks: List[UnifiedLock]):
+        self._merge_lock = merge_lock
+        self._stripe_locks = MultiUnifiedLock(stripe_locks)
+
+    async def __aenter__(self) -> "GraphDBKeyLock":
+        async with self._merge_lock:
+            _count_graph_db_merge(1)
+        try:
+            await self._stripe_locks.__aenter__()
+            return self
+        except BaseException:
+            _count_graph_db_merge(-1)
+            raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self._stripe_locks.__aexit__(exc_type, exc_val, exc_tb)
+        finally:
+            _count_graph_db_merge(-1)
+
+
+def _count_graph_db_merge(delta: int):
+    # Each process only writes its own entry, no lock is needed across processes
+    pid = os.getpid()
+    _graph_db_merges[pid] = _graph_db_merges.get(pid, 0) + delta
+
+
+def _count_running_graph_db_merges() -> int:
+    """Count the merges holding striped locks, forgetting processes that exited"""
+    running = 0
+    for pid, count in list(_graph_db_merges.items()):
+        if count > 0 and pid != os.getpid() and not _is_process_alive(pid):
+            # A worker killed during a merge never decrements its count
+            direct_log(
+                f"== Lock == Process {os.getpid()}: Dropping {count} graph merges of exited process {pid}",
+                level="WARNING",
+            )
+            _graph_db_merges.pop(pid, None)
+            continue
+        running += count
+    return running
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def get_graph_db_lock(
+    enable_logging: bool = False, include_key_locks: bool = True
+) -> Union[UnifiedLock, GraphDBLock]:
+    """return unified graph database lock for ensuring atomic operations
+
+    By default the holder also excludes merges running under get_graph_db_node_lock /
+    get_graph_db_edge_lock: new merges are held back and the running ones waited for.
+    With include_key_locks=False only holders of the global lock are excluded.
+    """
     async_lock = _async_locks.get("graph_db_lock") if _is_multiprocess else None
-    return UnifiedLock(
+    graph_db_lock = UnifiedLock(
         lock=_graph_db_lock,
         is_async=not _is_multiprocess,
         name="graph_db_lock",
         enable_logging=enable_logging,
         async_lock=async_lock,
+        poll=True,
+    )
+    if not include_key_locks:
+        return graph_db_lock
+    return GraphDBLock(graph_db_lock, _get_graph_db_merge_lock(enable_logging))
+
+
+def _get_graph_db_merge_lock(enable_logging: bool = False) -> UnifiedLock:
+    async_lock = _async_locks.get("graph_db_merge_lock") if _is_multiprocess else None
+    return UnifiedLock(
+        lock=_graph_db_merge_lock,
+        is_async=not _is_multiprocess,
+        name="graph_db_merge_lock",
+        enable_logging=enable_logging,
+        async_lock=async_lock,
+        poll=True,
     )
 
 
+def _get_graph_db_stripe_lock(
+    pool: str, stripe: int, enable_logging: bool = False
+) -> UnifiedLock:
+    name = f"graph_db_{pool}_lock_{stripe}"
+    async_lock = _async_locks.get(name) if _is_multiprocess else None
+    return UnifiedLock(
+        lock=_graph_db_key_locks[pool][stripe],
+        is_async=not _is_multiprocess,
+        name=name,
+        enable_logging=enable_logging,
+        async_lock=async_lock,
+        poll=True,
+    )
+
+
+def get_graph_db_lock_stripe(key: Union[str, Tuple[str, str]]) -> int:
+    """return the index of the striped lock guarding an entity name or a (src, tgt) relation"""
+    if isinstance(key, tuple):
+        key = "\x00".join(sorted(key))
+    # crc32 rather than hash(): str hashes are randomized per process
+    return zlib.crc32(key.encode("utf-8")) % len(_graph_db_key_locks["node"])
+
+
+def _get_graph_db_key_lock(
+    entity_names: Sequence[str],
+    edges: Sequence[Tuple[str, str]],
+    enable_logging: bool = False,
+) -> GraphDBKeyLock:
+    # One sorted acquisition over both pools gives all merges the same lock order
+    stripes = sorted(
+        {("edge", get_graph_db_lock_stripe(edge)) for edge in edges}
+        | {("node", get_graph_db_lock_stripe(name)) for name in entity_names}
+    )
+    return GraphDBKeyLock(
+        _get_graph_db_merge_lock(enable_logging),
+        [
+            _get_graph_db_stripe_lock(pool, stripe, enable_logging)
+            for pool, stripe in stripes
+        ],
+    )
+
+
+def get_graph_db_node_lock(
+    *entity_names: str, enable_logging: bool = False
+) -> GraphDBKeyLock:
+    """return striped lock for merging the given entities of the graph database
+
+    Importance notes:
+    1. Keys are hashed onto a fixed set of locks shared by all processes, so unrelated
+       entities may share a lock
+    2. All locks a merge needs must be taken in one call: never acquire a striped lock
+       while holding another one, release and acquire the whole set again instead
+    3. Lock-order deadlocks are avoided by the single sorted acquisition; across
+       processes this relies on multiprocessing locks being awaited without blocking the
+       event loop of the waiting process
+    """
+    return _get_graph_db_key_lock(entity_names, (), enable_logging)
+
+
+def get_graph_db_edge_lock(
+    *edges: Tuple[str, str],
+    entity_names: Sequence[str] = (),
+    enable_logging: bool = False,
+) -> GraphDBKeyLock:
+    """return striped lock for merging the given (src, tgt) relations
+
+    Relations are keyed by their sorted entity pair. The locks of entity_names, e.g.
+    missing endpoint entities to insert, are acquired along with them; the same rules
+    as for get_graph_db_node_lock apply.
+    """
+    return _get_graph_db_key_lock(entity_names, edges, enable_logging)
+
+
 def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified data initialization lock for ensuring atomic data initialization"""
     async_lock = _async_locks.get("data_init_lock") if _is_multiprocess else None
@@ -298,6 +531,9 @@ def initialize_share_data(workers: int = 1):
         _pipeline_status_lock, \
         _graph_db_lock, \
         _data_init_lock, \
+        _graph_db_key_locks, \
+        _graph_db_merge_lock, \
+        _graph_db_merges, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
@@ -312,6 +548,9 @@ def initialize_share_data(workers: int = 1):
         return
 
     _workers = workers
+    graph_db_lock_stripes = max(
+        1, int(os.getenv("GRAPH_DB_LOCK_STRIPES", DEFAULT_GRAPH_DB_LOCK_STRIPES))
+    )
 
     if workers > 1:
         _is_multiprocess = True
@@ -321,6 +560,12 @@ def initialize_share_data(workers: int = 1):
         _pipeline_status_lock = _manager.Lock()
         _graph_db_lock = _manager.Lock()
         _data_init_lock = _manager.Lock()
+        _graph_db_key_locks = {
+            pool: [_manager.Lock() for _ in range(graph_db_lock_stripes)]
+            for pool in ("node", "edge")
+        }
+        _graph_db_merge_lock = _manager.Lock()
+        _graph_db_merges = _manager.dict()
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
@@ -332,7 +577,11 @@ def initialize_share_data(workers: int = 1):
             "pipeline_status_lock": asyncio.Lock(),
             "graph_db_lock": asyncio.Lock(),
             "data_init_lock": asyncio.Lock(),
+            "graph_db_merge_lock": asyncio.Lock(),
         }
+        for pool, stripe_locks in _graph_db_key_locks.items():
+            for stripe in range(len(stripe_locks)):
+                _async_locks[f"graph_db_{pool}_lock_{stripe}"] = asyncio.Lock()
 
         direct_log(
             f"Process {os.getpid()} Shared-Data created for Multiple Process (workers={workers})"
@@ -344,6 +593,12 @@ def initialize_share_data(workers: int = 1):
         _pipeline_status_lock = asyncio.Lock()
         _graph_db_lock = asyncio.Lock()
         _data_init_lock = asyncio.Lock()
+        _graph_db_key_locks = {
+            pool: [asyncio.Lock() for _ in range(graph_db_lock_stripes)]
+            for pool in ("node", "edge")
+        }
+        _graph_db_merge_lock = asyncio.Lock()
+        _graph_db_merges = {}
         _shared_dicts = {}
         _init_flags = {}
         _update_flags = {}
@@ -531,6 +786,9 @@ def finalize_share_data():
         _pipeline_status_lock, \
         _graph_db_lock, \
         _data_init_lock, \
+        _graph_db_key_locks, \
+        _graph_db_merge_lock, \
+        _graph_db_merges, \
         _shared_dicts, \
         _init_flags, \
         _initialized, \
@@ -599,6 +857,9 @@ def finalize_share_data():
     _pipeline_status_lock = None
     _graph_db_lock = None
     _data_init_lock = None
+    _graph_db_key_locks = None
+    _graph_db_merge_lock = None
+    _graph_db_merges = None
     _update_flags = None
     _async_locks = None
 
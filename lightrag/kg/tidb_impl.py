@@ -197,6 +197,8 @@ class ClientManager:
 @dataclass
 class TiDBKVStorage(BaseKVStorage):
     db: TiDB = field(default=None)
+    # ids are inlined into an IN (...) list, keep statements reasonably small
+    get_by_ids_batch_size = 500
 
     def __post_init__(self):
         self._data = {}
@@ -6,7 +6,7 @@ import configparser
 import os
 import time
 import warnings
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from datetime import datetime, timezone
 from functools import partial
 from typing import (
@@ -24,6 +24,13 @@ from typing import (
 from lightrag.constants import (
     DEFAULT_MAX_TOKEN_SUMMARY,
     DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE,
+    DEFAULT_PERSIST_INTERVAL,
+    DEFAULT_PERSIST_MAX_DOCS,
+    DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES,
+    DEFAULT_EMBEDDING_CACHE_TTL,
+    DEFAULT_MIN_ASYNC,
+    DEFAULT_LLM_LATENCY_TARGET,
+    DEFAULT_LLM_TOKENS_PER_MINUTE,
 )
 from lightrag.utils import get_env_value
 
@@ -70,6 +77,8 @@ from .utils import (
     convert_response_to_json,
     lazy_external_import,
     priority_limit_async_func_call,
+    PersistenceScheduler,
+    llm_client_pool,
     get_content_summary,
     clean_text,
     check_storage_env_vars,
@@ -207,12 +216,16 @@ class LightRAG:
             "enabled": False,
             "similarity_threshold": 0.95,
             "use_llm_check": False,
+            "max_entries": DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES,
+            "ttl": DEFAULT_EMBEDDING_CACHE_TTL,
         }
     )
     """Configuration for embedding cache.
     - enabled: If True, enables caching to avoid redundant computations.
     - similarity_threshold: Minimum similarity score to use cached embeddings.
     - use_llm_check: If True, validates cached embeddings using an LLM.
+    - max_entries: Entries per mode and cache type kept in the in-memory similarity index, least recently used are evicted.
+    - ttl: Seconds after which a cached query is no longer matched by similarity, 0 disables expiry.
     """
 
     # LLM Configuration
@@ -230,6 +243,23 @@ class LightRAG:
     llm_model_max_async: int = field(default=int(os.getenv("MAX_ASYNC", 4)))
     """Maximum number of concurrent LLM calls."""
 
+    llm_model_min_async: int = field(
+        default=get_env_value("MIN_ASYNC", DEFAULT_MIN_ASYNC, int)
+    )
+    """Minimum number of concurrent LLM calls the adaptive limit is lowered to on rate limits or timeouts."""
+
+    llm_model_latency_target: float = field(
+        default=get_env_value("LLM_LATENCY_TARGET", DEFAULT_LLM_LATENCY_TARGET, float)
+    )
+    """Seconds above which a successful LLM call lowers the adaptive concurrency limit, 0 disables."""
+
+    llm_model_tokens_per_minute: int = field(
+        default=get_env_value(
+            "LLM_TOKENS_PER_MINUTE", DEFAULT_LLM_TOKENS_PER_MINUTE, int
+        )
+    )
+    """Budget of estimated prompt tokens sent to the LLM per minute, 0 disables."""
+
     llm_model_kwargs: dict[str, Any] = field(default_factory=dict)
     """Additional keyword arguments passed to the LLM model function."""
 
@@ -255,6 +285,16 @@ class LightRAG:
     max_parallel_insert: int = field(default=int(os.getenv("MAX_PARALLEL_INSERT", 2)))
     """Maximum number of parallel insert operations."""
 
+    persist_interval: float = field(
+        default=get_env_value("PERSIST_INTERVAL", DEFAULT_PERSIST_INTERVAL, float)
+    )
+    """Maximum seconds a processed document stays in memory before storages are persisted to disk."""
+
+    persist_max_docs: int = field(
+        default=get_env_value("PERSIST_MAX_DOCS", DEFAULT_PERSIST_MAX_DOCS, int)
+    )
+    """Persist storages once this many processed documents are pending. Set to 1 to persist after every document."""
+
     addon_params: dict[str, Any] = field(
         default_factory=lambda: {
             "language": get_env_value("SUMMARY_LANGUAGE", "English", str)
@@ -440,7 +480,12 @@ class LightRAG:
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
-        self.llm_model_func = priority_limit_async_func_call(self.llm_model_max_async)(
+        self.llm_model_func = priority_limit_async_func_call(
+            self.llm_model_max_async,
+            min_size=self.llm_model_min_async,
+            latency_target=self.llm_model_latency_target,
+            tokens_per_minute=self.llm_model_tokens_per_minute,
+        )(
             partial(
                 self.llm_model_func,  # type: ignore
                 hashing_kv=hashing_kv,
@@ -448,6 +493,16 @@ class LightRAG:
             )
         )
 
+        # Coalesces the per-document persistence of the document pipeline
+        self._persistence = PersistenceScheduler(
+            self._insert_done,
+            os.path.join(
+                self.working_dir, f"{self.namespace_prefix}persist_journal.jsonl"
+            ),
+            self.persist_interval,
+            self.persist_max_docs,
+        )
+
         self._storages_status = StoragesStatus.CREATED
 
         if self.auto_manage_storages_states:
@@ -496,12 +551,43 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            await self._replay_persist_journal()
+
             self._storages_status = StoragesStatus.INITIALIZED
             logger.debug("Initialized Storages")
 
+    async def _replay_persist_journal(self):
+        """Requeue documents whose processing was not persisted before a crash
+
+        Their status may have reached disk while graph, vector or chunk data did not,
+        so they are reset to pending and processed again by the next pipeline run.
+        """
+        doc_ids = self._persistence.journaled_docs()
+        if not doc_ids:
+            return
+
+        updates = {}
+        for doc_id in doc_ids:
+            status_doc = await self.doc_status.get_by_id(doc_id)
+            if status_doc is not None:
+                updates[doc_id] = {
+                    **status_doc,
+                    "status": DocStatus.PENDING,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                }
+        if updates:
+            await self.doc_status.upsert(updates)
+            await self.doc_status.index_done_callback()
+        self._persistence.clear_journal()
+        logger.warning(
+            f"Requeued {len(updates)} document(s) not persisted before the last shutdown"
+        )
+
     async def finalize_storages(self):
         """Asynchronously finalize the storages"""
         if self._storages_status == StoragesStatus.INITIALIZED:
+            await self._persistence.close()
+
             tasks = []
 
             for storage in (
@@ -519,6 +605,9 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            # Close the LLM and embedding clients kept open across calls
+            await llm_client_pool.aclose()
+
             self._storages_status = StoragesStatus.FINALIZED
             logger.debug("Finalized Storages")
 
@@ -904,8 +993,11 @@ class LightRAG:
 
                 # Create a counter to track the number of processed files
                 processed_count = 0
-                # Create a semaphore to limit the number of concurrent file processing
+                # Create a semaphore to limit the number of documents feeding the extraction pool
                 semaphore = asyncio.Semaphore(self.max_parallel_insert)
+                # Chunks of all documents are extracted by one shared pool, so the LLM
+                # stays busy across document boundaries
+                extraction_semaphore = asyncio.Semaphore(self.llm_model_max_async)
 
                 async def process_document(
                     doc_id: str,
@@ -918,6 +1010,8 @@ class LightRAG:
                 ) -> None:
                     """Process single document"""
                     file_extraction_stage_ok = False
+                    extraction_error = None
+                    tasks = []
                     async with semaphore:
                         nonlocal processed_count
                         current_file_number = 0
@@ -983,9 +1077,14 @@ class LightRAG:
                             chunks_vdb_task = asyncio.create_task(
                                 self.chunks_vdb.upsert(chunks)
                             )
+                            chunks_started = asyncio.Event()
                             entity_relation_task = asyncio.create_task(
                                 self._process_entity_relation_graph(
-                                    chunks, pipeline_status, pipeline_status_lock
+                                    chunks,
+                                    pipeline_status,
+                                    pipeline_status_lock,
+                                    extraction_semaphore=extraction_semaphore,
+                                    chunks_started=chunks_started,
                                 )
                             )
                             full_docs_task = asyncio.create_task(
@@ -1003,54 +1102,72 @@ class LightRAG:
                                 full_docs_task,
                                 text_chunks_task,
                             ]
-                            await asyncio.gather(*tasks)
-                            file_extraction_stage_ok = True
+                            extraction_stage = asyncio.gather(*tasks)
+                            # Keep the document slot only until all chunks entered the
+                            # extraction pool, the next document then feeds the pool while
+                            # the last chunks of this one are still being extracted
+                            started_task = asyncio.create_task(chunks_started.wait())
+                            await asyncio.wait(
+                                [extraction_stage, started_task],
+                                return_when=asyncio.FIRST_COMPLETED,
+                            )
+                            started_task.cancel()
 
                         except Exception as e:
-                            # Log error and update pipeline status
-                            logger.error(traceback.format_exc())
-                            error_msg = f"Failed to extract document {current_file_number}/{total_files}: {file_path}"
-                            logger.error(error_msg)
-                            async with pipeline_status_lock:
-                                pipeline_status["latest_message"] = error_msg
-                                pipeline_status["history_messages"].append(
-                                    traceback.format_exc()
-                                )
-                                pipeline_status["history_messages"].append(error_msg)
+                            extraction_error = e
 
-                                # Cancel other tasks as they are no longer meaningful
-                                for task in [
-                                    chunks_vdb_task,
-                                    entity_relation_task,
-                                    full_docs_task,
-                                    text_chunks_task,
-                                ]:
-                                    if not task.done():
-                                        task.cancel()
-
-                            # Persistent llm cache
-                            if self.llm_response_cache:
-                                await self.llm_response_cache.index_done_callback()
-
-                            # Update document status to failed
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.FAILED,
-                                        "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now(
-                                            timezone.utc
-                                        ).isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
+                    if extraction_error is None:
+                        try:
+                            await extraction_stage
+                            file_extraction_stage_ok = True
+                        except Exception as e:
+                            extraction_error = e
+
+                    if extraction_error is not None:
+                        # Log error and update pipeline status
+                        error_traceback = "".join(
+                            traceback.format_exception(
+                                type(extraction_error),
+                                extraction_error,
+                                extraction_error.__traceback__,
                             )
+                        )
+                        logger.error(error_traceback)
+                        error_msg = f"Failed to extract document {current_file_number}/{total_files}: {file_path}"
+                        logger.error(error_msg)
+                        async with pipeline_status_lock:
+                            pipeline_status["latest_message"] = error_msg
+                            pipeline_status["history_messages"].append(error_traceback)
+                            pipeline_status["history_messages"].append(error_msg)
+
+                            # Cancel other tasks as they are no longer meaningful
+                            for task in tasks[1:]:
+                                if not task.done():
+                                    task.cancel()
+
+                        # Persistent llm cache
+                        if self.llm_response_cache:
+                            await self.llm_response_cache.index_done_callback()
+
+                        # Update document status to failed
+                        await self.doc_status.upsert(
+                            {
+                                doc_id: {
+                                    "status": DocStatus.FAILED,
+                                    "error": str(extraction_error),
+                                    "content": status_doc.content,
+                                    "content_summary": status_doc.content_summary,
+                                    "content_length": status_doc.content_length,
+                                    "created_at": status_doc.created_at,
+                                    "updated_at": datetime.now(
+                                        timezone.utc
+                                    ).isoformat(),
+                                    "file_path": file_path,
+                                }
+                            }
+                        )
 
-                    # Semphore released, concurrency controlled by graph_db_lock in merge_nodes_and_edges instead
+                    # Concurrency of the merging stage is controlled by the striped graph locks in merge_nodes_and_edges
 
                     if file_extraction_stage_ok:
                         try:
@@ -1087,8 +1204,8 @@ class LightRAG:
                                 }
                             )
 
-                            # Call _insert_done after processing each file
-                            await self._insert_done()
+                            # Persistence is coalesced across files, see persist_interval
+                            await self._persistence.mark_done(doc_id)
 
                             async with pipeline_status_lock:
                                 log_message = f"Completed processing file {current_file_number}/{total_files}: {file_path}"
@@ -1175,6 +1292,13 @@ class LightRAG:
                 to_process_docs.update(pending_docs)
 
         finally:
+            # Persist everything processed since the last coalesced flush
+            try:
+                await self._persistence.close()
+            except Exception as e:
+                # Unpersisted documents stay journaled and are requeued on restart
+                logger.error(f"Failed to persist processed documents: {e}")
+
             log_message = "Document processing pipeline completed"
             logger.info(log_message)
             # Always reset busy status when done or if an exception occurs (with lock)
@@ -1184,7 +1308,12 @@ class LightRAG:
                 pipeline_status["history_messages"].append(log_message)
 
     async def _process_entity_relation_graph(
-        self, chunk: dict[str, Any], pipeline_status=None, pipeline_status_lock=None
+        self,
+        chunk: dict[str, Any],
+        pipeline_status=None,
+        pipeline_status_lock=None,
+        extraction_semaphore: asyncio.Semaphore | None = None,
+        chunks_started: asyncio.Event | None = None,
     ) -> list:
         try:
             chunk_results = await extract_entities(
@@ -1193,6 +1322,8 @@ class LightRAG:
                 pipeline_status=pipeline_status,
                 pipeline_status_lock=pipeline_status_lock,
                 llm_response_cache=self.llm_response_cache,
+                extraction_semaphore=extraction_semaphore,
+                chunks_started=chunks_started,
             )
             return chunk_results
         except Exception as e:
@@ -1502,6 +1633,85 @@ class LightRAG:
         await self._query_done()
         return response
 
+    def query_batch(
+        self,
+        queries: list[str],
+        param: QueryParam = QueryParam(),
+        system_prompt: str | None = None,
+        return_exceptions: bool = False,
+    ) -> list[str | Iterator[str] | BaseException]:
+        """
+        Perform a sync query for several queries.
+
+        Args:
+            queries (list[str]): The queries to be executed.
+            param (QueryParam): Configuration parameters shared by all queries.
+            prompt (Optional[str]): Custom prompts for fine-tuned control over the system's behavior. Defaults to None, which uses PROMPTS["rag_response"].
+            return_exceptions (bool): Return exceptions in place of failed results instead of raising.
+
+        Returns:
+            list: One result per query, in the order of queries.
+        """
+        loop = always_get_an_event_loop()
+
+        return loop.run_until_complete(
+            self.aquery_batch(queries, param, system_prompt, return_exceptions)
+        )  # type: ignore
+
+    async def aquery_batch(
+        self,
+        queries: list[str],
+        param: QueryParam = QueryParam(),
+        system_prompt: str | None = None,
+        return_exceptions: bool = False,
+    ) -> list[str | AsyncIterator[str] | BaseException]:
+        """
+        Perform a async query for several queries.
+
+        In late-interaction mode the entity, relation and chunk storages are
+        searched with the raw query, so all queries are first encoded and scored
+        together through query_batch. The per-query pipelines, including their LLM calls, then run
+        concurrently and pick up the prefetched search results.
+
+        Args:
+            queries (list[str]): The queries to be executed.
+            param (QueryParam): Configuration parameters shared by all queries.
+                Each query runs with its own copy, as query pipelines modify it.
+            prompt (Optional[str]): Custom prompts for fine-tuned control over the system's behavior. Defaults to None, which uses PROMPTS["rag_response"].
+            return_exceptions (bool): Return exceptions in place of failed results instead of raising.
+
+        Returns:
+            list: One result per query, in the order of queries.
+        """
+        if not queries:
+            return []
+
+        if (
+            param.mode == "late-interaction"
+            and self.vector_storage == "ColbertVectorDBStorage"
+        ):
+            stripped_queries = [query.strip() for query in queries]
+            try:
+                await asyncio.gather(
+                    self.entities_vdb.query_batch(
+                        stripped_queries, param.top_k, param.ids
+                    ),
+                    self.relationships_vdb.query_batch(
+                        stripped_queries, param.top_k, param.ids
+                    ),
+                    self.chunks_vdb.query_batch(
+                        stripped_queries, param.top_k, param.ids
+                    ),
+                )
+            except Exception as e:
+                # Each query falls back to its own search
+                logger.warning(f"Batched late-interaction search failed: {e}")
+
+        return await asyncio.gather(
+            *[self.aquery(query, replace(param), system_prompt) for query in queries],
+            return_exceptions=return_exceptions,
+        )
+
     # TODO: Deprecated, use user_prompt in QueryParam instead
     def query_with_separate_keyword_extraction(
         self, query: str, prompt: str, param: QueryParam = QueryParam()
@@ -22,11 +22,30 @@ from lightrag.utils import (
     wrap_embedding_func_with_attrs,
     locate_json_string_body_from_string,
     safe_unicode_decode,
+    llm_client_pool,
 )
+from lightrag.llm.openai import create_openai_http_client
 
 import numpy as np
 
 
+def get_azure_openai_async_client(deployment: str) -> AsyncAzureOpenAI:
+    """Get a pooled AsyncAzureOpenAI client for the deployment and the environment config"""
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+    return llm_client_pool.get(
+        ("azure_openai", endpoint, deployment, api_key, api_version),
+        lambda: AsyncAzureOpenAI(
+            azure_endpoint=endpoint,
+            azure_deployment=deployment,
+            api_key=api_key,
+            api_version=api_version,
+            http_client=create_openai_http_client(),
+        ),
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -51,12 +70,7 @@ async def azure_openai_complete_if_cache(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = get_azure_openai_async_client(model)
     kwargs.pop("hashing_kv", None)
     messages = []
     if system_prompt:
@@ -133,12 +147,7 @@ async def azure_openai_embed(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = get_azure_openai_async_client(model)
 
     response = await openai_async_client.embeddings.create(
         model=model, input=texts, encoding_format="float"
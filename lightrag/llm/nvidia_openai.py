@@ -13,7 +13,6 @@ if not pm.is_installed("openai"):
     pm.install("openai")
 
 from openai import (
-    AsyncOpenAI,
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
@@ -28,6 +27,7 @@ from tenacity import (
 from lightrag.utils import (
     wrap_embedding_func_with_attrs,
 )
+from lightrag.llm.openai import get_openai_async_client
 
 
 import numpy as np
@@ -54,9 +54,7 @@ async def nvidia_openai_embed(
     if api_key:
         os.environ["OPENAI_API_KEY"] = api_key
 
-    openai_async_client = (
-        AsyncOpenAI() if base_url is None else AsyncOpenAI(base_url=base_url)
-    )
+    openai_async_client = get_openai_async_client(base_url=base_url)
     response = await openai_async_client.embeddings.create(
         model=model,
         input=texts,
@@ -1,7 +1,9 @@
 from ..utils import verbose_debug, VERBOSE_DEBUG
 import sys
 import os
+import json
 import logging
+import importlib.util
 
 if sys.version_info < (3, 9):
     from typing import AsyncIterator
@@ -13,8 +15,10 @@ import pipmaster as pm  # Pipmaster for dynamic library install
 if not pm.is_installed("openai"):
     pm.install("openai")
 
+import httpx
 from openai import (
     AsyncOpenAI,
+    DefaultAsyncHttpxClient,
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
@@ -30,6 +34,13 @@ from lightrag.utils import (
     locate_json_string_body_from_string,
     safe_unicode_decode,
     logger,
+    get_env_value,
+    llm_client_pool,
+)
+from lightrag.constants import (
+    DEFAULT_LLM_HTTP_MAX_CONNECTIONS,
+    DEFAULT_LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_LLM_HTTP_KEEPALIVE_EXPIRY,
 )
 from lightrag.types import GPTKeywordExtractionFormat
 from lightrag.api import __api_version__
@@ -51,6 +62,36 @@ class InvalidResponseError(Exception):
     pass
 
 
+def create_openai_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    """Create the HTTP client used by pooled OpenAI clients.
+
+    The connection limits and keep-alive expiry are sized for many concurrent LLM and
+    embedding requests over a long-lived client, and HTTP/2 is used when the h2
+    package is installed so that concurrent requests share a single connection.
+
+    Args:
+        **kwargs: Additional options for the httpx client, overriding the defaults.
+
+    Returns:
+        An httpx.AsyncClient with OpenAI's default timeouts and redirects.
+    """
+    limits = httpx.Limits(
+        max_connections=get_env_value(
+            "LLM_HTTP_MAX_CONNECTIONS", DEFAULT_LLM_HTTP_MAX_CONNECTIONS, int
+        ),
+        max_keepalive_connections=get_env_value(
+            "LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+            DEFAULT_LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            int,
+        ),
+        keepalive_expiry=get_env_value(
+            "LLM_HTTP_KEEPALIVE_EXPIRY", DEFAULT_LLM_HTTP_KEEPALIVE_EXPIRY, float
+        ),
+    )
+    http2 = importlib.util.find_spec("h2") is not None
+    return DefaultAsyncHttpxClient(**{"limits": limits, "http2": http2, **kwargs})
+
+
 def create_openai_async_client(
     api_key: str | None = None,
     base_url: str | None = None,
@@ -93,9 +134,50 @@ def create_openai_async_client(
             "OPENAI_API_BASE", "https://api.openai.com/v1"
         )
 
+    if "http_client" not in merged_configs:
+        merged_configs["http_client"] = create_openai_http_client()
+
     return AsyncOpenAI(**merged_configs)
 
 
+def get_openai_async_client(
+    api_key: str | None = None,
+    base_url: str | None = None,
+    client_configs: dict[str, Any] = None,
+) -> AsyncOpenAI:
+    """Get a pooled AsyncOpenAI client for the given configuration.
+
+    Calls with the same API key, base URL and client configuration share one client,
+    and so its open connections, until `finalize_storages` closes the pool. The
+    returned client must not be closed by the caller.
+
+    Args:
+        api_key: OpenAI API key. If None, uses the OPENAI_API_KEY environment variable.
+        base_url: Base URL for the OpenAI API. If None, uses the OPENAI_API_BASE
+            environment variable or the default OpenAI API URL.
+        client_configs: Additional configuration options for the AsyncOpenAI client.
+
+    Returns:
+        An AsyncOpenAI client instance shared with other calls on this event loop.
+    """
+    if not api_key:
+        api_key = os.environ["OPENAI_API_KEY"]
+    if base_url is None:
+        base_url = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+    key = (
+        "openai",
+        api_key,
+        base_url,
+        json.dumps(client_configs or {}, sort_keys=True, default=repr),
+    )
+    return llm_client_pool.get(
+        key,
+        lambda: create_openai_async_client(
+            api_key=api_key, base_url=base_url, client_configs=client_configs
+        ),
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -152,8 +234,8 @@ async def openai_complete_if_cache(
     # Extract client configuration options
     client_configs = kwargs.pop("openai_client_configs", {})
 
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
+    # Get the pooled OpenAI client, kept open across calls
+    openai_async_client = get_openai_async_client(
         api_key=api_key, base_url=base_url, client_configs=client_configs
     )
 
@@ -188,21 +270,17 @@ async def openai_complete_if_cache(
             )
     except APIConnectionError as e:
         logger.error(f"OpenAI API Connection Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except RateLimitError as e:
         logger.error(f"OpenAI API Rate Limit Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except APITimeoutError as e:
         logger.error(f"OpenAI API Timeout Error: {e}")
-        await openai_async_client.close()  # Ensure client is closed
         raise
     except Exception as e:
         logger.error(
             f"OpenAI API Call Failed,\nModel: {model},\nParams: {kwargs}, Got: {e}"
         )
-        await openai_async_client.close()  # Ensure client is closed
         raise
 
     if hasattr(response, "__aiter__"):
@@ -247,8 +325,6 @@ async def openai_complete_if_cache(
                         logger.warning(
                             f"Failed to close stream response: {close_error}"
                         )
-                # Ensure client is closed in case of exception
-                await openai_async_client.close()
                 raise
             finally:
                 # Ensure resources are released even if no exception occurs
@@ -265,58 +341,39 @@ async def openai_complete_if_cache(
                             f"Failed to close stream response in finally block: {close_error}"
                         )
 
-                # This prevents resource leaks since the caller doesn't handle closing
-                try:
-                    await openai_async_client.close()
-                    logger.debug(
-                        "Successfully closed OpenAI client for streaming response"
-                    )
-                except Exception as client_close_error:
-                    logger.warning(
-                        f"Failed to close OpenAI client in streaming finally block: {client_close_error}"
-                    )
-
         return inner()
 
     else:
-        try:
-            if (
-                not response
-                or not response.choices
-                or not hasattr(response.choices[0], "message")
-                or not hasattr(response.choices[0].message, "content")
-            ):
-                logger.error("Invalid response from OpenAI API")
-                await openai_async_client.close()  # Ensure client is closed
-                raise InvalidResponseError("Invalid response from OpenAI API")
-
-            content = response.choices[0].message.content
-
-            if not content or content.strip() == "":
-                logger.error("Received empty content from OpenAI API")
-                await openai_async_client.close()  # Ensure client is closed
-                raise InvalidResponseError("Received empty content from OpenAI API")
-
-            if r"\u" in content:
-                content = safe_unicode_decode(content.encode("utf-8"))
-
-            if token_tracker and hasattr(response, "usage"):
-                token_counts = {
-                    "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "completion_tokens": getattr(
-                        response.usage, "completion_tokens", 0
-                    ),
-                    "total_tokens": getattr(response.usage, "total_tokens", 0),
-                }
-                token_tracker.add_usage(token_counts)
-
-            logger.debug(f"Response content len: {len(content)}")
-            verbose_debug(f"Response: {response}")
-
-            return content
-        finally:
-            # Ensure client is closed in all cases for non-streaming responses
-            await openai_async_client.close()
+        if (
+            not response
+            or not response.choices
+            or not hasattr(response.choices[0], "message")
+            or not hasattr(response.choices[0].message, "content")
+        ):
+            logger.error("Invalid response from OpenAI API")
+            raise InvalidResponseError("Invalid response from OpenAI API")
+
+        content = response.choices[0].message.content
+
+        if not content or content.strip() == "":
+            logger.error("Received empty content from OpenAI API")
+            raise InvalidResponseError("Received empty content from OpenAI API")
+
+        if r"\u" in content:
+            content = safe_unicode_decode(content.encode("utf-8"))
+
+        if token_tracker and hasattr(response, "usage"):
+            token_counts = {
+                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
+                "total_tokens": getattr(response.usage, "total_tokens", 0),
+            }
+            token_tracker.add_usage(token_counts)
+
+        logger.debug(f"Response content len: {len(content)}")
+        verbose_debug(f"Response: {response}")
+
+        return content
 
 
 async def openai_complete(
@@ -442,13 +499,12 @@ async def openai_embed(
         RateLimitError: If the OpenAI API rate limit is exceeded.
         APITimeoutError: If the OpenAI API request times out.
     """
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
+    # Get the pooled OpenAI client, kept open across calls
+    openai_async_client = get_openai_async_client(
         api_key=api_key, base_url=base_url, client_configs=client_configs
     )
 
-    async with openai_async_client:
-        response = await openai_async_client.embeddings.create(
-            model=model, input=texts, encoding_format="float"
-        )
-        return np.array([dp.embedding for dp in response.data])
+    response = await openai_async_client.embeddings.create(
+        model=model, input=texts, encoding_format="float"
+    )
+    return np.array([dp.embedding for dp in response.data])
@@ -28,6 +28,31 @@ import aiohttp
 import base64
 import struct
 
+from lightrag.utils import get_env_value, llm_client_pool
+from lightrag.constants import (
+    DEFAULT_LLM_HTTP_MAX_CONNECTIONS,
+    DEFAULT_LLM_HTTP_KEEPALIVE_EXPIRY,
+)
+
+
+def get_siliconcloud_session() -> aiohttp.ClientSession:
+    """Get the pooled aiohttp session, keeping connections open across calls"""
+    return llm_client_pool.get(
+        "siliconcloud",
+        lambda: aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=get_env_value(
+                    "LLM_HTTP_MAX_CONNECTIONS", DEFAULT_LLM_HTTP_MAX_CONNECTIONS, int
+                ),
+                keepalive_timeout=get_env_value(
+                    "LLM_HTTP_KEEPALIVE_EXPIRY",
+                    DEFAULT_LLM_HTTP_KEEPALIVE_EXPIRY,
+                    float,
+                ),
+            )
+        ),
+    )
+
 
 @retry(
     stop=stop_after_attempt(3),
@@ -53,12 +78,12 @@ async def siliconcloud_embedding(
     payload = {"model": model, "input": truncate_texts, "encoding_format": "base64"}
 
     base64_strings = []
-    async with aiohttp.ClientSession() as session:
-        async with session.post(base_url, headers=headers, json=payload) as response:
-            content = await response.json()
-            if "code" in content:
-                raise ValueError(content)
-            base64_strings = [item["embedding"] for item in content["data"]]
+    session = get_siliconcloud_session()
+    async with session.post(base_url, headers=headers, json=payload) as response:
+        content = await response.json()
+        if "code" in content:
+            raise ValueError(content)
+        base64_strings = [item["embedding"] for item in content["data"]]
 
     embeddings = []
     for string in base64_strings:
@@ -355,18 +355,15 @@ async def _get_cached_extraction_results(
     """
     cached_results = {}
 
-    # Get all cached data for "default" mode (entity extraction cache)
-    default_cache = await llm_response_cache.get_by_id("default") or {}
-
-    for cache_key, cache_entry in default_cache.items():
-        if (
-            isinstance(cache_entry, dict)
-            and cache_entry.get("cache_type") == "extract"
-            and cache_entry.get("chunk_id") in chunk_ids
-        ):
-            chunk_id = cache_entry["chunk_id"]
-            extraction_result = cache_entry["return"]
-            cached_results[chunk_id] = extraction_result
+    # Entity extraction cache entries of "default" mode, looked up by chunk id
+    extract_cache = await llm_response_cache.get_cache_by_chunk_ids(
+        chunk_ids, mode="default", cache_type="extract"
+    )
+
+    for cache_key, cache_entry in extract_cache.items():
+        chunk_id = cache_entry["chunk_id"]
+        extraction_result = cache_entry["return"]
+        cached_results[chunk_id] = extraction_result
 
     logger.debug(
         f"Found {len(cached_results)} cached extraction results for {len(chunk_ids)} chunk IDs"
@@ -701,64 +698,31 @@ async def _rebuild_single_relationship(
     )
 
 
-async def _merge_nodes_then_upsert(
-    entity_name: str,
-    nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+async def _handle_merged_description(
+    log_name: str,
+    summary_name: str,
+    description: str,
+    num_new_fragment: int,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    """Get existing nodes from knowledge graph use name,if exists, merge data, else create, then upsert."""
-    already_entity_types = []
-    already_source_ids = []
-    already_description = []
-    already_file_paths = []
-
-    already_node = await knowledge_graph_inst.get_node(entity_name)
-    if already_node:
-        already_entity_types.append(already_node["entity_type"])
-        already_source_ids.extend(
-            split_string_by_multi_markers(already_node["source_id"], [GRAPH_FIELD_SEP])
-        )
-        already_file_paths.extend(
-            split_string_by_multi_markers(already_node["file_path"], [GRAPH_FIELD_SEP])
-        )
-        already_description.append(already_node["description"])
-
-    entity_type = sorted(
-        Counter(
-            [dp["entity_type"] for dp in nodes_data] + already_entity_types
-        ).items(),
-        key=lambda x: x[1],
-        reverse=True,
-    )[0][0]
-    description = GRAPH_FIELD_SEP.join(
-        sorted(set([dp["description"] for dp in nodes_data] + already_description))
-    )
-    source_id = GRAPH_FIELD_SEP.join(
-        set([dp["source_id"] for dp in nodes_data] + already_source_ids)
-    )
-    file_path = GRAPH_FIELD_SEP.join(
-        set([dp["file_path"] for dp in nodes_data] + already_file_paths)
-    )
-
+) -> str:
+    """Summarize a merged description by LLM once it has too many fragments."""
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
     num_fragment = description.count(GRAPH_FIELD_SEP) + 1
-    num_new_fragment = len(set([dp["description"] for dp in nodes_data]))
 
     if num_fragment > 1:
         if num_fragment >= force_llm_summary_on_merge:
-            status_message = f"LLM merge N: {entity_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
+            status_message = f"LLM merge {log_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
             logger.info(status_message)
             if pipeline_status is not None and pipeline_status_lock is not None:
                 async with pipeline_status_lock:
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
             description = await _handle_entity_relation_summary(
-                entity_name,
+                summary_name,
                 description,
                 global_config,
                 pipeline_status,
@@ -766,50 +730,159 @@ async def _merge_nodes_then_upsert(
                 llm_response_cache,
             )
         else:
-            status_message = f"Merge N: {entity_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
+            status_message = f"Merge {log_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
             logger.info(status_message)
             if pipeline_status is not None and pipeline_status_lock is not None:
                 async with pipeline_status_lock:
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    node_data = dict(
-        entity_id=entity_name,
-        entity_type=entity_type,
-        description=description,
-        source_id=source_id,
-        file_path=file_path,
-        created_at=int(time.time()),
+    return description
+
+
+async def _merge_nodes_then_upsert(
+    nodes: dict[str, list[dict]],
+    knowledge_graph_inst: BaseGraphStorage,
+    global_config: dict,
+    pipeline_status: dict = None,
+    pipeline_status_lock=None,
+    llm_response_cache: BaseKVStorage | None = None,
+) -> list[dict]:
+    """Get existing nodes from knowledge graph in one batch, merge data or create new ones, then upsert them in one batch.
+
+    Must be called holding the entity locks of all given entities.
+    """
+    already_nodes = await knowledge_graph_inst.get_nodes_batch(list(nodes))
+
+    async def _merge_node(entity_name: str, nodes_data: list[dict]) -> dict:
+        already_entity_types = []
+        already_source_ids = []
+        already_description = []
+        already_file_paths = []
+
+        already_node = already_nodes.get(entity_name)
+        if already_node:
+            already_entity_types.append(already_node["entity_type"])
+            already_source_ids.extend(
+                split_string_by_multi_markers(
+                    already_node["source_id"], [GRAPH_FIELD_SEP]
+                )
+            )
+            already_file_paths.extend(
+                split_string_by_multi_markers(
+                    already_node["file_path"], [GRAPH_FIELD_SEP]
+                )
+            )
+            already_description.append(already_node["description"])
+
+        entity_type = sorted(
+            Counter(
+                [dp["entity_type"] for dp in nodes_data] + already_entity_types
+            ).items(),
+            key=lambda x: x[1],
+            reverse=True,
+        )[0][0]
+        description = GRAPH_FIELD_SEP.join(
+            sorted(set([dp["description"] for dp in nodes_data] + already_description))
+        )
+        source_id = GRAPH_FIELD_SEP.join(
+            set([dp["source_id"] for dp in nodes_data] + already_source_ids)
+        )
+        file_path = GRAPH_FIELD_SEP.join(
+            set([dp["file_path"] for dp in nodes_data] + already_file_paths)
+        )
+
+        num_new_fragment = len(set([dp["description"] for dp in nodes_data]))
+        description = await _handle_merged_description(
+            f"N: {entity_name}",
+            entity_name,
+            description,
+            num_new_fragment,
+            global_config,
+            pipeline_status,
+            pipeline_status_lock,
+            llm_response_cache,
+        )
+
+        return dict(
+            entity_id=entity_name,
+            entity_type=entity_type,
+            description=description,
+            source_id=source_id,
+            file_path=file_path,
+            created_at=int(time.time()),
+        )
+
+    # LLM summaries of the entities run concurrently
+    merged_nodes = await asyncio.gather(
+        *[
+            _merge_node(entity_name, nodes_data)
+            for entity_name, nodes_data in nodes.items()
+        ]
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
+    await knowledge_graph_inst.upsert_nodes_batch(
+        {node_data["entity_id"]: node_data for node_data in merged_nodes}
     )
-    node_data["entity_name"] = entity_name
-    return node_data
+    return [
+        dict(node_data, entity_name=node_data["entity_id"])
+        for node_data in merged_nodes
+    ]
+
+
+async def _get_missing_edge_endpoints(
+    edges: dict[tuple[str, str], list[dict]],
+    knowledge_graph_inst: BaseGraphStorage,
+) -> list[str]:
+    """Get the endpoint entities of the given relations that are not in the graph yet"""
+    endpoints = {
+        node_id
+        for src_id, tgt_id in edges
+        if src_id != tgt_id
+        for node_id in (src_id, tgt_id)
+    }
+    if not endpoints:
+        return []
+    existing_nodes = await knowledge_graph_inst.get_nodes_batch(list(endpoints))
+    return sorted(endpoints - existing_nodes.keys())
 
 
 async def _merge_edges_then_upsert(
-    src_id: str,
-    tgt_id: str,
-    edges_data: list[dict],
+    edges: dict[tuple[str, str], list[dict]],
+    missing_entities: list[str],
     knowledge_graph_inst: BaseGraphStorage,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    if src_id == tgt_id:
-        return None
+) -> list[dict]:
+    """Get existing edges from knowledge graph in one batch, merge data or create new ones, then upsert them in one batch.
 
-    already_weights = []
-    already_source_ids = []
-    already_description = []
-    already_keywords = []
-    already_file_paths = []
+    Must be called holding the relation locks of all given relations and the entity
+    locks of missing_entities, the endpoint entities found missing under these locks,
+    which are inserted along with the relations.
+    """
+    # Self loops are not stored
+    edges = {
+        (src_id, tgt_id): edges_data
+        for (src_id, tgt_id), edges_data in edges.items()
+        if src_id != tgt_id
+    }
+    if not edges:
+        return []
+
+    already_edges = await knowledge_graph_inst.get_edges_batch(
+        [{"src": src_id, "tgt": tgt_id} for src_id, tgt_id in edges]
+    )
+
+    merged_edges = {}
+    for (src_id, tgt_id), edges_data in edges.items():
+        already_weights = []
+        already_source_ids = []
+        already_description = []
+        already_keywords = []
+        already_file_paths = []
 
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
+        already_edge = already_edges.get((src_id, tgt_id))
         # Handle the case where get_edge returns None or missing fields
         if already_edge:
             # Get weight with default 0.0 if missing
@@ -843,124 +916,115 @@ async def _merge_edges_then_upsert(
                     )
                 )
 
-    # Process edges_data with None checks
-    weight = sum([dp["weight"] for dp in edges_data] + already_weights)
-    description = GRAPH_FIELD_SEP.join(
-        sorted(
-            set(
-                [dp["description"] for dp in edges_data if dp.get("description")]
-                + already_description
+        # Process edges_data with None checks
+        weight = sum([dp["weight"] for dp in edges_data] + already_weights)
+        description = GRAPH_FIELD_SEP.join(
+            sorted(
+                set(
+                    [dp["description"] for dp in edges_data if dp.get("description")]
+                    + already_description
+                )
             )
         )
-    )
-
-    # Split all existing and new keywords into individual terms, then combine and deduplicate
-    all_keywords = set()
-    # Process already_keywords (which are comma-separated)
-    for keyword_str in already_keywords:
-        if keyword_str:  # Skip empty strings
-            all_keywords.update(k.strip() for k in keyword_str.split(",") if k.strip())
-    # Process new keywords from edges_data
-    for edge in edges_data:
-        if edge.get("keywords"):
-            all_keywords.update(
-                k.strip() for k in edge["keywords"].split(",") if k.strip()
-            )
-    # Join all unique keywords with commas
-    keywords = ",".join(sorted(all_keywords))
-
-    source_id = GRAPH_FIELD_SEP.join(
-        set(
-            [dp["source_id"] for dp in edges_data if dp.get("source_id")]
-            + already_source_ids
-        )
-    )
-    file_path = GRAPH_FIELD_SEP.join(
-        set(
-            [dp["file_path"] for dp in edges_data if dp.get("file_path")]
-            + already_file_paths
-        )
-    )
-
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            # # Discard this edge if the node does not exist
-            # if need_insert_id == src_id:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Source node missing"
-            #     )
-            # else:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Target node missing"
-            #     )
-            # return None
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
-            )
-
-    force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
-    num_fragment = description.count(GRAPH_FIELD_SEP) + 1
-    num_new_fragment = len(
-        set([dp["description"] for dp in edges_data if dp.get("description")])
-    )
+        # Split all existing and new keywords into individual terms, then combine and deduplicate
+        all_keywords = set()
+        # Process already_keywords (which are comma-separated)
+        for keyword_str in already_keywords:
+            if keyword_str:  # Skip empty strings
+                all_keywords.update(
+                    k.strip() for k in keyword_str.split(",") if k.strip()
+                )
+        # Process new keywords from edges_data
+        for edge in edges_data:
+            if edge.get("keywords"):
+                all_keywords.update(
+                    k.strip() for k in edge["keywords"].split(",") if k.strip()
+                )
+        # Join all unique keywords with commas
+        keywords = ",".join(sorted(all_keywords))
 
-    if num_fragment > 1:
-        if num_fragment >= force_llm_summary_on_merge:
-            status_message = f"LLM merge E: {src_id} - {tgt_id} | {num_new_fragment}+{num_fragment-num_new_fragment}"
-            logger.info(status_message)
-            if pipeline_status is not None and pipeline_status_lock is not None:
-                async with pipeline_status_lock:
-                    pipeline_status["latest_message"] = status_message
-                    pipeline_status["history_messages"].append(status_message)
-            description = await _handle_entity_relation_summary(
-                f"({src_id}, {tgt_id})",
-                description,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        source_id = GRAPH_FIELD_SEP.join(
+            set(
+                [dp["source_id"] for dp in edges_data if dp.get("source_id")]
+                + already_source_ids
             )
-        else:
-            status_message = f"Merge E: {src_id} - {tgt_id} | {num_new_fragment}+{num_fragment-num_new_fragment}"
-            logger.info(status_message)
-            if pipeline_status is not None and pipeline_status_lock is not None:
-                async with pipeline_status_lock:
-                    pipeline_status["latest_message"] = status_message
-                    pipeline_status["history_messages"].append(status_message)
+        )
+        file_path = GRAPH_FIELD_SEP.join(
+            set(
+                [dp["file_path"] for dp in edges_data if dp.get("file_path")]
+                + already_file_paths
+            )
+        )
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
+        merged_edges[(src_id, tgt_id)] = dict(
             weight=weight,
             description=description,
             keywords=keywords,
             source_id=source_id,
             file_path=file_path,
-            created_at=int(time.time()),
-        ),
-    )
+        )
 
-    edge_data = dict(
-        src_id=src_id,
-        tgt_id=tgt_id,
-        description=description,
-        keywords=keywords,
-        source_id=source_id,
-        file_path=file_path,
-        created_at=int(time.time()),
-    )
+    # Insert missing endpoint entities, carrying the data of their first relation
+    if missing_entities:
+        need_insert_nodes = {}
+        for (src_id, tgt_id), edge_data in merged_edges.items():
+            for need_insert_id in [src_id, tgt_id]:
+                need_insert_nodes.setdefault(need_insert_id, edge_data)
+        # # Discard the edges of missing nodes instead
+        # logger.warning(f"Discard edge: {src_id} - {tgt_id} | Node missing")
+        await knowledge_graph_inst.upsert_nodes_batch(
+            {
+                need_insert_id: {
+                    "entity_id": need_insert_id,
+                    "source_id": need_insert_nodes[need_insert_id]["source_id"],
+                    "description": need_insert_nodes[need_insert_id]["description"],
+                    "entity_type": "UNKNOWN",
+                    "file_path": need_insert_nodes[need_insert_id]["file_path"],
+                    "created_at": int(time.time()),
+                }
+                for need_insert_id in missing_entities
+            }
+        )
 
-    return edge_data
+    async def _summarize_edge(src_id: str, tgt_id: str, edges_data: list[dict]):
+        num_new_fragment = len(
+            set([dp["description"] for dp in edges_data if dp.get("description")])
+        )
+        edge_data = merged_edges[(src_id, tgt_id)]
+        edge_data["description"] = await _handle_merged_description(
+            f"E: {src_id} - {tgt_id}",
+            f"({src_id}, {tgt_id})",
+            edge_data["description"],
+            num_new_fragment,
+            global_config,
+            pipeline_status,
+            pipeline_status_lock,
+            llm_response_cache,
+        )
+        edge_data["created_at"] = int(time.time())
+
+    # LLM summaries of the relations run concurrently
+    await asyncio.gather(
+        *[
+            _summarize_edge(src_id, tgt_id, edges_data)
+            for (src_id, tgt_id), edges_data in edges.items()
+        ]
+    )
+    await knowledge_graph_inst.upsert_edges_batch(merged_edges)
+
+    return [
+        dict(
+            src_id=src_id,
+            tgt_id=tgt_id,
+            description=edge_data["description"],
+            keywords=edge_data["keywords"],
+            source_id=edge_data["source_id"],
+            file_path=edge_data["file_path"],
+            created_at=edge_data["created_at"],
+        )
+        for (src_id, tgt_id), edge_data in merged_edges.items()
+    ]
 
 
 async def merge_nodes_and_edges(
@@ -989,7 +1053,12 @@ async def merge_nodes_and_edges(
         llm_response_cache: LLM response cache
     """
     # Get lock manager from shared storage
-    from .kg.shared_storage import get_graph_db_lock
+    from .kg.shared_storage import (
+        get_graph_db_edge_lock,
+        get_graph_db_lock,
+        get_graph_db_lock_stripe,
+        get_graph_db_node_lock,
+    )
 
     # Collect all nodes and edges from all chunks
     all_nodes = defaultdict(list)
@@ -1005,54 +1074,82 @@ async def merge_nodes_and_edges(
             sorted_edge_key = tuple(sorted(edge_key))
             all_edges[sorted_edge_key].extend(edges)
 
-    # Centralized processing of all nodes and edges
-    entities_data = []
-    relationships_data = []
-
     # Merge nodes and edges
-    # Use graph database lock to ensure atomic merges and updates
-    graph_db_lock = get_graph_db_lock(enable_logging=False)
-    async with graph_db_lock:
-        async with pipeline_status_lock:
-            log_message = (
-                f"Merging stage {current_file_number}/{total_files}: {file_path}"
-            )
-            logger.info(log_message)
-            pipeline_status["latest_message"] = log_message
-            pipeline_status["history_messages"].append(log_message)
-
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
-            )
-            entities_data.append(entity_data)
-
-        # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
+    # Entities and relations are grouped by the striped lock guarding them. Each group is
+    # read, merged and written in batches under its lock, so independent groups of this
+    # and concurrently processed documents, and their LLM summaries, run in parallel
+    async with pipeline_status_lock:
+        log_message = f"Merging stage {current_file_number}/{total_files}: {file_path}"
+        logger.info(log_message)
+        pipeline_status["latest_message"] = log_message
+        pipeline_status["history_messages"].append(log_message)
+
+    node_groups = defaultdict(dict)
+    for entity_name, entities in all_nodes.items():
+        node_groups[get_graph_db_lock_stripe(entity_name)][entity_name] = entities
+    edge_groups = defaultdict(dict)
+    for edge_key, edges in all_edges.items():
+        edge_groups[get_graph_db_lock_stripe(edge_key)][edge_key] = edges
+
+    async def _merge_node_group(nodes):
+        async with get_graph_db_node_lock(*nodes, enable_logging=False):
+            return await _merge_nodes_then_upsert(
+                nodes,
                 knowledge_graph_inst,
                 global_config,
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
             )
-            if edge_data is not None:
-                relationships_data.append(edge_data)
 
-        # Update total counts
-        total_entities_count = len(entities_data)
-        total_relations_count = len(relationships_data)
+    async def _merge_edge_group(edges):
+        # Missing endpoint entities are inserted under their entity locks, which must be
+        # taken along with the relation locks: when endpoints turn out to be missing, the
+        # relation locks are released and acquired again together with their locks
+        locked_entities = []
+        while True:
+            async with get_graph_db_edge_lock(
+                *edges, entity_names=locked_entities, enable_logging=False
+            ):
+                missing_entities = await _get_missing_edge_endpoints(
+                    edges, knowledge_graph_inst
+                )
+                if set(missing_entities) <= set(locked_entities):
+                    return await _merge_edges_then_upsert(
+                        edges,
+                        missing_entities,
+                        knowledge_graph_inst,
+                        global_config,
+                        pipeline_status,
+                        pipeline_status_lock,
+                        llm_response_cache,
+                    )
+            locked_entities = sorted(set(locked_entities) | set(missing_entities))
 
+    # Process and update all entities, then all relationships
+    entities_data = [
+        entity_data
+        for group_data in await asyncio.gather(
+            *[_merge_node_group(nodes) for nodes in node_groups.values()]
+        )
+        for entity_data in group_data
+    ]
+    relationships_data = [
+        edge_data
+        for group_data in await asyncio.gather(
+            *[_merge_edge_group(edges) for edges in edge_groups.values()]
+        )
+        for edge_data in group_data
+    ]
+
+    # Update total counts
+    total_entities_count = len(entities_data)
+    total_relations_count = len(relationships_data)
+
+    # Vector databases are refreshed from the graph under the global lock, another document
+    # may have merged the same entities since, the latest merged state must win. Merges
+    # only need to be excluded from the refresh of other documents, not from this one
+    async with get_graph_db_lock(enable_logging=False, include_key_locks=False):
         log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
         logger.info(log_message)
         if pipeline_status is not None:
@@ -1062,6 +1159,11 @@ async def merge_nodes_and_edges(
 
         # Update vector databases with all collected data
         if entity_vdb is not None and entities_data:
+            current_nodes = await knowledge_graph_inst.get_nodes_batch(
+                [dp["entity_name"] for dp in entities_data]
+            )
+            for dp in entities_data:
+                dp.update(current_nodes.get(dp["entity_name"]) or {})
             data_for_vdb = {
                 compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
                     "entity_name": dp["entity_name"],
@@ -1082,6 +1184,21 @@ async def merge_nodes_and_edges(
                 pipeline_status["history_messages"].append(log_message)
 
         if relationships_vdb is not None and relationships_data:
+            current_edges = await knowledge_graph_inst.get_edges_batch(
+                [
+                    {"src": dp["src_id"], "tgt": dp["tgt_id"]}
+                    for dp in relationships_data
+                ]
+            )
+            for dp in relationships_data:
+                current_edge = current_edges.get((dp["src_id"], dp["tgt_id"])) or {}
+                dp.update(
+                    {
+                        k: current_edge[k]
+                        for k in ("description", "keywords", "source_id", "file_path")
+                        if current_edge.get(k) is not None
+                    }
+                )
             data_for_vdb = {
                 compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
                     "src_id": dp["src_id"],
@@ -1102,7 +1219,17 @@ async def extract_entities(
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
+    extraction_semaphore: asyncio.Semaphore | None = None,
+    chunks_started: asyncio.Event | None = None,
 ) -> list:
+    """Extract entities and relationships from chunks
+
+    Args:
+        extraction_semaphore: Limits concurrently extracted chunks. The insert pipeline
+            shares one across documents so chunks of all documents feed a single
+            extraction pool; a new one of llm_model_max_async is used when omitted
+        chunks_started: Set once every chunk of this call has entered the pool
+    """
     use_llm_func: callable = global_config["llm_model_func"]
     entity_extract_max_gleaning = global_config["entity_extract_max_gleaning"]
 
@@ -1285,11 +1412,17 @@ async def extract_entities(
         return maybe_nodes, maybe_edges
 
     # Get max async tasks limit from global_config
-    llm_model_max_async = global_config.get("llm_model_max_async", 4)
-    semaphore = asyncio.Semaphore(llm_model_max_async)
+    if extraction_semaphore is None:
+        llm_model_max_async = global_config.get("llm_model_max_async", 4)
+        extraction_semaphore = asyncio.Semaphore(llm_model_max_async)
+    started_chunks = 0
 
     async def _process_with_semaphore(chunk):
-        async with semaphore:
+        nonlocal started_chunks
+        async with extraction_semaphore:
+            started_chunks += 1
+            if chunks_started is not None and started_chunks == total_chunks:
+                chunks_started.set()
             return await _process_single_content(chunk)
 
     tasks = []
@@ -1381,16 +1514,27 @@ async def kg_query(
         hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
 
     # Build context
-    context = await _build_query_context(
-        ll_keywords_str,
-        hl_keywords_str,
-        knowledge_graph_inst,
-        entities_vdb,
-        relationships_vdb,
-        text_chunks_db,
-        query_param,
-        chunks_vdb,
-    )
+    if query_param.mode == "late-interaction":
+        context = await _build_late_interaction_context(
+            query,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
+    else:
+        context = await _build_query_context(
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
 
     if query_param.only_need_context:
         return context
@@ -1676,6 +1820,28 @@ async def _get_vector_context(
         logger.error(f"Error in _get_vector_context: {e}")
         return [], [], []
 
+
+async def _run_retrieval_branch(
+    name: str,
+    branch: Any,
+    timeout: float | None,
+    default: Any,
+) -> Any:
+    """
+    Await one retrieval branch of a query, degrading to default on timeout or error.
+
+    Lets concurrent branches return partial context: a slow or failing branch is
+    logged and dropped instead of failing the whole query.
+    """
+    try:
+        return await asyncio.wait_for(branch, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{name} retrieval timed out after {timeout}s, skipping it")
+    except Exception as e:
+        logger.error(f"{name} retrieval failed, skipping it: {e}")
+    return default
+
+
 async def _build_query_context(
     ll_keywords: str,
     hl_keywords: str,
@@ -1706,20 +1872,60 @@ async def _build_query_context(
             query_param,
         )
     else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
+        # Local, global and vector retrieval are independent, run them concurrently
+        timeout = query_param.branch_timeout or None
+        # Shared by both branches so a chunk sourced by entities and relations is fetched once
+        chunk_cache: dict[str, asyncio.Future] = {}
+        branches = [
+            _run_retrieval_branch(
+                "Local",
+                _get_node_data(
+                    ll_keywords,
+                    knowledge_graph_inst,
+                    entities_vdb,
+                    text_chunks_db,
+                    query_param,
+                    chunk_cache,
+                ),
+                timeout,
+                default=([], [], []),
+            ),
+            _run_retrieval_branch(
+                "Global",
+                _get_edge_data(
+                    hl_keywords,
+                    knowledge_graph_inst,
+                    relationships_vdb,
+                    text_chunks_db,
+                    query_param,
+                    chunk_cache,
+                ),
+                timeout,
+                default=([], [], []),
+            ),
+        ]
+
+        # Only get vector data if in mix mode
+        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
+            # Get tokenizer from text_chunks_db
+            tokenizer = text_chunks_db.global_config.get("tokenizer")
+
+            # Get vector context in triple format
+            branches.append(
+                _run_retrieval_branch(
+                    "Vector",
+                    _get_vector_context(
+                        query_param.original_query,  # We need to pass the original query
+                        chunks_vdb,
+                        query_param,
+                        tokenizer,
+                    ),
+                    timeout,
+                    default=([], [], []),
+                )
+            )
+
+        ll_data, hl_data, *vector_results = await asyncio.gather(*branches)
 
         (
             ll_entities_context,
@@ -1740,26 +1946,14 @@ async def _build_query_context(
             [],
         )
 
-        # Only get vector data if in mix mode
-        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
-            # Get tokenizer from text_chunks_db
-            tokenizer = text_chunks_db.global_config.get("tokenizer")
-
-            # Get vector context in triple format
-            vector_data = await _get_vector_context(
-                query_param.original_query,  # We need to pass the original query
-                chunks_vdb,
-                query_param,
-                tokenizer,
-            )
-
-            # If vector_data is not None, unpack it
-            if vector_data is not None:
-                (
-                    vector_entities_context,
-                    vector_relations_context,
-                    vector_text_units_context,
-                ) = vector_data
+        # If vector_data is not None, unpack it
+        vector_data = vector_results[0] if vector_results else None
+        if vector_data is not None:
+            (
+                vector_entities_context,
+                vector_relations_context,
+                vector_text_units_context,
+            ) = vector_data
 
         # Combine and deduplicate the entities, relationships, and sources
         entities_context = process_combine_contexts(
@@ -1775,6 +1969,16 @@ async def _build_query_context(
     if not entities_context and not relations_context:
         return None
 
+    return _format_query_context(
+        entities_context, relations_context, text_units_context
+    )
+
+
+def _format_query_context(
+    entities_context: list[dict],
+    relations_context: list[dict],
+    text_units_context: list[dict],
+) -> str:
     # 转换为 JSON 字符串
     entities_str = json.dumps(entities_context, ensure_ascii=False)
     relations_str = json.dumps(relations_context, ensure_ascii=False)
@@ -1801,12 +2005,213 @@ async def _build_query_context(
 """
     return result
 
+
+async def _build_late_interaction_context(
+    query: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
+    chunks_vdb: BaseVectorStorage = None,
+):
+    """
+    Build the query context for late-interaction mode from a single scoring pass.
+
+    The raw query is scored with ColBERT MaxSim against the entity, relation and
+    chunk indexes at once. The hits of the three indexes are merged into one list
+    ranked by score, which decides the order of every section of the context:
+    an entity is ranked by its own hit or by the best relation hit it is an
+    endpoint of. No keyword extraction and no sequential local/global retrieval
+    round-trips are needed.
+    """
+    logger.info(f"Process {os.getpid()} building late-interaction context...")
+
+    timeout = query_param.branch_timeout or None
+    searches = [
+        _run_retrieval_branch(
+            "Entity",
+            entities_vdb.query(query, top_k=query_param.top_k, ids=query_param.ids),
+            timeout,
+            default=[],
+        ),
+        _run_retrieval_branch(
+            "Relation",
+            relationships_vdb.query(
+                query, top_k=query_param.top_k, ids=query_param.ids
+            ),
+            timeout,
+            default=[],
+        ),
+    ]
+    if chunks_vdb is not None:
+        searches.append(
+            _run_retrieval_branch(
+                "Chunk",
+                chunks_vdb.query(query, top_k=query_param.top_k, ids=query_param.ids),
+                timeout,
+                default=[],
+            )
+        )
+    entity_hits, relation_hits, *chunk_results = await asyncio.gather(*searches)
+    chunk_hits = chunk_results[0] if chunk_results else []
+
+    ranked_hits = sorted(
+        [("entity", hit) for hit in entity_hits]
+        + [("relation", hit) for hit in relation_hits]
+        + [("chunk", hit) for hit in chunk_hits],
+        key=lambda x: x[1].get("distance", 0.0),
+        reverse=True,
+    )
+    if not ranked_hits:
+        return None
+
+    # Walk the hits in score order to collect entities, relations and chunks
+    entity_scores: dict[str, float] = {}
+    entity_created_at: dict[str, Any] = {}
+    edge_hits: dict[tuple[str, str], dict] = {}
+    chunk_datas = []
+    for kind, hit in ranked_hits:
+        score = hit.get("distance", 0.0)
+        if kind == "entity":
+            entity_scores.setdefault(hit["entity_name"], score)
+            entity_created_at.setdefault(hit["entity_name"], hit.get("created_at"))
+        elif kind == "relation":
+            pair = (hit["src_id"], hit["tgt_id"])
+            if pair not in edge_hits:
+                edge_hits[pair] = {**hit, "score": score}
+            entity_scores.setdefault(hit["src_id"], score)
+            entity_scores.setdefault(hit["tgt_id"], score)
+        elif "content" in hit:
+            chunk_datas.append(
+                {
+                    "content": hit["content"],
+                    "file_path": hit.get("file_path", "unknown_source"),
+                }
+            )
+
+    entity_names = list(entity_scores)
+    edge_pairs = list(edge_hits)
+    nodes_dict, degrees_dict, edge_data_dict, edge_degrees_dict = await asyncio.gather(
+        knowledge_graph_inst.get_nodes_batch(entity_names),
+        knowledge_graph_inst.node_degrees_batch(entity_names),
+        knowledge_graph_inst.get_edges_batch(
+            [{"src": src, "tgt": tgt} for src, tgt in edge_pairs]
+        ),
+        knowledge_graph_inst.edge_degrees_batch(edge_pairs),
+    )
+
+    node_datas = [
+        {
+            **nodes_dict[name],
+            "entity_name": name,
+            "rank": degrees_dict.get(name, 0),
+            "created_at": entity_created_at.get(
+                name, nodes_dict[name].get("created_at")
+            ),
+        }
+        for name in entity_names
+        if nodes_dict.get(name) is not None
+    ]
+    if len(node_datas) < len(entity_names):
+        logger.warning("Some nodes are missing, maybe the storage is damaged")
+
+    edge_datas = []
+    for pair in edge_pairs:
+        edge_props = edge_data_dict.get(pair)
+        if edge_props is None:
+            continue
+        edge_datas.append(
+            {
+                "src_id": pair[0],
+                "tgt_id": pair[1],
+                "weight": 0.0,
+                **edge_props,
+                "rank": edge_degrees_dict.get(pair, 0),
+                "created_at": edge_hits[pair].get("created_at"),
+            }
+        )
+
+    tokenizer: Tokenizer = text_chunks_db.global_config.get("tokenizer")
+    node_datas = truncate_list_by_token_size(
+        node_datas,
+        key=lambda x: x["description"] if x.get("description") is not None else "",
+        max_token_size=query_param.max_token_for_local_context,
+        tokenizer=tokenizer,
+    )
+    edge_datas = truncate_list_by_token_size(
+        edge_datas,
+        key=lambda x: x["description"] if x.get("description") is not None else "",
+        max_token_size=query_param.max_token_for_global_context,
+        tokenizer=tokenizer,
+    )
+    chunk_datas = truncate_list_by_token_size(
+        chunk_datas,
+        key=lambda x: x["content"],
+        max_token_size=query_param.max_token_for_text_unit,
+        tokenizer=tokenizer,
+    )
+    logger.info(
+        f"Late-interaction query uses {len(node_datas)} entites, {len(edge_datas)} relations, {len(chunk_datas)} chunks"
+    )
+
+    entities_context = []
+    for i, n in enumerate(node_datas):
+        created_at = n.get("created_at", "UNKNOWN")
+        if isinstance(created_at, (int, float)):
+            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
+        entities_context.append(
+            {
+                "id": i + 1,
+                "entity": n["entity_name"],
+                "type": n.get("entity_type", "UNKNOWN"),
+                "description": n.get("description", "UNKNOWN"),
+                "rank": n["rank"],
+                "created_at": created_at,
+                "file_path": n.get("file_path", "unknown_source"),
+            }
+        )
+
+    relations_context = []
+    for i, e in enumerate(edge_datas):
+        created_at = e.get("created_at", "UNKNOWN")
+        if isinstance(created_at, (int, float)):
+            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
+        relations_context.append(
+            {
+                "id": i + 1,
+                "entity1": e["src_id"],
+                "entity2": e["tgt_id"],
+                "description": e.get("description", "UNKNOWN"),
+                "keywords": e.get("keywords", ""),
+                "weight": e["weight"],
+                "rank": e["rank"],
+                "created_at": created_at,
+                "file_path": e.get("file_path", "unknown_source"),
+            }
+        )
+
+    text_units_context = [
+        {"id": i + 1, "content": c["content"], "file_path": c["file_path"]}
+        for i, c in enumerate(chunk_datas)
+    ]
+
+    # not necessary to use LLM to generate a response
+    if not entities_context and not relations_context and not text_units_context:
+        return None
+
+    return _format_query_context(
+        entities_context, relations_context, text_units_context
+    )
+
+
 async def _get_node_data(
     query: str,
     knowledge_graph_inst: BaseGraphStorage,
     entities_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     # get similar entities
     logger.info(
@@ -1852,6 +2257,7 @@ async def _get_node_data(
         query_param,
         text_chunks_db,
         knowledge_graph_inst,
+        chunk_cache,
     )
     use_relations = await _find_most_related_edges_from_entities(
         node_datas,
@@ -1933,11 +2339,50 @@ async def _get_node_data(
     return entities_context, relations_context, text_units_context
 
 
+async def _get_text_chunks(
+    text_chunks_db: BaseKVStorage,
+    chunk_ids: list[str],
+    chunk_cache: dict[str, asyncio.Future] | None = None,
+) -> dict[str, dict | None]:
+    """
+    Fetch text chunks with one batched get_by_ids_map call, through a query-scoped cache.
+
+    The cache maps chunk ids to futures, so a chunk already fetched (or still being
+    fetched) by a concurrent retrieval branch of the same query is awaited instead
+    of being loaded again.
+    """
+    if chunk_cache is None:
+        chunk_cache = {}
+    loop = asyncio.get_running_loop()
+    chunk_ids = list(dict.fromkeys(chunk_ids))
+    missing = []
+    for c_id in chunk_ids:
+        if c_id not in chunk_cache:
+            chunk_cache[c_id] = loop.create_future()
+            missing.append(c_id)
+
+    if missing:
+        try:
+            found = await text_chunks_db.get_by_ids_map(missing)
+        except BaseException:
+            # Release waiters of the other branch and let a later call retry
+            for c_id in missing:
+                future = chunk_cache.pop(c_id)
+                if not future.done():
+                    future.set_result(None)
+            raise
+        for c_id in missing:
+            chunk_cache[c_id].set_result(found.get(c_id))
+
+    return {c_id: await chunk_cache[c_id] for c_id in chunk_ids}
+
+
 async def _find_most_related_text_unit_from_entities(
     node_datas: list[dict],
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
@@ -1982,20 +2427,14 @@ async def _find_most_related_text_unit_from_entities(
                 all_text_units_lookup[c_id] = index
                 tasks.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(
-            *[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks]
-        )
-        results.extend(batch_results)
+    # Fetch all chunks at once, the storage splits the ids by its own batch size
+    chunks = await _get_text_chunks(
+        text_chunks_db, [c_id for c_id, _, _ in tasks], chunk_cache
+    )
 
-    for (c_id, index, this_edges), data in zip(tasks, results):
+    for c_id, index, this_edges in tasks:
         all_text_units_lookup[c_id] = {
-            "data": data,
+            "data": chunks.get(c_id),
             "order": index,
             "relation_counts": 0,
         }
@@ -2110,6 +2549,7 @@ async def _get_edge_data(
     relationships_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     logger.info(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
@@ -2177,6 +2617,7 @@ async def _get_edge_data(
             query_param,
             text_chunks_db,
             knowledge_graph_inst,
+            chunk_cache,
         ),
     )
     logger.info(
@@ -2295,30 +2736,29 @@ async def _find_related_text_unit_from_relationships(
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_cache: dict[str, asyncio.Future] | None = None,
 ):
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
         for dp in edge_datas
         if dp["source_id"] is not None
     ]
-    all_text_units_lookup = {}
-
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
-            # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
-                all_text_units_lookup[c_id] = {
-                    "data": chunk_data,
-                    "order": index,
-                }
-
-    tasks = []
+    chunk_orders = {}
     for index, unit_list in enumerate(text_units):
         for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
+            chunk_orders.setdefault(c_id, index)
+
+    chunks = await _get_text_chunks(text_chunks_db, list(chunk_orders), chunk_cache)
 
-    await asyncio.gather(*tasks)
+    all_text_units_lookup = {}
+    for c_id, index in chunk_orders.items():
+        chunk_data = chunks.get(c_id)
+        # Only store valid data
+        if chunk_data is not None and "content" in chunk_data:
+            all_text_units_lookup[c_id] = {
+                "data": chunk_data,
+                "order": index,
+            }
 
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
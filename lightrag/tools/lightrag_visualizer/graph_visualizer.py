@@ -512,7 +512,7 @@ class GraphViewer:
         self.sphere_index_buffer = None
 
     def load_file(self, filepath: str):
-        """Load a GraphML file with error handling"""
+        """Load a GraphML file or a LightRAG graph snapshot with error handling"""
         try:
             # Clear existing data
             self.id_node_map.clear()
@@ -522,7 +522,12 @@ class GraphViewer:
             self.setup_buffers()
 
             # Load new graph
-            self.graph = nx.read_graphml(filepath)
+            if filepath.endswith(".snapshot"):
+                from lightrag.kg.networkx_impl import read_graph_snapshot
+
+                self.graph = read_graph_snapshot(filepath)
+            else:
+                self.graph = nx.read_graphml(filepath)
             self.calculate_layout()
             self.update_buffers()
             self.show_load_error = False
@@ -973,10 +978,15 @@ def generate_colors(n: int) -> List[glm.vec3]:
 
 
 def show_file_dialog() -> Optional[str]:
-    """Show a file dialog for selecting GraphML files"""
+    """Show a file dialog for selecting GraphML files or LightRAG graph snapshots"""
     file_path = filedialog.askopenfilename(
-        title="Select GraphML File",
-        filetypes=[("GraphML files", "*.graphml"), ("All files", "*.*")],
+        title="Select Graph File",
+        filetypes=[
+            ("Graph files", "*.graphml *.snapshot"),
+            ("GraphML files", "*.graphml"),
+            ("LightRAG graph snapshots", "*.snapshot"),
+            ("All files", "*.*"),
+        ],
     )
     return file_path if file_path else None
 
@@ -9,6 +9,7 @@ import logging
 import logging.handlers
 import os
 import re
+import time
 from dataclasses import dataclass
 from functools import wraps
 from hashlib import md5
@@ -20,6 +21,8 @@ from lightrag.constants import (
     DEFAULT_LOG_MAX_BYTES,
     DEFAULT_LOG_BACKUP_COUNT,
     DEFAULT_LOG_FILENAME,
+    DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES,
+    DEFAULT_EMBEDDING_CACHE_TTL,
 )
 
 
@@ -313,13 +316,182 @@ class QueueFullError(Exception):
     pass
 
 
-def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
+def _estimate_tokens(value: Any) -> int:
+    """Roughly estimate the prompt tokens of call arguments, about four characters per token"""
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, dict):
+        return sum(_estimate_tokens(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_tokens(v) for v in value)
+    return 0
+
+
+def _is_overload_error(error: BaseException) -> bool:
+    """Check if an error signals that the service is overloaded (rate limit or timeout)"""
+    # tenacity wraps the last failed attempt when retries are exhausted
+    last_attempt = getattr(error, "last_attempt", None)
+    if last_attempt is not None and last_attempt.failed:
+        error = last_attempt.exception()
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if getattr(error, "status_code", None) in (429, 503) or getattr(
+        error, "status", None
+    ) in (429, 503):
+        return True
+    return any(
+        "RateLimit" in cls.__name__ or "Timeout" in cls.__name__
+        for cls in type(error).__mro__
+    )
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit for calls to a rate-limited service
+
+    The limit grows by one for every `limit` successful calls (additive increase) and
+    is multiplied by `decrease_factor` when a call fails with a rate limit or timeout
+    error, or takes longer than `latency_target` (multiplicative decrease). An optional
+    token bucket additionally spreads the estimated prompt tokens over the minute.
+
+    Importance notes:
+    1. The limit is lowered at most once per round of calls: signals from calls started
+       before the last decrease are ignored, as they were sent under the old limit.
+    2. The limit always stays between `min_size` and `max_size`; setting both to the
+       same value gives a fixed concurrency.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        min_size: int = 1,
+        latency_target: float = 0,
+        tokens_per_minute: int = 0,
+        decrease_factor: float = 0.5,
+    ):
+        self.max_size = max_size
+        self.min_size = max(1, min(min_size, max_size))
+        self.latency_target = latency_target
+        self.tokens_per_minute = tokens_per_minute
+        self.decrease_factor = decrease_factor
+        self.limit = float(max_size)
+        self.in_flight = 0
+        self._slots = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+        self._tokens = float(tokens_per_minute)
+        self._tokens_updated = time.monotonic()
+        self._tokens_lock = asyncio.Lock()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_size, int(self.limit))
+
+    async def acquire(self) -> None:
+        """Wait until a call slot is free under the current limit"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._slots < self.current_limit)
+            self._slots += 1
+
+    def start_call(self) -> float:
+        """Record a call starting in an acquired slot, returning its start time"""
+        self.in_flight += 1
+        return time.monotonic()
+
+    async def release(
+        self, started: float | None = None, error: BaseException | None = None
+    ) -> None:
+        """Free a call slot and adapt the limit to the outcome of the call
+
+        Args:
+            started: Start time returned by start_call, None if no call was made
+            error: Exception raised by the call, None if it succeeded
+        """
+        async with self._condition:
+            self._slots -= 1
+            if started is not None:
+                self.in_flight -= 1
+                latency = time.monotonic() - started
+                if (error is not None and _is_overload_error(error)) or (
+                    error is None and 0 < self.latency_target < latency
+                ):
+                    self._decrease(started)
+                elif error is None:
+                    self._increase()
+            self._condition.notify_all()
+
+    def _decrease(self, started: float) -> None:
+        if started < self._last_decrease:
+            return
+        previous = self.current_limit
+        self.limit = max(self.min_size, self.limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        if self.current_limit < previous:
+            logger.info(
+                f"limit_async: Concurrency limit lowered to {self.current_limit} "
+                f"(was {previous})"
+            )
+
+    def _increase(self) -> None:
+        previous = self.current_limit
+        self.limit = min(self.max_size, self.limit + 1 / self.current_limit)
+        if self.current_limit > previous:
+            logger.debug(
+                f"limit_async: Concurrency limit raised to {self.current_limit}"
+            )
+
+    async def consume_tokens(self, tokens: int) -> None:
+        """Wait until the token budget allows a call with the estimated prompt tokens"""
+        if self.tokens_per_minute <= 0:
+            return
+        # A call larger than the whole budget only waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        rate = self.tokens_per_minute / 60
+        async with self._tokens_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.tokens_per_minute,
+                    self._tokens + (now - self._tokens_updated) * rate,
+                )
+                self._tokens_updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / rate)
+
+    def status(self) -> dict[str, Any]:
+        """Report the current limit, calls in flight and remaining token budget"""
+        status = {
+            "limit": self.current_limit,
+            "max_size": self.max_size,
+            "min_size": self.min_size,
+            "in_flight": self.in_flight,
+        }
+        if self.tokens_per_minute > 0:
+            status["tokens_available"] = int(self._tokens)
+        return status
+
+
+def priority_limit_async_func_call(
+    max_size: int,
+    max_queue_size: int = 1000,
+    min_size: int = 1,
+    latency_target: float = 0,
+    tokens_per_minute: int = 0,
+):
     """
     Enhanced priority-limited asynchronous function call decorator
 
+    The number of concurrent calls adapts between min_size and max_size, see
+    AdaptiveConcurrencyLimiter. The decorated function reports the current limit and
+    queue depth through its `status()` method.
+
     Args:
         max_size: Maximum number of concurrent calls
         max_queue_size: Maximum queue capacity to prevent memory overflow
+        min_size: Minimum number of concurrent calls the limit can be lowered to
+        latency_target: Seconds above which a successful call lowers the limit, 0 disables
+        tokens_per_minute: Budget of estimated prompt tokens per minute, 0 disables
     Returns:
         Decorator function
     """
@@ -329,6 +501,12 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
         if not callable(func):
             raise TypeError(f"Expected a callable object, got {type(func)}")
         queue = asyncio.PriorityQueue(maxsize=max_queue_size)
+        limiter = AdaptiveConcurrencyLimiter(
+            max_size,
+            min_size=min_size,
+            latency_target=latency_target,
+            tokens_per_minute=tokens_per_minute,
+        )
         tasks = set()
         initialization_lock = asyncio.Lock()
         counter = 0
@@ -345,6 +523,10 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
             """Worker that processes tasks in the priority queue"""
             try:
                 while not shutdown_event.is_set():
+                    # Take a task only once the adaptive limit has a free slot
+                    await limiter.acquire()
+                    started = None
+                    error = None
                     try:
                         # Use timeout to get tasks, allowing periodic checking of shutdown signal
                         try:
@@ -354,6 +536,7 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                                 future,
                                 args,
                                 kwargs,
+                                tokens,
                             ) = await asyncio.wait_for(queue.get(), timeout=1.0)
                         except asyncio.TimeoutError:
                             # Timeout is just to check shutdown signal, continue to next iteration
@@ -365,16 +548,20 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                             continue
 
                         try:
+                            await limiter.consume_tokens(tokens)
                             # Execute function
+                            started = limiter.start_call()
                             result = await func(*args, **kwargs)
                             # If future is not done, set the result
                             if not future.done():
                                 future.set_result(result)
-                        except asyncio.CancelledError:
+                        except asyncio.CancelledError as e:
+                            error = e
                             if not future.done():
                                 future.cancel()
                             logger.debug("limit_async: Task cancelled during execution")
                         except Exception as e:
+                            error = e
                             logger.error(
                                 f"limit_async: Error in decorated function: {str(e)}"
                             )
@@ -386,6 +573,8 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                         # Catch all exceptions in worker loop to prevent worker termination
                         logger.error(f"limit_async: Critical error in worker: {str(e)}")
                         await asyncio.sleep(0.1)  # Prevent high CPU usage
+                    finally:
+                        await limiter.release(started, error)
             finally:
                 logger.debug("limit_async: Worker exiting")
 
@@ -512,9 +701,18 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
 
             logger.info("limit_async: Priority queue workers shutdown complete")
 
+        def status():
+            """Report the current concurrency limit, calls in flight and queue depth"""
+            return {**limiter.status(), "queue_size": queue.qsize()}
+
         @wraps(func)
         async def wait_func(
-            *args, _priority=10, _timeout=None, _queue_timeout=None, **kwargs
+            *args,
+            _priority=10,
+            _timeout=None,
+            _queue_timeout=None,
+            _tokens=None,
+            **kwargs,
         ):
             """
             Execute the function with priority-based concurrency control
@@ -523,6 +721,8 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 _priority: Call priority (lower values have higher priority)
                 _timeout: Maximum time to wait for function completion (in seconds)
                 _queue_timeout: Maximum time to wait for entering the queue (in seconds)
+                _tokens: Prompt tokens counted against the token budget, estimated from
+                    the arguments when omitted
                 **kwargs: Keyword arguments passed to the function
             Returns:
                 The result of the function call
@@ -543,6 +743,9 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 current_count = counter  # Use local variable to avoid race conditions
                 counter += 1
 
+            if _tokens is None and tokens_per_minute > 0:
+                _tokens = _estimate_tokens([args, kwargs])
+
             # Try to put the task into the queue, supporting timeout
             try:
                 if _queue_timeout is not None:
@@ -550,7 +753,16 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                     try:
                         await asyncio.wait_for(
                             # current_count is used to ensure FIFO order
-                            queue.put((_priority, current_count, future, args, kwargs)),
+                            queue.put(
+                                (
+                                    _priority,
+                                    current_count,
+                                    future,
+                                    args,
+                                    kwargs,
+                                    _tokens,
+                                )
+                            ),
                             timeout=_queue_timeout,
                         )
                     except asyncio.TimeoutError:
@@ -560,7 +772,9 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 else:
                     # No timeout, may wait indefinitely
                     # current_count is used to ensure FIFO order
-                    await queue.put((_priority, current_count, future, args, kwargs))
+                    await queue.put(
+                        (_priority, current_count, future, args, kwargs, _tokens)
+                    )
             except Exception as e:
                 # Clean up the future
                 if not future.done():
@@ -589,6 +803,7 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
 
         # Add the shutdown method to the decorated function
         wait_func.shutdown = shutdown
+        wait_func.status = status
 
         return wait_func
 
@@ -783,6 +998,225 @@ def process_combine_contexts(*context_lists):
     return combined_data
 
 
+class _SemanticCacheBucket:
+    """Quantized embeddings of the cache entries of one (mode, cache_type)"""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self.quantized = np.zeros((capacity, dim), dtype=np.uint8)
+        # Per row dequantization: value = quantized * scale + offset
+        self.scale = np.zeros(capacity, dtype=np.float32)
+        self.offset = np.zeros(capacity, dtype=np.float32)
+        self.norm = np.ones(capacity, dtype=np.float32)
+        self.inserted_at = np.zeros(capacity, dtype=np.float64)
+        self.used_at = np.zeros(capacity, dtype=np.float64)
+        self.live = np.zeros(capacity, dtype=np.bool_)
+        self.keys: list[str | None] = [None] * capacity
+        self.rows: dict[str, int] = {}
+        self.free = list(range(capacity - 1, -1, -1))
+
+    def grow(self) -> None:
+        capacity = len(self.keys)
+        for name in (
+            "quantized",
+            "scale",
+            "offset",
+            "norm",
+            "inserted_at",
+            "used_at",
+            "live",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros((capacity * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:capacity] = array
+            setattr(self, name, grown)
+        self.keys.extend([None] * capacity)
+        self.free.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def remove_row(self, row: int) -> None:
+        del self.rows[self.keys[row]]
+        self.keys[row] = None
+        self.live[row] = False
+        self.free.append(row)
+
+
+class SemanticQueryCache:
+    """
+    In-memory similarity index over the embeddings of cached LLM responses.
+
+    The quantized embeddings of one (mode, cache_type) are kept in a contiguous uint8
+    matrix with per row dequantization parameters, so a lookup is one blocked
+    matrix-vector product instead of decoding every cache entry. Only cache ids are
+    indexed, responses are read from the cache storage on a hit. Rows beyond
+    max_entries are evicted least recently used, and rows older than ttl seconds
+    are no longer matched (ttl <= 0 disables expiry).
+    """
+
+    _BLOCK_ROWS = 4096
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl: float = DEFAULT_EMBEDDING_CACHE_TTL,
+        bits: int = 8,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bits = bits
+        self._buckets: dict[tuple[str, str | None], _SemanticCacheBucket] = {}
+        self._loaded_modes: set[str] = set()
+        self._load_locks: dict[str, asyncio.Lock] = {}
+
+    async def load_mode(self, hashing_kv, mode: str) -> None:
+        """Index the cache entries of a mode already persisted in hashing_kv, once
+
+        Concurrent lookups of a mode wait for the first load to finish, and a failed
+        load is retried by the next lookup.
+        """
+        if mode in self._loaded_modes:
+            return
+        async with self._load_locks.setdefault(mode, asyncio.Lock()):
+            if mode in self._loaded_modes:
+                return
+            mode_cache = await hashing_kv.get_by_id(mode) or {}
+            for cache_id, cache_data in mode_cache.items():
+                if not isinstance(cache_data, dict) or not cache_data.get("embedding"):
+                    continue
+                try:
+                    quantized = np.frombuffer(
+                        bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
+                    )
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Error processing cached embedding: {str(e)}")
+                    continue
+                self.add(
+                    mode,
+                    cache_data.get("cache_type"),
+                    cache_id,
+                    quantized,
+                    cache_data.get("embedding_min"),
+                    cache_data.get("embedding_max"),
+                )
+            self._loaded_modes.add(mode)
+
+    def add(
+        self,
+        mode: str,
+        cache_type: str | None,
+        cache_id: str,
+        quantized: np.ndarray,
+        min_val: float | None,
+        max_val: float | None,
+    ) -> None:
+        if min_val is None or max_val is None or min_val > max_val:
+            logger.warning(
+                f"Invalid embedding min/max values: min={min_val}, max={max_val}"
+            )
+            return
+        quantized = np.asarray(quantized, dtype=np.uint8).ravel()
+        embedding = dequantize_embedding(quantized, min_val, max_val, self.bits)
+        norm = float(np.linalg.norm(embedding))
+        if not norm:
+            return
+
+        bucket = self._buckets.get((mode, cache_type))
+        if bucket is None or bucket.dim != len(quantized):
+            # New bucket, or the embedding model changed
+            bucket = self._buckets[(mode, cache_type)] = _SemanticCacheBucket(
+                len(quantized)
+            )
+        row = bucket.rows.get(cache_id)
+        if row is None:
+            if len(bucket.rows) >= self.max_entries:
+                lru = np.where(bucket.live, bucket.used_at, np.inf).argmin()
+                bucket.remove_row(int(lru))
+            if not bucket.free:
+                bucket.grow()
+            row = bucket.free.pop()
+            bucket.rows[cache_id] = row
+            bucket.keys[row] = cache_id
+
+        now = time.monotonic()
+        bucket.quantized[row] = quantized
+        bucket.offset[row] = min_val
+        bucket.scale[row] = (
+            (max_val - min_val) / (2**self.bits - 1) if max_val != min_val else 0.0
+        )
+        bucket.norm[row] = norm
+        bucket.inserted_at[row] = now
+        bucket.used_at[row] = now
+        bucket.live[row] = True
+
+    def remove(self, mode: str, cache_type: str | None, cache_id: str) -> None:
+        for (bucket_mode, bucket_type), bucket in self._buckets.items():
+            if bucket_mode != mode or (cache_type and bucket_type != cache_type):
+                continue
+            row = bucket.rows.get(cache_id)
+            if row is not None:
+                bucket.remove_row(row)
+
+    def search(
+        self, mode: str, cache_type: str | None, embedding: np.ndarray
+    ) -> tuple[str, str | None, float] | None:
+        """Return (cache_id, cache_type, cosine similarity) of the most similar entry"""
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query_norm = float(np.linalg.norm(query))
+        if not query_norm:
+            return None
+        query = query / query_norm
+        query_sum = float(query.sum())
+        now = time.monotonic()
+
+        best = None
+        for (bucket_mode, bucket_type), bucket in self._buckets.items():
+            if bucket_mode != mode or (cache_type and bucket_type != cache_type):
+                continue
+            if not bucket.rows or bucket.dim != len(query):
+                continue
+            if self.ttl > 0:
+                expired = bucket.live & (bucket.inserted_at < now - self.ttl)
+                for row in np.flatnonzero(expired).tolist():
+                    bucket.remove_row(row)
+
+            # Only scan up to the last live row, in blocks to bound the float copy
+            end = int(np.flatnonzero(bucket.live).max(initial=-1)) + 1
+            if not end:
+                continue
+            similarity = np.empty(end, dtype=np.float32)
+            for start in range(0, end, self._BLOCK_ROWS):
+                stop = min(start + self._BLOCK_ROWS, end)
+                similarity[start:stop] = (
+                    bucket.quantized[start:stop].astype(np.float32) @ query
+                )
+            similarity *= bucket.scale[:end]
+            similarity += bucket.offset[:end] * query_sum
+            similarity /= bucket.norm[:end]
+            similarity[~bucket.live[:end]] = -np.inf
+
+            row = int(similarity.argmax())
+            if best is None or similarity[row] > best[3]:
+                best = (bucket, bucket_type, row, float(similarity[row]))
+
+        if best is None:
+            return None
+        bucket, bucket_type, row, similarity = best
+        bucket.used_at[row] = now
+        return bucket.keys[row], bucket_type, similarity
+
+
+def get_semantic_cache(hashing_kv) -> SemanticQueryCache:
+    """Return the similarity index attached to an LLM response cache storage"""
+    cache = getattr(hashing_kv, "_semantic_query_cache", None)
+    if cache is None:
+        config = hashing_kv.global_config.get("embedding_cache_config") or {}
+        cache = SemanticQueryCache(
+            max_entries=config.get("max_entries", DEFAULT_EMBEDDING_CACHE_MAX_ENTRIES),
+            ttl=config.get("ttl", DEFAULT_EMBEDDING_CACHE_TTL),
+        )
+        hashing_kv._semantic_query_cache = cache
+    return cache
+
+
 async def get_best_cached_response(
     hashing_kv,
     current_embedding,
@@ -796,116 +1230,78 @@ async def get_best_cached_response(
     logger.debug(
         f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
     )
-    mode_cache = await hashing_kv.get_by_id(mode)
-    if not mode_cache:
+    semantic_cache = get_semantic_cache(hashing_kv)
+    await semantic_cache.load_mode(hashing_kv, mode)
+    match = semantic_cache.search(mode, cache_type, current_embedding)
+    if match is None:
+        return None
+    best_cache_id, best_cache_type, best_similarity = match
+    if best_similarity <= similarity_threshold:
         return None
 
-    best_similarity = -1
-    best_response = None
-    best_prompt = None
-    best_cache_id = None
-
-    # Only iterate through cache entries for this mode
-    for cache_id, cache_data in mode_cache.items():
-        # Skip if cache_type doesn't match
-        if cache_type and cache_data.get("cache_type") != cache_type:
-            continue
-
-        # Check if cache data is valid
-        if cache_data["embedding"] is None:
-            continue
+    if exists_func(hashing_kv, "get_by_mode_and_id"):
+        mode_cache = await hashing_kv.get_by_mode_and_id(mode, best_cache_id) or {}
+    else:
+        mode_cache = await hashing_kv.get_by_id(mode) or {}
+    cache_data = mode_cache.get(best_cache_id)
+    if cache_data is None:
+        # Entry was cleared from the storage after it was indexed
+        semantic_cache.remove(mode, best_cache_type, best_cache_id)
+        return None
+    best_response = cache_data["return"]
+    best_prompt = cache_data.get("original_prompt") or ""
+
+    # If LLM check is enabled and all required parameters are provided
+    if (
+        use_llm_check
+        and llm_func
+        and original_prompt
+        and best_prompt
+        and best_response is not None
+    ):
+        compare_prompt = PROMPTS["similarity_check"].format(
+            original_prompt=original_prompt, cached_prompt=best_prompt
+        )
 
         try:
-            # Safely convert cached embedding
-            cached_quantized = np.frombuffer(
-                bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
-            ).reshape(cache_data["embedding_shape"])
-
-            # Ensure min_val and max_val are valid float values
-            embedding_min = cache_data.get("embedding_min")
-            embedding_max = cache_data.get("embedding_max")
-
-            if (
-                embedding_min is None
-                or embedding_max is None
-                or embedding_min >= embedding_max
-            ):
-                logger.warning(
-                    f"Invalid embedding min/max values: min={embedding_min}, max={embedding_max}"
-                )
-                continue
-
-            cached_embedding = dequantize_embedding(
-                cached_quantized,
-                embedding_min,
-                embedding_max,
-            )
-        except Exception as e:
-            logger.warning(f"Error processing cached embedding: {str(e)}")
-            continue
-
-        similarity = cosine_similarity(current_embedding, cached_embedding)
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_response = cache_data["return"]
-            best_prompt = cache_data["original_prompt"]
-            best_cache_id = cache_id
-
-    if best_similarity > similarity_threshold:
-        # If LLM check is enabled and all required parameters are provided
-        if (
-            use_llm_check
-            and llm_func
-            and original_prompt
-            and best_prompt
-            and best_response is not None
-        ):
-            compare_prompt = PROMPTS["similarity_check"].format(
-                original_prompt=original_prompt, cached_prompt=best_prompt
-            )
-
-            try:
-                llm_result = await llm_func(compare_prompt)
-                llm_result = llm_result.strip()
-                llm_similarity = float(llm_result)
-
-                # Replace vector similarity with LLM similarity score
-                best_similarity = llm_similarity
-                if best_similarity < similarity_threshold:
-                    log_data = {
-                        "event": "cache_rejected_by_llm",
-                        "type": cache_type,
-                        "mode": mode,
-                        "original_question": original_prompt[:100] + "..."
-                        if len(original_prompt) > 100
-                        else original_prompt,
-                        "cached_question": best_prompt[:100] + "..."
-                        if len(best_prompt) > 100
-                        else best_prompt,
-                        "similarity_score": round(best_similarity, 4),
-                        "threshold": similarity_threshold,
-                    }
-                    logger.debug(json.dumps(log_data, ensure_ascii=False))
-                    logger.info(f"Cache rejected by LLM(mode:{mode} tpye:{cache_type})")
-                    return None
-            except Exception as e:  # Catch all possible exceptions
-                logger.warning(f"LLM similarity check failed: {e}")
-                return None  # Return None directly when LLM check fails
-
-        prompt_display = (
-            best_prompt[:50] + "..." if len(best_prompt) > 50 else best_prompt
-        )
-        log_data = {
-            "event": "cache_hit",
-            "type": cache_type,
-            "mode": mode,
-            "similarity": round(best_similarity, 4),
-            "cache_id": best_cache_id,
-            "original_prompt": prompt_display,
-        }
-        logger.debug(json.dumps(log_data, ensure_ascii=False))
-        return best_response
-    return None
+            llm_result = await llm_func(compare_prompt)
+            llm_result = llm_result.strip()
+            llm_similarity = float(llm_result)
+
+            # Replace vector similarity with LLM similarity score
+            best_similarity = llm_similarity
+            if best_similarity < similarity_threshold:
+                log_data = {
+                    "event": "cache_rejected_by_llm",
+                    "type": cache_type,
+                    "mode": mode,
+                    "original_question": original_prompt[:100] + "..."
+                    if len(original_prompt) > 100
+                    else original_prompt,
+                    "cached_question": best_prompt[:100] + "..."
+                    if len(best_prompt) > 100
+                    else best_prompt,
+                    "similarity_score": round(best_similarity, 4),
+                    "threshold": similarity_threshold,
+                }
+                logger.debug(json.dumps(log_data, ensure_ascii=False))
+                logger.info(f"Cache rejected by LLM(mode:{mode} tpye:{cache_type})")
+                return None
+        except Exception as e:  # Catch all possible exceptions
+            logger.warning(f"LLM similarity check failed: {e}")
+            return None  # Return None directly when LLM check fails
+
+    prompt_display = best_prompt[:50] + "..." if len(best_prompt) > 50 else best_prompt
+    log_data = {
+        "event": "cache_hit",
+        "type": cache_type,
+        "mode": mode,
+        "similarity": round(best_similarity, 4),
+        "cache_id": best_cache_id,
+        "original_prompt": prompt_display,
+    }
+    logger.debug(json.dumps(log_data, ensure_ascii=False))
+    return best_response
 
 
 def cosine_similarity(v1, v2):
@@ -922,9 +1318,9 @@ def quantize_embedding(embedding: np.ndarray | list[float], bits: int = 8) -> tu
     if isinstance(embedding, list):
         embedding = np.array(embedding)
 
-    # Calculate min/max values for reconstruction
-    min_val = embedding.min()
-    max_val = embedding.max()
+    # Calculate min/max values for reconstruction, as python floats so they can be stored as JSON
+    min_val = float(embedding.min())
+    max_val = float(embedding.max())
 
     if min_val == max_val:
         # handle constant vector
@@ -976,6 +1372,38 @@ async def handle_cache(
         logger.debug(f"Non-embedding cached hit(mode:{mode} type:{cache_type})")
         return mode_cache[args_hash]["return"], None, None, None
 
+    # Queries fall back to the most similar cached query when the embedding cache is enabled
+    embedding_cache_config = (
+        hashing_kv.global_config.get("embedding_cache_config") or {}
+    )
+    if (
+        mode != "default"
+        and embedding_cache_config.get("enabled")
+        and hashing_kv.embedding_func is not None
+    ):
+        current_embedding = (await hashing_kv.embedding_func([prompt]))[0]
+        quantized, min_val, max_val = quantize_embedding(current_embedding)
+        use_llm_check = embedding_cache_config.get("use_llm_check", False)
+        best_cached_response = await get_best_cached_response(
+            hashing_kv,
+            current_embedding,
+            similarity_threshold=embedding_cache_config.get(
+                "similarity_threshold", 0.95
+            ),
+            mode=mode,
+            use_llm_check=use_llm_check,
+            llm_func=hashing_kv.global_config.get("llm_model_func")
+            if use_llm_check
+            else None,
+            original_prompt=prompt,
+            cache_type=cache_type,
+        )
+        if best_cached_response is not None:
+            logger.debug(f"Embedding cached hit(mode:{mode} type:{cache_type})")
+            return best_cached_response, None, None, None
+        logger.debug(f"Embedding cached missed(mode:{mode} type:{cache_type})")
+        return None, quantized, min_val, max_val
+
     logger.debug(f"Non-embedding cached missed(mode:{mode} type:{cache_type})")
     return None, None, None, None
 
@@ -1048,6 +1476,16 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
     # Only upsert if there's actual new content
     await hashing_kv.upsert({cache_data.mode: mode_cache})
 
+    if cache_data.quantized is not None:
+        get_semantic_cache(hashing_kv).add(
+            cache_data.mode,
+            cache_data.cache_type,
+            cache_data.args_hash,
+            cache_data.quantized,
+            cache_data.min_val,
+            cache_data.max_val,
+        )
+
 
 def safe_unicode_decode(content):
     # Regular expression to find all Unicode escape sequences of the form \uXXXX
@@ -1768,3 +2206,172 @@ class TokenTracker:
             f"Completion tokens: {usage['completion_tokens']}, "
             f"Total tokens: {usage['total_tokens']}"
         )
+
+
+class PersistenceScheduler:
+    """Coalesce persistence of in-memory storages across processed documents.
+
+    Instead of rewriting every storage file after each document, processed
+    documents are recorded and the storages are flushed at most every
+    `interval` seconds or once `max_docs` documents are pending. Each pending
+    document is appended to a write-ahead journal before being acknowledged, so
+    documents whose data had not reached disk can be found again after a crash.
+
+    Args:
+        flush_func: Coroutine function persisting all storages
+        journal_file: Path of the journal, one JSON record per line
+        interval: Max seconds a processed document waits for a flush, 0 to flush immediately
+        max_docs: Flush once this many documents are pending, 1 to flush after every document
+    """
+
+    def __init__(
+        self,
+        flush_func: Callable[[], Any],
+        journal_file: str,
+        interval: float,
+        max_docs: int,
+    ):
+        self._flush_func = flush_func
+        self._journal_file = journal_file
+        self._interval = interval
+        self._max_docs = max(1, max_docs)
+        self._pending: list[str] = []
+        self._last_flush = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        # Serializes journal writes, which run in worker threads
+        self._journal_lock: asyncio.Lock | None = None
+        self._timer: asyncio.Task | None = None
+
+    def journaled_docs(self) -> list[str]:
+        """Return ids of documents processed but not yet persisted, as left by a crash"""
+        if not os.path.exists(self._journal_file):
+            return []
+        doc_ids = []
+        with open(self._journal_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    doc_ids.append(json.loads(line)["doc_id"])
+                except (json.JSONDecodeError, KeyError):
+                    # A torn last line from an interrupted write, skip it
+                    continue
+        return list(dict.fromkeys(doc_ids))
+
+    def clear_journal(self, keep: list[str] | None = None) -> None:
+        """Truncate the journal, keeping records of the given document ids"""
+        if not keep:
+            if os.path.exists(self._journal_file):
+                os.remove(self._journal_file)
+            return
+        tmp_file = self._journal_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({"doc_id": doc_id}) + "\n" for doc_id in keep)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._journal_file)
+
+    def _append_journal(self, doc_id: str) -> None:
+        with open(self._journal_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"doc_id": doc_id}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _get_journal_lock(self) -> asyncio.Lock:
+        if self._journal_lock is None:
+            self._journal_lock = asyncio.Lock()
+        return self._journal_lock
+
+    async def mark_done(self, doc_id: str) -> None:
+        """Record a processed document, flushing the storages if a threshold is reached"""
+        async with self._get_journal_lock():
+            # The fsync would otherwise stall the event loop for every document
+            await asyncio.to_thread(self._append_journal, doc_id)
+            self._pending.append(doc_id)
+        if (
+            len(self._pending) >= self._max_docs
+            or time.monotonic() - self._last_flush >= self._interval
+        ):
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # Documents stay pending and journaled, the next flush retries them
+            logger.error(f"Scheduled persistence failed: {e}")
+
+    async def flush(self) -> None:
+        """Persist the storages if any processed document is pending"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._pending:
+                return
+            flushed = self._pending
+            self._pending = []
+            try:
+                await self._flush_func()
+            except BaseException:
+                self._pending = flushed + self._pending
+                raise
+            self._last_flush = time.monotonic()
+            # Documents marked while flushing were journaled after the snapshot
+            async with self._get_journal_lock():
+                await asyncio.to_thread(self.clear_journal, list(self._pending))
+            logger.debug(f"Persisted storages for {len(flushed)} processed document(s)")
+
+    async def close(self) -> None:
+        """Cancel the scheduled flush and persist everything still pending"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+class ClientPool:
+    """Keep long-lived API clients, keyed by their configuration, across calls
+
+    Creating an HTTP client per request pays TCP and TLS handshakes on every LLM or
+    embedding call. The pool hands out one client per configuration key instead, so
+    their connection pools stay warm for the lifetime of the process.
+
+    Importance notes:
+    1. Clients are bound to the event loop that created them, so the pool keeps a
+       separate set of clients per running loop, dropped with the loop.
+    2. Clients must be closed with `aclose()` (called by `finalize_storages`) on the
+       loop that created them; callers must not close pooled clients themselves.
+    """
+
+    def __init__(self):
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Any, Any]
+        ] = weakref.WeakKeyDictionary()
+
+    def get(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """Return the pooled client for key, creating it with factory on first use"""
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = factory()
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client created on the running event loop"""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            close = getattr(client, "aclose", None) or getattr(client, "close")
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Failed to close pooled client: {e}")
+        if clients:
+            logger.debug(f"Closed {len(clients)} pooled API client(s)")
+
+
+# Shared pool of LLM and embedding API clients
+llm_client_pool = ClientPool()
@@ -41,12 +41,18 @@ def extract_queries(file_path):
 
     return queries
 
-async def process_query(query_text, rag_instance: LightRAG, query_param):
-    try:
-        result = await rag_instance.aquery(query_text, param=query_param)
-        return {"query": query_text, "result": result}, None
-    except Exception as e:
-        return None, {"query": query_text, "error": str(e)}
+async def process_queries(queries, rag_instance: LightRAG, query_param):
+    # Late-interaction searches are batched, LLM calls run concurrently
+    results = await rag_instance.aquery_batch(
+        queries, param=query_param, return_exceptions=True
+    )
+    outcomes = []
+    for query_text, result in zip(queries, results):
+        if isinstance(result, BaseException):
+            outcomes.append((None, {"query": query_text, "error": str(result)}))
+        else:
+            outcomes.append(({"query": query_text, "result": result}, None))
+    return outcomes
 
 
 def run_queries_and_save_to_json(
@@ -60,11 +66,10 @@ def run_queries_and_save_to_json(
         result_file.write("[\n")
         first_entry = True
 
-        for query_text in queries:
-            result, error = loop.run_until_complete(
-                process_query(query_text, rag_instance, query_param)
-            )
-
+        outcomes = loop.run_until_complete(
+            process_queries(queries, rag_instance, query_param)
+        )
+        for result, error in outcomes:
             if result:
                 if not first_entry:
                     result_file.write(",\n")
@@ -0,0 +1,161 @@
+"""Multiprocess tests of the striped graph database locks
+
+Two workers merge overlapping entities and relations while a third one repeatedly
+takes the global graph database lock. Workers are forked after the shared data is
+initialized, as with Gunicorn's preload.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+
+import pytest
+
+from lightrag.kg import shared_storage
+
+ENTITIES = [f"entity_{i}" for i in range(12)]
+RELATIONS = [
+    (src, tgt) for i, src in enumerate(ENTITIES) for tgt in ENTITIES[i + 1 : i + 3]
+]
+MERGE_ROUNDS = 40
+EXCLUSIVE_ROUNDS = 20
+WORKER_TIMEOUT = 60
+
+
+def _merge_plan(seed: int) -> list[tuple[list[str], list[tuple[str, str]]]]:
+    """Entities and relations merged by a worker, as (entity names, relations) pairs"""
+    rng = random.Random(seed)
+    plan = []
+    for i in range(MERGE_ROUNDS):
+        if i % 2:
+            plan.append((rng.sample(ENTITIES, 3), []))
+        else:
+            # Relation merges also hold the locks of their endpoint entities
+            edges = rng.sample(RELATIONS, 2)
+            plan.append((sorted({name for edge in edges for name in edge}), edges))
+    return plan
+
+
+def _merge_keys(entity_names, edges) -> list[str]:
+    return list(entity_names) + [f"{src}|{tgt}" for src, tgt in edges]
+
+
+async def _merge_worker(graph, active, seed: int):
+    pid = os.getpid()
+
+    async def merge(entity_names, edges):
+        async with shared_storage.get_graph_db_edge_lock(
+            *edges, entity_names=entity_names
+        ):
+            active[pid] = active.get(pid, 0) + 1
+            keys = _merge_keys(entity_names, edges)
+            counts = {key: graph.get(key, 0) for key in keys}
+            # Stands for the LLM summaries awaited while holding the locks
+            await asyncio.sleep(random.uniform(0, 0.005))
+            for key in keys:
+                graph[key] = counts[key] + 1
+            active[pid] -= 1
+
+    await asyncio.gather(*[merge(*item) for item in _merge_plan(seed)])
+
+
+async def _exclusive_worker(active, violations):
+    for _ in range(EXCLUSIVE_ROUNDS):
+        async with shared_storage.get_graph_db_lock():
+            if sum(active.values()) > 0:
+                violations.append(dict(active))
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.001)
+
+
+def _run_merge_worker(graph, active, seed):
+    asyncio.run(_merge_worker(graph, active, seed))
+
+
+def _run_exclusive_worker(active, violations):
+    asyncio.run(_exclusive_worker(active, violations))
+
+
+@pytest.fixture
+def multiprocess_shared_data(monkeypatch):
+    # Few stripes so that entities and relations of both workers share locks
+    monkeypatch.setenv("GRAPH_DB_LOCK_STRIPES", "4")
+    shared_storage.initialize_share_data(workers=3)
+    try:
+        yield shared_storage._manager
+    finally:
+        shared_storage.finalize_share_data()
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="workers inherit the shared data by forking",
+)
+def test_merges_and_global_lock_across_processes(multiprocess_shared_data):
+    manager = multiprocess_shared_data
+    graph = manager.dict()
+    active = manager.dict()
+    violations = manager.list()
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_run_merge_worker, args=(graph, active, seed))
+        for seed in (1, 2)
+    ]
+    workers.append(
+        context.Process(target=_run_exclusive_worker, args=(active, violations))
+    )
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(WORKER_TIMEOUT)
+
+    hung = [worker.pid for worker in workers if worker.is_alive()]
+    for worker in workers:
+        if worker.is_alive():
+            worker.kill()
+    assert not hung, f"workers {hung} deadlocked"
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    # No update was lost: every merge incremented each of its keys exactly once
+    expected = {}
+    for seed in (1, 2):
+        for entity_names, edges in _merge_plan(seed):
+            for key in _merge_keys(entity_names, edges):
+                expected[key] = expected.get(key, 0) + 1
+    assert dict(graph) == expected
+    # The global lock never overlapped a merge
+    assert list(violations) == []
+
+
+async def _abandoned_merge_worker():
+    async with shared_storage.get_graph_db_edge_lock(entity_names=ENTITIES[:2]):
+        # Killed while merging: the merge is never counted as finished
+        os._exit(0)
+
+
+def _run_abandoned_merge_worker():
+    asyncio.run(_abandoned_merge_worker())
+
+
+async def _acquire_graph_db_lock():
+    async with shared_storage.get_graph_db_lock():
+        return True
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="workers inherit the shared data by forking",
+)
+def test_global_lock_ignores_merges_of_exited_process(multiprocess_shared_data):
+    worker = multiprocessing.get_context("fork").Process(
+        target=_run_abandoned_merge_worker
+    )
+    worker.start()
+    worker.join(WORKER_TIMEOUT)
+    assert worker.exitcode == 0
+    assert shared_storage._graph_db_merges[worker.pid] == 1
+
+    assert asyncio.run(asyncio.wait_for(_acquire_graph_db_lock(), WORKER_TIMEOUT))
+    assert worker.pid not in shared_storage._graph_db_merges